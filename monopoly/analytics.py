@@ -1,18 +1,120 @@
 """ Functions to analyze the results of the simulation """
+from collections import Counter
+from typing import Iterator
 
 import pandas as pd
 
+from monopoly.core.game_config import GameConfig
 from monopoly.log_settings import LogSettings
-from settings import SimulationSettings, GameSettings
+from monopoly.results import print_remaining_players, print_game_length, print_winning_rate
+from monopoly.stats_log import GAMES_TABLE, SNAPSHOTS_TABLE, has_table, iter_table
+from monopoly.survival import SurvivalCurves, survival_curves
+
+# Rows read at a time: memory use does not depend on the number of games
+CHUNK_ROWS = 1_000_000
 
 
 class Analyzer:
     """ Functions to analyze games after the simulation is finished
-    data is read from the bankruptcies.tsv log file
+    data is read from the statistics (see stats_log.py) if they are kept, from the bankruptcies.tsv log file if not
+    (during the simulation, results are aggregated by SimulationResults instead).
+    Data is read in chunks of chunk_rows rows (only the columns needed) and folded into aggregates,
+    variant is the sweep's variant to analyze ("" for a simulation).
+    Shares are of the games actually played (a simulation can stop early): counted in the statistics,
+    or recorded by the simulation (or the sweep, for each variant) next to the bankruptcies log.
+    A variant that was not played raises ValueError.
+    Games are played in the order of their numbers, so the games a simulation counted are the first ones:
+    statistics of later games (of chunks that were still playing when it stopped) are left out.
+    game_config is the settings the games were played with (players, number of games, turn limit),
+    by default taken from settings.py
     """
 
-    def __init__(self):
-        self.df = pd.read_csv(LogSettings.BANKRUPTCIES_PATH, sep='\t')
+    def __init__(self, variant: str = "", chunk_rows: int = CHUNK_ROWS, game_config: GameConfig = None):
+        if game_config is None:
+            game_config = GameConfig()
+        self.variant = variant
+        self.chunk_rows = chunk_rows
+        self.n_moves = game_config.n_moves
+        self.players = [player_name for player_name, _ in game_config.players_list]
+        self.has_stats = LogSettings.KEEP_STATS and has_table(LogSettings.STATS_DIR, GAMES_TABLE)
+        # Number of games the simulation (or the sweep's variant) played, None if not recorded
+        self.games_played = LogSettings.games_played(variant)
+        if self.games_played is None and (variant or LogSettings.GAMES_PLAYED_PATH.exists()):
+            raise ValueError(f"No results of the variant {variant!r} in the last simulation or sweep")
+
+        # Same aggregates as in SimulationResults
+        # {remaining players: games}, for the games with bankruptcies
+        self.remaining = Counter()
+        # {game length: finished games}, game length is the turn of the last bankruptcy
+        self.lengths = Counter()
+        # {player name: games lost}
+        self.loses = Counter()
+        # {(player name, turn): games lost on the turn}
+        self.bankruptcy_turns = Counter()
+        # Rows of the statistics' games table read (a row per player of each game)
+        self.game_rows = 0
+
+        # Rows of a game can be split between two chunks: the last game of a chunk is added with the next one
+        last_game_rows = None
+        for bankruptcies in self.bankruptcy_chunks():
+            if last_game_rows is not None:
+                bankruptcies = pd.concat([last_game_rows, bankruptcies])
+            is_last_game = (bankruptcies["game_number"] == bankruptcies["game_number"].iat[-1]).to_numpy()
+            last_game_rows = bankruptcies[is_last_game]
+            self.add_bankruptcies(bankruptcies[~is_last_game])
+        if last_game_rows is not None:
+            self.add_bankruptcies(last_game_rows)
+
+        # Number of games played
+        if self.has_stats:
+            self.n_games = self.game_rows // len(self.players)
+        else:
+            self.n_games = game_config.n_games if self.games_played is None else self.games_played
+
+    def read_stats(self, table, columns) -> Iterator[pd.DataFrame]:
+        """ Columns of a statistics table, the rows of the analyzed variant (and games played), chunk by chunk """
+        read_columns = columns if "game_number" in columns else columns + ["game_number"]
+        for batch in iter_table(LogSettings.STATS_DIR, table, read_columns, self.variant, self.chunk_rows):
+            rows = batch.to_pandas()
+            if self.games_played is not None:
+                rows = rows[rows["game_number"] <= self.games_played]
+            yield rows[columns]
+
+    def bankruptcy_chunks(self) -> Iterator[pd.DataFrame]:
+        """ Bankruptcies (game_number, player_bankrupt, turn, as in bankruptcies.tsv) chunk by chunk,
+        rows of a game one after another (they are written together)
+        """
+        if self.has_stats:
+            for games in self.read_stats(GAMES_TABLE, ["game_number", "player", "bankrupt_turn"]):
+                self.game_rows += len(games)
+                bankruptcies = games.dropna(subset=["bankrupt_turn"])
+                if len(bankruptcies):
+                    yield pd.DataFrame({"game_number": bankruptcies["game_number"],
+                                        "player_bankrupt": bankruptcies["player"],
+                                        "turn": bankruptcies["bankrupt_turn"].astype(int)})
+        else:
+            # A sweep's log has the variant of each row (rows of a variant are in the order of games)
+            for bankruptcies in pd.read_csv(LogSettings.BANKRUPTCIES_PATH, sep='\t', chunksize=self.chunk_rows,
+                                            dtype={"variant": str}, keep_default_na=False):
+                if "variant" in bankruptcies.columns:
+                    bankruptcies = bankruptcies.loc[bankruptcies["variant"] == self.variant,
+                                                    ["game_number", "player_bankrupt", "turn"]]
+                elif self.variant:
+                    raise ValueError(f"No bankruptcies of the variant {self.variant!r}: "
+                                     f"{LogSettings.BANKRUPTCIES_PATH} is the log of a simulation")
+                if len(bankruptcies):
+                    yield bankruptcies
+
+    def add_bankruptcies(self, bankruptcies: pd.DataFrame):
+        """ Add the bankruptcies of whole games to the aggregates """
+        n_players = len(self.players)
+        # Number of losers and the last bankruptcy of each game
+        games = bankruptcies.groupby('game_number', sort=False)['turn'].agg(['size', 'max'])
+        self.remaining.update((n_players - games['size']).tolist())
+        # Game length, for finished games (all players but one are bankrupt)
+        self.lengths.update(games.loc[games['size'] == n_players - 1, 'max'].tolist())
+        self.loses.update(bankruptcies['player_bankrupt'].tolist())
+        self.bankruptcy_turns.update(bankruptcies.groupby(['player_bankrupt', 'turn']).size().to_dict())
 
     def run_all(self):
         """ Run all analysis functions """
@@ -23,63 +125,59 @@ class Analyzer:
     def remaining_players(self):
         """ number of games that had a clear winner, how many players remain at the end
         """
-        grouped = self.df.groupby('game_number').size().reset_index(name='Losers')
-        result = grouped['Losers'].value_counts().reset_index()
-        result.columns = ['Losers', 'count']
-
         # {remaining players: games}
-        remaining_players = {len(GameSettings.players_list) - row['Losers']: row['count'] for index, row in
-                             result.iterrows()}
+        remaining_players = dict(self.remaining)
         # Add games with no losers (all players remained)
-        remaining_players[len(GameSettings.players_list)] = \
-            SimulationSettings.n_games - sum(remaining_players.values())
+        remaining_players[len(self.players)] = self.n_games - sum(remaining_players.values())
 
-        # Games with a clear winner (just a single player remains)
-        clear_winner = 0
-        if 1 in remaining_players:
-            clear_winner = remaining_players[1]
-        print(f"Games that had clear winner: {clear_winner} / {SimulationSettings.n_games} " +
-              f"({100 * clear_winner / SimulationSettings.n_games:.1f}%)")
-
-        # Number of players by the end of simulation
-        print(f"Number of remaining players after: {SimulationSettings.n_moves} turns:")
-        for remaining, count in sorted(remaining_players.items()):
-            print(f"  - {remaining}: {count} ({count * 100 / SimulationSettings.n_games:.1f}%)")
+        print_remaining_players(remaining_players, self.n_games, self.n_moves)
 
     def game_length(self):
         """ Median game length (for all finite games)
         """
-        # Calculate median game length, which is the highest bankruptcy turn within a game
-        grouped = self.df.groupby('game_number')
-        filtered_groups = grouped.filter(lambda x: len(x) == len(GameSettings.players_list) - 1)
-        lengths_df = filtered_groups.groupby('game_number')['turn'].max().reset_index()
-        lengths = sorted(lengths_df["turn"].tolist())
-        all_lengths = lengths + [SimulationSettings.n_moves
-                                 for _ in range(SimulationSettings.n_games - len(lengths))]
-        if lengths:
-            print(f"Median game length (for finished games): {lengths[len(lengths) // 2]}")
-        print(f"Median game length (for all games): {all_lengths[len(all_lengths) // 2]}")
-
-        # Calculate average survival time (for those who goes bankrupt)
-        survival_average = lengths_df["turn"].mean()
-        print(f"Average survival time (for bankrupt players): {survival_average:.1f} turns")
+        print_game_length(self.lengths, self.n_games, self.n_moves)
 
     def winning_rate(self):
         """ Display winning (survival) rate of players
         """
-        loses_counts = self.df.groupby('player_bankrupt').size().reset_index(name='count')
-
-        # {player: games_survived}
-        loses_dict = {row['player_bankrupt']: row['count'] for index, row in loses_counts.iterrows()}
-        print("Players' survival rate:")
-
-        for player in GameSettings.players_list:
-            player_name = player[0]
-            loses = loses_dict.get(player_name, 0)
-            survivals = SimulationSettings.n_games - loses
-
-            survival_rate = survivals / SimulationSettings.n_games
-            margin = 1.96 * (survival_rate * (1 - survival_rate) / SimulationSettings.n_games) ** 0.5
-            print(f"  - {player_name}: {survivals} " +
-                  f"({survival_rate * 100:.1f} "
-                  f"+- {margin * 100:.1f}%)")
+        print_winning_rate(self.loses, self.n_games, self.players)
+
+    def survival_curves(self) -> SurvivalCurves:
+        """ Share of games each player survives after each turn, and share of games over by each turn
+        (see survival.py)
+        """
+        return survival_curves(self.bankruptcy_turns, self.lengths, self.n_games, self.n_moves, self.players)
+
+    def final_state(self):
+        """ Players' average cash, net worth and monopolies at the end of the games (needs the statistics)
+        """
+        columns = ["cash", "net_worth", "monopolies"]
+        # Sums and numbers of values by player, added up chunk by chunk
+        totals = None
+        for games in self.read_stats(GAMES_TABLE, ["player"] + columns):
+            # Monopolies are int8: sum them as int64, not to overflow
+            chunk_totals = games.astype({column: "int64" for column in columns}) \
+                .groupby("player")[columns].agg(["sum", "count"])
+            totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+        print("Players' average state at the end of the game:")
+        for player_name in self.players:
+            if totals is not None and player_name in totals.index:
+                cash, net_worth, monopolies = (totals.loc[player_name, (column, "sum")] /
+                                               totals.loc[player_name, (column, "count")] for column in columns)
+                print(f"  - {player_name}: cash ${cash:.0f}, net worth ${net_worth:.0f}, " +
+                      f"monopolies {monopolies:.2f}")
+
+    def net_worth_by_turn(self, every: int = 100):
+        """ Players' average net worth every `every` turns, of the players still in the game (needs the snapshots)
+        """
+        totals = None
+        for snapshots in self.read_stats(SNAPSHOTS_TABLE, ["turn", "player", "net_worth"]):
+            snapshots = snapshots[snapshots["turn"] % every == 0]
+            chunk_totals = snapshots.groupby(["turn", "player"])["net_worth"].agg(["sum", "count"])
+            totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+        print("Players' average net worth by turn (of the players still in the game):")
+        if totals is None:
+            return
+        net_worth = (totals["sum"] / totals["count"]).unstack("player")
+        print(net_worth[[player_name for player_name in self.players
+                         if player_name in net_worth.columns]].round().to_string())
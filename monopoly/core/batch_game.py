@@ -0,0 +1,946 @@
+""" Batch engine: plays many games in lockstep, keeping the state of all games in NumPy arrays.
+Each step makes one move (one dice roll) for the current player of every active game:
+unmortgaging and building before the roll, dice, jail (with "Get Out of Jail Free" cards), moving and passing Go,
+Chance/Community Chest cards, rent, taxes and purchases are done with vectorized operations over all games at once.
+
+Moves that may need complex logic (trades, raising money, bankruptcy) fall back to the CompactGame engine
+for that game only: each game keeps its CompactGame (set up as in compact_monopoly_game), it is brought up to date,
+the move is made by CompactGame.make_a_move and the state is stored back.
+CompactGame plays the same games as monopoly_game (see scripts/check_compact.py).
+Vectorized moves are computed in temporary arrays and only committed if nothing complex happened,
+so a move is always made either completely vectorized or completely by CompactGame.
+Unmortgaging and building come first in a move and are committed right away: after them,
+CompactGame has nothing left to unmortgage or build, and makes the rest of the move.
+
+Most games are over long before the slowest ones: when only a few games are left (TAIL_GAMES),
+a step costs more than playing them one by one, so CompactGame finishes them (see CompactGame.play_turns).
+
+Dice rolls are buffered per game and the fallback uses the same buffered rolls, so a move's outcome
+does not depend on the path it took. Each game rolls its own dice, so a game does not depend on the batch
+it is played in: by default the same rolls as PrerolledDice with the game's seed (as monopoly_game with
+SimulationSettings.dice_block_size set), with exact_dice=True the game's own Dice,
+which reproduces monopoly_game exactly.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from monopoly.core.board import Board
+from monopoly.core.cards import CARD_NOTHING, CARD_MOVE, CARD_GO, CARD_BACK_3, CARD_RAILROAD, CARD_UTILITY, \
+    CARD_GOOJF, CARD_GO_TO_JAIL, CARD_GAIN, CARD_PAY, CARD_REPAIRS, CARD_PAY_EACH, CARD_COLLECT_EACH
+from monopoly.core.cell import CELL_PROPERTY, CELL_CHANCE, CELL_CHEST, CELL_GO_TO_JAIL, CELL_FREE_PARKING, \
+    CELL_LUXURY_TAX, CELL_INCOME_TAX, Property
+from monopoly.core.compact_game import CompactGame
+from monopoly.core.constants import RAILROADS, UTILITIES
+from monopoly.core.dice import is_dice_are_double
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import GameEnd, GameResult
+from monopoly.core.move_result import MoveResult
+from monopoly.log import Log
+from monopoly.log_settings import LogSettings
+from monopoly.stats_log import StatsLog
+
+# Games left when the rest of them is played by CompactGame, one by one: a step costs about as much
+# as this many moves of CompactGame
+TAIL_GAMES = 64
+
+# Dice rolls a game rolls at a time
+DICE_BLOCK = 64
+
+# State kept in the same form in BatchGame (a row of an array) and in CompactGame (a list or a value):
+# of properties, of the board and of players
+STATE_ATTRIBUTES = ("is_mortgaged", "monopoly_multiplier", "has_houses", "has_hotel",
+                    "free_parking_money", "available_houses", "available_hotels",
+                    "money", "position", "in_jail", "had_doubles", "days_in_jail",
+                    "get_out_of_jail_chance", "get_out_of_jail_comm_chest", "is_bankrupt")
+
+
+class DeckTable:
+    """ Actions of deck cards (see cards.py) as arrays, indexed by card number
+    """
+
+    def __init__(self, cards):
+        self.action = np.array([card.action for card in cards])
+        self.amount = np.array([card.amount for card in cards])
+        self.amount_hotel = np.array([card.amount_hotel for card in cards])
+        # Number of the "Get Out of Jail Free" card (see Deck.get_out_of_jail_free)
+        self.get_out_of_jail_free = next(
+            (card_id for card_id, card in enumerate(cards) if card.action == CARD_GOOJF), None)
+
+
+class BatchTables:
+    """ NumPy versions of the static board data, taken from a Board """
+
+    def __init__(self, board: Board):
+        cells = board.cells
+        n_cells = len(cells)
+        self.kinds = np.array(board.cell_kinds)
+        # Cells that are properties, and the group of each cell (None if it is not a property)
+        self.properties = np.array([cell for cell in range(n_cells) if isinstance(cells[cell], Property)])
+        self.group = [cell.group if isinstance(cell, Property) else None for cell in cells]
+
+        def property_values(attribute):
+            return np.array([getattr(cell, attribute) if isinstance(cell, Property) else 0 for cell in cells])
+
+        self.cost_base = property_values("cost_base")
+        self.cost_house = property_values("cost_house")
+        self.unmortgage_cost = property_values("unmortgage_price")
+        self.mortgaged_worth = property_values("mortgaged_worth")
+
+        # Rent for [cell, level], level 0 is the base rent, 1-4 houses, 5 hotel
+        self.rent = np.zeros((n_cells, 6), dtype=np.int64)
+        for cell in self.properties.tolist():
+            self.rent[cell] = cells[cell].rents
+
+        self.is_utility = np.array([group == UTILITIES for group in self.group])
+        # Properties where houses can be built
+        self.buildable = np.array([group is not None and group not in (RAILROADS, UTILITIES)
+                                   for group in self.group])
+
+        self.groups = [(group, np.array([cells.index(cell) for cell in group_cells]))
+                       for group, group_cells in board.groups.items()]
+        self.group_id = np.full(n_cells, -1)
+        for group_id, (_, group_cells) in enumerate(self.groups):
+            self.group_id[group_cells] = group_id
+        # Cells of each cell's group, padded with the cell itself to the size of the largest group
+        group_size = max(len(group_cells) for _, group_cells in self.groups)
+        self.group_cells = np.repeat(np.arange(n_cells)[:, None], group_size, axis=1)
+        for _, group_cells in self.groups:
+            self.group_cells[group_cells, :len(group_cells)] = group_cells
+        # Cells by groups: 1 if the cell is in the group, and the number of cells in each group
+        self.group_membership = np.zeros((n_cells, len(self.groups)), dtype=np.int64)
+        for group_id, (_, group_cells) in enumerate(self.groups):
+            self.group_membership[group_cells, group_id] = 1
+        self.group_size = self.group_membership.sum(axis=0)
+
+        # Nearest railroad / utility for each cell (same search as in Player.card_railroad / card_utility)
+        self.nearest_railroad = np.zeros(n_cells, dtype=np.int64)
+        self.nearest_utility = np.zeros(n_cells, dtype=np.int64)
+        for cell in range(n_cells):
+            nearest = cell
+            while (nearest - 5) % 10 != 0:
+                nearest = (nearest + 1) % 40
+            self.nearest_railroad[cell] = nearest
+            nearest = cell
+            while nearest not in (12, 28):
+                nearest = (nearest + 1) % 40
+            self.nearest_utility[cell] = nearest
+
+        self.chance = DeckTable(board.chance.all_cards)
+        self.chest = DeckTable(board.chest.all_cards)
+
+
+class BufferedDice:
+    """ Dice for a fallback move in CompactGame: first use the rolls buffered
+    for this game by the batch, then roll new ones
+    """
+
+    def __init__(self, batch, game):
+        self.batch = batch
+        self.game = game
+
+    def roll(self):
+        cast = self.batch.next_cast(self.game)
+        return cast, sum(cast), is_dice_are_double(cast)
+
+
+class BatchGame:
+    """ State of many games in NumPy arrays (first index is the game),
+    and the vectorized engine that advances all of them
+    """
+
+    def __init__(self, game_numbers_and_seeds: List[Tuple[int, int]], exact_dice=False,
+                 game_config: GameConfig = None, stats_log: StatsLog = None):
+        if game_config is None:
+            game_config = GameConfig()
+        self.game_config = game_config
+        # Log of the fallback moves (the batch engine keeps no events log)
+        self.log = Log(LogSettings.EVENTS_LOG_PATH, disabled=True)
+
+        # Set up all games exactly as compact_monopoly_game does (including the random shuffles),
+        # each game keeps its CompactGame to make fallback moves.
+        # It is updated with the changes of vectorized moves only before a fallback move
+        self.compact_games = [CompactGame(game_seed, self.log, game_config)
+                              for _, game_seed in game_numbers_and_seeds]
+        self.tables = BatchTables(Board(game_config))
+        tables = self.tables
+
+        self.exact_dice = exact_dice
+        n_games = len(game_numbers_and_seeds)
+        n_cells = len(tables.kinds)
+        n_players = len(game_config.players_list)
+        self.n_games = n_games
+        self.n_players = n_players
+        self.game_numbers = np.array([game_number for game_number, _ in game_numbers_and_seeds], dtype=np.int64)
+
+        # Cells' state
+        self.owner = np.full((n_games, n_cells), -1, dtype=np.int8)
+        self.is_mortgaged = np.zeros((n_games, n_cells), dtype=bool)
+        self.monopoly_multiplier = np.ones((n_games, n_cells), dtype=np.int16)
+        self.has_houses = np.zeros((n_games, n_cells), dtype=np.int8)
+        self.has_hotel = np.zeros((n_games, n_cells), dtype=np.int8)
+        # Order of the property in its owner's list of properties (CompactGame.owned):
+        # the index in the list, properties bought by vectorized moves come after them, in the order of purchase
+        self.owned_order = np.zeros((n_games, n_cells), dtype=np.int64)
+        self.purchase_order = n_cells
+
+        # Board's state
+        self.free_parking_money = np.zeros(n_games)
+        self.available_houses = np.zeros(n_games, dtype=np.int64)
+        self.available_hotels = np.zeros(n_games, dtype=np.int64)
+        n_chance_cards, n_chest_cards = len(tables.chance.action), len(tables.chest.action)
+        self.chance_cards = np.zeros((n_games, n_chance_cards), dtype=np.int8)
+        self.chance_len = np.zeros(n_games, dtype=np.int64)
+        self.chance_pointer = np.zeros(n_games, dtype=np.int64)
+        self.chest_cards = np.zeros((n_games, n_chest_cards), dtype=np.int8)
+        self.chest_len = np.zeros(n_games, dtype=np.int64)
+        self.chest_pointer = np.zeros(n_games, dtype=np.int64)
+
+        # Players' state (players are numbered in the order they make moves)
+        # Player's index in game_config.players_list
+        self.player_id = np.zeros((n_games, n_players), dtype=np.int64)
+        self.money = np.zeros((n_games, n_players))
+        self.position = np.zeros((n_games, n_players), dtype=np.int64)
+        self.in_jail = np.zeros((n_games, n_players), dtype=bool)
+        self.had_doubles = np.zeros((n_games, n_players), dtype=np.int64)
+        self.days_in_jail = np.zeros((n_games, n_players), dtype=np.int64)
+        self.get_out_of_jail_chance = np.zeros((n_games, n_players), dtype=bool)
+        self.get_out_of_jail_comm_chest = np.zeros((n_games, n_players), dtype=bool)
+        self.is_bankrupt = np.zeros((n_games, n_players), dtype=bool)
+        # The trade each player would offer (see CompactGame.find_trade): the other player
+        # (-1 if none) and the price difference of the deal.
+        # It only depends on the players' lists of properties to trade, and is updated when they may change
+        self.trade_partner = np.full((n_games, n_players), -1, dtype=np.int64)
+        self.trade_price_difference = np.zeros((n_games, n_players))
+        # Cost of the cheapest house each player can build and of the cheapest property they can unmortgage
+        # (inf if none), to find the players who have money for it.
+        # They only depend on properties' state and houses in the bank, and are updated when they change
+        self.cheapest_house = np.full((n_games, n_players), np.inf)
+        self.cheapest_unmortgage = np.full((n_games, n_players), np.inf)
+
+        # Properties bought by vectorized moves, not yet bought in the game's CompactGame,
+        # in the order they were bought: [(player, cell), ...]
+        self.purchases = [[] for _ in range(n_games)]
+        # Players whose lists of properties to trade are behind the changes of owners
+        # (they catch up on the next purchase, or when the player unmortgages a property)
+        self.trade_lists_behind = np.zeros((n_games, n_players), dtype=bool)
+
+        # Players' settings
+        settings = [player_setting for _, player_setting in game_config.players_list]
+        self.unspendable_cash = np.array([player_setting.unspendable_cash for player_setting in settings])
+        self.is_willing_to_make_trades = np.array([player_setting.is_willing_to_make_trades
+                                                   for player_setting in settings])
+        self.ignored_cells = np.array([[group in player_setting.ignore_property_groups for group in tables.group]
+                                       for player_setting in settings])
+
+        # Game progress
+        self.active = np.ones(n_games, dtype=bool)
+        self.turn = np.zeros(n_games, dtype=np.int64)
+        self.current = np.full(n_games, n_players, dtype=np.int64)
+        # Bankruptcies in each game: [(player name, turn), ...]
+        self.bankruptcies = [[] for _ in range(n_games)]
+        self.game_end = [None] * n_games
+        # Statistics that get snapshots of players' state every snapshot_interval turns (if provided)
+        self.stats_log = stats_log
+        self.snapshot_interval = stats_log.snapshot_interval if stats_log else 0
+        # Number of moves made with the CompactGame fallback (for statistics)
+        self.fallback_moves = 0
+        self.vectorized_moves = 0
+
+        # Buffered dice rolls of each game, DICE_BLOCK at a time: the next roll is rolls[game, next_roll[game]]
+        self.rolls = np.zeros((n_games, DICE_BLOCK, game_config.dice_count), dtype=np.int64)
+        self.next_roll = np.full(n_games, DICE_BLOCK)
+        # Where the rolls come from: each game's own Dice (for exact_dice), or its NumPy generator
+        # (same rolls as PrerolledDice)
+        if exact_dice:
+            self.game_dice = [compact_game.dice for compact_game in self.compact_games]
+        else:
+            self.generators = [np.random.Generator(np.random.PCG64(game_seed))
+                               for _, game_seed in game_numbers_and_seeds]
+        # Fallback moves roll BufferedDice
+        for game, compact_game in enumerate(self.compact_games):
+            compact_game.dice = BufferedDice(self, game)
+
+        self.names = [player_name for player_name, _ in game_config.players_list]
+        self.player_id[:] = [list(map(self.names.index, compact_game.names)) for compact_game in self.compact_games]
+        all_games = np.arange(n_games)
+        self.store(all_games)
+        for game in range(n_games):
+            self.update_trade_lists_behind(game)
+        self.update_trade_offers(all_games)
+        # First turn, first player
+        self.next_player(all_games)
+
+    # Moving state between the arrays and the games' CompactGame.
+    # Rows of all the games are copied at once: NumPy is slow to access one row at a time
+
+    def store(self, games):
+        """ Copy the state of the games' CompactGame into the arrays """
+        games_list = games.tolist()
+        if not games_list:
+            return
+        compact_games = [self.compact_games[game] for game in games_list]
+        for attribute in STATE_ATTRIBUTES:
+            getattr(self, attribute)[games] = [getattr(compact_game, attribute) for compact_game in compact_games]
+        self.chance_pointer[games] = [compact_game.chance.pointer for compact_game in compact_games]
+        self.chest_pointer[games] = [compact_game.chest.pointer for compact_game in compact_games]
+        self.owner[games] = [[-1 if cell_owner is None else cell_owner for cell_owner in compact_game.owner]
+                             for compact_game in compact_games]
+        owned_order = []
+        for compact_game in compact_games:
+            game_owned_order = [0] * len(compact_game.owner)
+            for owned in compact_game.owned:
+                for order, cell in enumerate(owned):
+                    game_owned_order[cell] = order
+            owned_order.append(game_owned_order)
+        self.owned_order[games] = owned_order
+        # Decks are padded to the number of all cards
+        for deck_name, cards, length in (("chance", self.chance_cards, self.chance_len),
+                                         ("chest", self.chest_cards, self.chest_len)):
+            decks = [getattr(compact_game, deck_name).cards for compact_game in compact_games]
+            cards[games] = [deck + [0] * (cards.shape[1] - len(deck)) for deck in decks]
+            length[games] = list(map(len, decks))
+        self.update_cheapest_improvements(games)
+
+    def load(self, games):
+        """ Bring the games' CompactGame up to date with the changes made by vectorized moves:
+        purchased, improved and unmortgaged properties, money, positions, jail, Free Parking money
+        and decks
+        """
+        games_list = games.tolist()
+        for game in games_list:
+            self.buy_properties(game)
+        compact_games = [self.compact_games[game] for game in games_list]
+        for attribute in STATE_ATTRIBUTES:
+            for compact_game, value in zip(compact_games, getattr(self, attribute)[games].tolist()):
+                setattr(compact_game, attribute, value)
+        for deck_name, cards, length, pointer in (("chance", self.chance_cards, self.chance_len, self.chance_pointer),
+                                                  ("chest", self.chest_cards, self.chest_len, self.chest_pointer)):
+            for compact_game, deck_cards, deck_length, deck_pointer in zip(
+                    compact_games, cards[games].tolist(), length[games].tolist(), pointer[games].tolist()):
+                deck = getattr(compact_game, deck_name)
+                deck.cards = deck_cards[:deck_length]
+                deck.pointer = deck_pointer
+
+    def buy_properties(self, game):
+        """ Buy the properties in the game's CompactGame as vectorized moves did, in the same order
+        (players' money is not up to date after that, it is set by load)
+        """
+        purchases = self.purchases[game]
+        if not purchases:
+            return
+        compact_game = self.compact_games[game]
+        for player, cell in purchases:
+            compact_game.buy_property(player, cell)
+        # Lists of properties to trade depend only on the last owners: update them once
+        for player in range(compact_game.n_players):
+            compact_game.update_lists_of_properties_to_trade(player)
+        self.purchases[game] = []
+        self.trade_lists_behind[game] = False
+
+    def update_trade_lists_behind(self, game):
+        """ Find the players whose lists of properties to trade are behind the changes of owners in the game
+        (they catch up when the lists are updated, see CompactGame.update_lists_of_properties_to_trade)
+        """
+        compact_game = self.compact_games[game]
+        self.trade_lists_behind[game] = [
+            settings.is_willing_to_make_trades and ownership_changes_seen != compact_game.ownership_changes
+            for settings, ownership_changes_seen in zip(compact_game.settings, compact_game.ownership_changes_seen)]
+
+    def may_trade(self, games):
+        """ Whether some player may offer a trade in the games, if the players' lists of properties to trade
+        are up to date (see CompactGame.update_lists_of_properties_to_trade and find_trade):
+        two willing players each want to buy a property the other one wants to sell
+        """
+        tables = self.tables
+        # Properties of each player in each group, and groups with all properties bought (games by players by groups)
+        owned_in_group = self.owned(games).astype(np.int64) @ tables.group_membership
+        bought = ((self.owner[games] != -1).astype(np.int64) @ tables.group_membership == tables.group_size)[:, None, :]
+        # A player wants to buy the last property of a group from a player who has only this one
+        buys = bought & (owned_in_group == tables.group_size - 1)
+        sells = bought & (owned_in_group == 1)
+        willing = self.is_willing_to_make_trades[self.player_id[games]]
+        # buys_from[game, player, other player]: player wants to buy a property other player wants to sell
+        buys_from = (buys[:, :, None, :] & sells[:, None, :, :]).any(axis=3) & \
+            willing[:, :, None] & willing[:, None, :] & ~np.eye(self.n_players, dtype=bool)
+        return (buys_from & buys_from.transpose(0, 2, 1)).any(axis=(1, 2))
+
+    def update_trade_offers(self, games):
+        """ Find the trade each player would offer (see CompactGame.find_trade), in the games.
+        It is only looked for in CompactGame (with properties bought by vectorized moves bought in it)
+        if some trade is possible, or if some lists of properties to trade are behind
+        """
+        possible = self.may_trade(games) | self.trade_lists_behind[games].any(axis=1)
+        self.trade_partner[games[~possible]] = -1
+        games = games[possible]
+        partners, price_differences = [], []
+        for game in games.tolist():
+            self.buy_properties(game)
+            compact_game = self.compact_games[game]
+            game_partners, game_price_differences = [], []
+            for player in range(self.n_players):
+                trade = compact_game.find_trade(player)
+                if trade is None:
+                    game_partners.append(-1)
+                    game_price_differences.append(0)
+                else:
+                    other_player, player_gives, player_receives = trade
+                    game_partners.append(other_player)
+                    game_price_differences.append(compact_game.get_price_difference(player_gives,
+                                                                                    player_receives)[0])
+            partners.append(game_partners)
+            price_differences.append(game_price_differences)
+        if partners:
+            self.trade_partner[games] = partners
+            self.trade_price_difference[games] = price_differences
+
+    def improvable(self, games):
+        """ Properties that can be improved in the games, if their owner has the money (games by cells)
+        (see CompactGame.get_next_property_to_improve)
+        """
+        tables = self.tables
+        has_houses = self.has_houses[games]
+        has_hotel = self.has_hotel[games]
+        is_mortgaged = self.is_mortgaged[games]
+        # Even build rule: no property of the group has fewer houses (or is mortgaged)
+        group_houses = np.where(has_hotel == 1, 5, has_houses)[:, tables.group_cells]
+        even_build = (group_houses >= has_houses[:, :, None]).all(axis=2) & \
+            ~is_mortgaged[:, tables.group_cells].any(axis=2)
+        bank_has_improvement = np.where(has_houses == 4, self.available_hotels[games, None] > 0,
+                                        self.available_houses[games, None] > 0)
+        return (tables.buildable & (self.monopoly_multiplier[games] == 2) & (has_hotel == 0)
+                & ~is_mortgaged & even_build & bank_has_improvement)
+
+    def update_cheapest_improvements(self, games):
+        """ Find the cheapest house each player can build and property they can unmortgage, in the games
+        (see CompactGame.improve_properties and unmortgage_a_property)
+        """
+        owned = self.owned(games)
+        self.cheapest_house[games] = np.where(owned & self.improvable(games)[:, None, :],
+                                              self.tables.cost_house, np.inf).min(axis=2)
+        self.cheapest_unmortgage[games] = np.where(owned & self.is_mortgaged[games][:, None, :],
+                                                   self.tables.unmortgage_cost, np.inf).min(axis=2)
+
+    # Dice
+
+    def roll_dice(self, game, count):
+        """ Roll the dice count times for the game, return a list of casts """
+        if self.exact_dice:
+            return [self.game_dice[game].roll()[0] for _ in range(count)]
+        return self.generators[game].integers(1, self.game_config.dice_sides + 1,
+                                              size=(count, self.game_config.dice_count))
+
+    def fill_rolls(self, games, count):
+        """ Make sure each of the games has count buffered rolls: roll a new block for the games that don't
+        (keeping the rolls left)
+        """
+        for game in games[self.next_roll[games] > DICE_BLOCK - count].tolist():
+            rolls_left = DICE_BLOCK - self.next_roll[game]
+            self.rolls[game, :rolls_left] = self.rolls[game, DICE_BLOCK - rolls_left:]
+            self.rolls[game, rolls_left:] = self.roll_dice(game, DICE_BLOCK - rolls_left)
+            self.next_roll[game] = 0
+
+    def next_cast(self, game):
+        """ Next roll for a single game (used by the fallback) """
+        if self.next_roll[game] == DICE_BLOCK:
+            self.fill_rolls(np.array([game]), 1)
+        cast = self.rolls[game, self.next_roll[game]].tolist()
+        self.next_roll[game] += 1
+        return cast
+
+    # Game progress
+
+    def next_player(self, games):
+        """ Move on to the next (not bankrupt) player.
+        Start a new turn after the last player, and check if the game is over
+        """
+        self.current[games] += 1
+        while len(games):
+            new_turn = games[self.current[games] >= self.n_players]
+            if len(new_turn):
+                self.current[new_turn] = 0
+                self.turn[new_turn] += 1
+                if self.snapshot_interval:
+                    turns_played = self.turn[new_turn] - 1
+                    self.record_players_state(
+                        new_turn[(turns_played > 0) & (turns_played % self.snapshot_interval == 0)])
+                self.check_end_conditions(new_turn)
+            games = games[self.active[games]]
+            games = games[self.is_bankrupt[games, self.current[games]]]
+            self.current[games] += 1
+
+    def check_end_conditions(self, games):
+        """ Finish games that reached the turn limit, have fewer than 2 players left
+        or all players are rich (see game_utils._check_end_conditions)
+        """
+        alive = ~self.is_bankrupt[games]
+        turn_limit = self.turn[games] > self.game_config.n_moves
+        one_player_left = ~turn_limit & (alive.sum(axis=1) < 2)
+        all_rich = ~turn_limit & ~one_player_left & \
+            np.all(~alive | (self.money[games] > self.game_config.never_bankrupt_cash), axis=1)
+        for game_end, over in ((GameEnd.TURN_LIMIT, turn_limit), (GameEnd.ONE_PLAYER_LEFT, one_player_left),
+                               (GameEnd.ALL_RICH, all_rich)):
+            for game in games[over].tolist():
+                self.game_end[game] = game_end
+            self.active[games[over]] = False
+
+    def owned(self, games):
+        """ Which cells each player owns in the games (games by players by cells) """
+        return self.owner[games][:, None, :] == np.arange(self.n_players)[None, :, None]
+
+    def net_worth(self, games=None):
+        """ Players' net worth, for all games or the given ones (see Player.net_worth) """
+        if games is None:
+            games = np.arange(self.n_games)
+        cells_worth = np.where(
+            self.is_mortgaged[games],
+            self.tables.mortgaged_worth,
+            self.tables.cost_base + (self.has_houses[games] + self.has_hotel[games]) * self.tables.cost_house)
+        owned_worth = (self.owned(games) * cells_worth[:, None, :]).sum(axis=2)
+        return np.trunc(self.money[games]) + owned_worth
+
+    def count_monopolies(self, games):
+        """ Number of street groups each player owns completely, in the games (games by players)
+        (see game_utils.count_monopolies)
+        """
+        monopolies = np.zeros((len(games), self.n_players), dtype=np.int64)
+        for group, group_cells in self.tables.groups:
+            if group in (RAILROADS, UTILITIES):
+                continue
+            owners = self.owner[games][:, group_cells]
+            monopoly = (owners == owners[:, :1]).all(axis=1) & (owners[:, 0] != -1)
+            monopolies[monopoly, owners[monopoly, 0]] += 1
+        return monopolies
+
+    def record_players_state(self, games):
+        """ Snapshots of not bankrupt players' state after the turn just played, in the games
+        (see game_utils.record_players_state)
+        """
+        rows, players = np.nonzero(~self.is_bankrupt[games])
+        snapshot_games = games[rows]
+        self.stats_log.add_snapshots(
+            self.game_numbers[snapshot_games].tolist(),
+            (self.turn[snapshot_games] - 1).tolist(),
+            [self.names[player_id] for player_id in self.player_id[snapshot_games, players].tolist()],
+            np.trunc(self.money[snapshot_games, players]).astype(np.int64).tolist(),
+            self.net_worth(games)[rows, players].astype(np.int64).tolist(),
+            self.position[snapshot_games, players].tolist(),
+            self.owned(games).sum(axis=2)[rows, players].tolist(),
+            self.count_monopolies(games)[rows, players].tolist())
+
+    def run(self):
+        """ Play all games till the end, return their results """
+        while self.active.any():
+            games = np.flatnonzero(self.active)
+            if len(games) > TAIL_GAMES:
+                self.step()
+            else:
+                self.finish_games(games)
+
+        all_games = np.arange(self.n_games)
+        net_worth = self.net_worth(all_games).astype(np.int64).tolist()
+        cash = np.trunc(self.money).astype(np.int64).tolist()
+        monopolies = self.count_monopolies(all_games).tolist()
+        results = []
+        for game in range(self.n_games):
+            names = [self.names[player] for player in self.player_id[game].tolist()]
+            results.append(GameResult(self.game_numbers[game].item(), tuple(self.bankruptcies[game]),
+                                      self.game_end[game], self.turn[game].item() - 1,
+                                      dict(zip(names, net_worth[game])), dict(zip(names, cash[game])),
+                                      dict(zip(names, monopolies[game]))))
+        return results
+
+    def finish_games(self, games):
+        """ Play the rest of the games with CompactGame, one by one (see CompactGame.play_turns)
+        """
+        self.load(games)
+        for game in games.tolist():
+            game_end, turns_played = self.compact_games[game].play_turns(
+                self.game_numbers[game].item(), self.bankruptcies[game], self.stats_log,
+                self.turn[game].item(), self.current[game].item())
+            self.game_end[game] = game_end
+            self.turn[game] = turns_played + 1
+        self.store(games)
+        self.active[games] = False
+
+    # Vectorized move
+
+    @staticmethod
+    def remove_card(games, cards, length, pointer, card):
+        """ Take the card out of the decks of the games (see Deck.remove) """
+        deck = cards[games]
+        slots = np.arange(deck.shape[1])
+        removed_at = ((deck == card) & (slots < length[games, None])).argmax(axis=1)
+        cards[games] = np.take_along_axis(
+            deck, np.minimum(slots + (slots >= removed_at[:, None]), len(slots) - 1), axis=1)
+        length[games] -= 1
+        pointer[games[pointer[games] == length[games]]] = 0
+
+    @staticmethod
+    def put_back_card(games, cards, length, pointer, card):
+        """ Put the card back in the decks of the games, before the pointer (see Deck.add) """
+        deck = cards[games]
+        slots = np.arange(deck.shape[1])
+        # Same place as list.insert(pointer - 1, card): before the last card for the pointer at 0
+        insert_at = np.where(pointer[games] > 0, pointer[games] - 1, length[games] - 1)
+        deck = np.take_along_axis(deck, np.maximum(slots - (slots > insert_at[:, None]), 0), axis=1)
+        deck[np.arange(len(games)), insert_at] = card
+        cards[games] = deck
+        length[games] += 1
+
+    def recalculate_monopoly_multipliers(self, games, cells):
+        """ Update monopoly multipliers in the groups of the changed cells
+        (see Board.recalculate_monopoly_multipliers)
+        """
+        changed_groups = self.tables.group_id[cells]
+        for group_id, (group, group_cells) in enumerate(self.tables.groups):
+            group_games = games[changed_groups == group_id]
+            if not len(group_games):
+                continue
+            owners = self.owner[group_games][:, group_cells]
+            ownership_count = (owners[:, :, None] == owners[:, None, :]).sum(axis=2)
+            if group == RAILROADS:
+                multiplier = 2 ** (ownership_count - 1)
+            elif group == UTILITIES:
+                multiplier = np.where(ownership_count == 2, 10, 4)
+            else:
+                multiplier = np.where(ownership_count == len(group_cells), 2, 1)
+            self.monopoly_multiplier[group_games[:, None], group_cells] = multiplier
+
+    def unmortgage_and_improve(self, games, p):
+        """ Before the roll, player p of each game (an array, as games) unmortgages properties, then builds houses
+        as long as they have money for it (see CompactGame.unmortgage_a_property and improve_properties)
+        """
+        tables = self.tables
+        unspendable_cash = self.unspendable_cash[self.player_id[games, p]]
+        last_owned = np.iinfo(np.int64).max
+
+        # Unmortgage, one property at a time: the first one (in the order of CompactGame.owned) there is money for
+        rows = np.flatnonzero(self.money[games, p] - self.cheapest_unmortgage[games, p] >= unspendable_cash)
+        unmortgaged = rows
+        while len(rows):
+            row_games, row_p = games[rows], p[rows]
+            money = self.money[row_games, row_p]
+            affordable = (self.owner[row_games] == row_p[:, None]) & self.is_mortgaged[row_games] & \
+                (money[:, None] - tables.unmortgage_cost >= unspendable_cash[rows, None])
+            has_affordable = affordable.any(axis=1)
+            rows, row_games, row_p = rows[has_affordable], row_games[has_affordable], row_p[has_affordable]
+            cells = np.where(affordable[has_affordable], self.owned_order[row_games], last_owned).argmin(axis=1)
+            self.money[row_games, row_p] = money[has_affordable] - tables.unmortgage_cost[cells]
+            self.is_mortgaged[row_games, cells] = False
+
+        # Build, one house or hotel at a time: on the cheapest property (the first one owned of them).
+        # Unmortgaging may allow building (see improvable)
+        rows = np.union1d(unmortgaged,
+                          np.flatnonzero(self.money[games, p] - self.cheapest_house[games, p] >= unspendable_cash))
+        improved = rows
+        while len(rows):
+            row_games, row_p = games[rows], p[rows]
+            improvable = (self.owner[row_games] == row_p[:, None]) & self.improvable(row_games)
+            cheapest_house = np.where(improvable, tables.cost_house, np.inf).min(axis=1)
+            affordable = self.money[row_games, row_p] - cheapest_house >= unspendable_cash[rows]
+            rows, row_games, row_p = rows[affordable], row_games[affordable], row_p[affordable]
+            cheapest = improvable[affordable] & (tables.cost_house == cheapest_house[affordable, None])
+            cells = np.where(cheapest, self.owned_order[row_games], last_owned).argmin(axis=1)
+            houses = self.has_houses[row_games, cells]
+            hotel = houses == 4
+            self.has_houses[row_games, cells] = np.where(hotel, 0, houses + 1)
+            self.has_hotel[row_games[hotel], cells[hotel]] = 1
+            self.available_houses[row_games] += np.where(hotel, 4, -1)
+            self.available_hotels[row_games] -= hotel
+            self.money[row_games, row_p] -= tables.cost_house[cells]
+        self.update_cheapest_improvements(games[improved])
+
+    def step(self):
+        """ Make one move (one dice roll) for the current player of every active game
+        """
+        tables = self.tables
+        game_config = self.game_config
+        games = np.flatnonzero(self.active)
+        p = self.current[games]
+        n_games = len(games)
+        rows = np.arange(n_games)
+
+        # Before the throwing of the dice: if a trade is possible, make the move with CompactGame.
+        # Trade happens if the partner (price difference > 0) or the player (< 0) can pay the price difference
+        money = self.money[games, p]
+        unspendable_cash = self.unspendable_cash[self.player_id[games, p]]
+        partner = self.trade_partner[games, p]
+        price_difference = self.trade_price_difference[games, p]
+        partner_money = self.money[games, partner]
+        partner_unspendable_cash = self.unspendable_cash[self.player_id[games, partner]]
+        complex_move = (partner != -1) & (
+            (price_difference == 0) |
+            (price_difference > 0) & (partner_money - price_difference >= partner_unspendable_cash) |
+            (price_difference < 0) & (money + price_difference >= unspendable_cash))
+        # Otherwise unmortgage and build. Unmortgaging updates the player's lists of properties to trade:
+        # if they are behind the changes of owners, the trade offers may change, leave it to CompactGame
+        vectorized = ~complex_move & ~(self.trade_lists_behind[games, p] &
+                                       (money - self.cheapest_unmortgage[games, p] >= unspendable_cash))
+        self.unmortgage_and_improve(games[vectorized], p[vectorized])
+        money = self.money[games, p]
+        complex_move |= (money - self.cheapest_house[games, p] >= unspendable_cash) | \
+            (money - self.cheapest_unmortgage[games, p] >= unspendable_cash)
+
+        # Dice: the roll of the move, and the next one (for the rent of a utility)
+        self.fill_rolls(games, 2)
+        next_roll = self.next_roll[games]
+        cast = self.rolls[games, next_roll]
+        dice_sum = cast.sum(axis=1)
+        is_double = (cast == cast[:, :1]).all(axis=1)
+        utility_dice_sum = self.rolls[games, next_roll + 1].sum(axis=1)
+
+        # Temporary state of the move
+        position = self.position[games, p].copy()
+        had_doubles = self.had_doubles[games, p].copy()
+        days_in_jail = self.days_in_jail[games, p].copy()
+        in_jail = self.in_jail[games, p]
+        get_out_of_jail_chance = self.get_out_of_jail_chance[games, p]
+        get_out_of_jail_comm_chest = self.get_out_of_jail_comm_chest[games, p]
+        money = money.copy()
+        others_money = np.zeros((n_games, self.n_players))
+        free_parking_money = self.free_parking_money[games].copy()
+        chance_pointer = self.chance_pointer[games].copy()
+        chest_pointer = self.chest_pointer[games].copy()
+        bought = np.full(n_games, -1)
+        rolls_used = np.ones(n_games, dtype=np.int64)
+        move_over = np.zeros(n_games, dtype=bool)
+
+        def pay_bank(payers, amount):
+            """ Pay the bank, if the player has to raise money: make the move with CompactGame """
+            nonlocal complex_move
+            amount = np.broadcast_to(amount, payers.shape)
+            complex_move |= payers & ~(amount < money)
+            money[payers] -= amount[payers]
+            if game_config.free_parking_money:
+                free_parking_money[payers] += amount[payers]
+
+        def go_to_jail(players):
+            nonlocal move_over
+            position[players] = 10
+            in_jail[players] = True
+            had_doubles[players] = 0
+            days_in_jail[players] = 0
+            move_over |= players
+
+        # Third double in a row
+        go_to_jail(is_double & (had_doubles == 2))
+
+        # Player is in jail: uses a "Get Out of Jail Free" card (Chance first) if they have one,
+        # leaves on a double or pays the fine on the third day
+        jailed = ~move_over & in_jail
+        uses_chance_card = jailed & get_out_of_jail_chance
+        uses_chest_card = jailed & ~get_out_of_jail_chance & get_out_of_jail_comm_chest
+        get_out_of_jail_chance[uses_chance_card] = False
+        get_out_of_jail_comm_chest[uses_chest_card] = False
+        pays_fine = jailed & ~uses_chance_card & ~uses_chest_card & ~is_double & (days_in_jail == 2)
+        stays = jailed & ~uses_chance_card & ~uses_chest_card & ~is_double & (days_in_jail != 2)
+        days_in_jail[stays] += 1
+        move_over |= stays
+        pay_bank(pays_fine, game_config.exit_jail_fine)
+        leaves = jailed & ~stays
+        in_jail[leaves] = False
+        days_in_jail[leaves] = 0
+
+        # Move, get salary for passing Go
+        moving = ~move_over
+        position[moving] += dice_sum[moving]
+        money[moving & (position >= 40)] += game_config.salary
+        position %= 40
+
+        # Chance and Community Chest
+        double_rent = np.zeros(n_games, dtype=bool)
+        ten_times_dice = np.zeros(n_games, dtype=bool)
+        chance_drawn = np.zeros(n_games, dtype=bool)
+        draws_chance_card = np.zeros(n_games, dtype=bool)
+        draws_chest_card = np.zeros(n_games, dtype=bool)
+        for kind, table, cards, length, pointer, draws_card, get_out_of_jail_free in (
+                (CELL_CHANCE, tables.chance, self.chance_cards, self.chance_len, chance_pointer,
+                 draws_chance_card, get_out_of_jail_chance),
+                (CELL_CHEST, tables.chest, self.chest_cards, self.chest_len, chest_pointer,
+                 draws_chest_card, get_out_of_jail_comm_chest)):
+            drawing = ~move_over & (tables.kinds[position] == kind)
+            # Community Chest after Chance's "Go Back 3 Spaces",
+            # a deck after a "Get Out of Jail Free" card was put back in it
+            complex_move |= drawing & (chance_drawn | uses_chance_card | uses_chest_card)
+            chance_drawn |= drawing
+            if not drawing.any():
+                continue
+            card = cards[games, pointer]
+            pointer[drawing] = (pointer[drawing] + 1) % length[games[drawing]]
+            action = np.where(drawing, table.action[card], CARD_NOTHING)
+            amount = table.amount[card]
+
+            to_railroad = action == CARD_RAILROAD
+            to_utility = action == CARD_UTILITY
+            to_go = action == CARD_GO
+            advances = (action == CARD_MOVE) | to_railroad | to_utility
+            target = np.where(action == CARD_MOVE, amount,
+                              np.where(to_railroad, tables.nearest_railroad[position],
+                                       np.where(to_utility, tables.nearest_utility[position], position)))
+            target[to_go] = 0
+            money[(advances & (position > target)) | to_go] += game_config.salary
+            position[:] = target
+            position[action == CARD_BACK_3] -= 3
+            double_rent |= to_railroad
+            ten_times_dice |= to_utility
+
+            # "Get Out of Jail Free" card: the player keeps it, it is taken out of the deck when the move is committed
+            draws_card |= action == CARD_GOOJF
+            get_out_of_jail_free |= action == CARD_GOOJF
+            go_to_jail(action == CARD_GO_TO_JAIL)
+            gains = action == CARD_GAIN
+            money[gains] += amount[gains]
+            pay_bank(action == CARD_PAY, amount)
+
+            repairs = action == CARD_REPAIRS
+            if repairs.any():
+                repair_rows = np.flatnonzero(repairs)
+                repair_games = games[repair_rows]
+                own = self.owner[repair_games] == p[repair_rows, None]
+                repair_cost = np.zeros(n_games, dtype=np.int64)
+                repair_cost[repair_rows] = (own * (
+                    self.has_houses[repair_games] * amount[repair_rows, None] +
+                    self.has_hotel[repair_games] * table.amount_hotel[card[repair_rows]][:, None])).sum(axis=1)
+                pay_bank(repairs, repair_cost)
+
+            # Pay each player / collect from each player
+            others = ~self.is_bankrupt[games]
+            others[rows, p] = False
+            pays_each = action == CARD_PAY_EACH
+            complex_move |= pays_each & others.any(axis=1) & ~(money > amount * others.sum(axis=1))
+            others_money += np.where(pays_each[:, None] & others, amount[:, None], 0)
+            money[pays_each] -= (amount * others.sum(axis=1))[pays_each]
+            collects = action == CARD_COLLECT_EACH
+            complex_move |= collects & (others & ~(amount[:, None] < self.money[games])).any(axis=1)
+            others_money -= np.where(collects[:, None] & others, amount[:, None], 0)
+            money[collects] += (amount * others.sum(axis=1))[collects]
+
+        # Property
+        on_property = ~move_over & (tables.kinds[position] == CELL_PROPERTY)
+        owner = self.owner[games, position]
+        cost_base = tables.cost_base[position]
+        buys = on_property & (owner == -1) & \
+            (money - cost_base >= unspendable_cash) & (cost_base <= money) & \
+            ~self.ignored_cells[self.player_id[games, p], position]
+        bought[buys] = position[buys]
+        money[buys] -= cost_base[buys]
+
+        pays_rent = on_property & (owner != -1) & ~self.is_mortgaged[games, position] & (owner != p)
+        multiplier = self.monopoly_multiplier[games, position].astype(np.int64)
+        level = np.where(self.has_hotel[games, position] == 1, 5, self.has_houses[games, position])
+        rent = np.where(level > 0, tables.rent[position, level], tables.rent[position, 0] * multiplier)
+        utility_rent = pays_rent & tables.is_utility[position] & (level == 0)
+        rent[utility_rent] = utility_dice_sum[utility_rent] * multiplier[utility_rent]
+        rolls_used[utility_rent] = 2
+        rent[double_rent] *= 2
+        rent[ten_times_dice] = rent[ten_times_dice] // multiplier[ten_times_dice] * 10
+        complex_move |= pays_rent & ~(rent < money)
+        money[pays_rent] -= rent[pays_rent]
+        others_money[rows[pays_rent], owner[pays_rent]] += rent[pays_rent]
+
+        # Go To Jail
+        go_to_jail(~move_over & (tables.kinds[position] == CELL_GO_TO_JAIL))
+
+        # Free Parking
+        if game_config.free_parking_money:
+            parking = ~move_over & (tables.kinds[position] == CELL_FREE_PARKING)
+            money[parking] += free_parking_money[parking]
+            free_parking_money[parking] = 0
+
+        # Luxury Tax
+        pay_bank(~move_over & (tables.kinds[position] == CELL_LUXURY_TAX), game_config.luxury_tax)
+
+        # Income Tax
+        income_tax = ~move_over & (tables.kinds[position] == CELL_INCOME_TAX)
+        if income_tax.any():
+            tax_rows = np.flatnonzero(income_tax)
+            tax_games = games[tax_rows]
+            own = self.owner[tax_games] == p[tax_rows, None]
+            net_worth = np.trunc(money[tax_rows]) + (own * (
+                tables.cost_base + (self.has_houses[tax_games] + self.has_hotel[tax_games]) * tables.cost_house)
+            ).sum(axis=1)
+            tax = np.zeros(n_games)
+            tax[tax_rows] = np.minimum(game_config.income_tax,
+                                       np.trunc(game_config.income_tax_percentage * net_worth))
+            pay_bank(income_tax, tax)
+
+        # Doubles: same player moves again
+        goes_again = ~move_over & is_double
+        had_doubles[goes_again] += 1
+        had_doubles[~move_over & ~is_double] = 0
+        move_over |= ~is_double
+
+        # Commit vectorized moves
+        done = ~complex_move
+        done_games = games[done]
+        done_p = p[done]
+        self.vectorized_moves += len(done_games)
+        self.position[done_games, done_p] = position[done]
+        self.money[done_games] += others_money[done]
+        self.money[done_games, done_p] = money[done]
+        self.in_jail[done_games, done_p] = in_jail[done]
+        self.had_doubles[done_games, done_p] = had_doubles[done]
+        self.days_in_jail[done_games, done_p] = days_in_jail[done]
+        self.free_parking_money[done_games] = free_parking_money[done]
+        self.chance_pointer[done_games] = chance_pointer[done]
+        self.chest_pointer[done_games] = chest_pointer[done]
+        self.get_out_of_jail_chance[done_games, done_p] = get_out_of_jail_chance[done]
+        self.get_out_of_jail_comm_chest[done_games, done_p] = get_out_of_jail_comm_chest[done]
+        for table, cards, length, pointer, draws_card, uses_card in (
+                (tables.chance, self.chance_cards, self.chance_len, self.chance_pointer,
+                 draws_chance_card, uses_chance_card),
+                (tables.chest, self.chest_cards, self.chest_len, self.chest_pointer,
+                 draws_chest_card, uses_chest_card)):
+            if (done & draws_card).any():
+                self.remove_card(games[done & draws_card], cards, length, pointer, table.get_out_of_jail_free)
+            if (done & uses_card).any():
+                self.put_back_card(games[done & uses_card], cards, length, pointer, table.get_out_of_jail_free)
+        self.next_roll[done_games] += rolls_used[done]
+
+        purchase = done & (bought != -1)
+        if purchase.any():
+            purchase_games = games[purchase]
+            purchase_cells = bought[purchase]
+            self.owner[purchase_games, purchase_cells] = p[purchase]
+            self.owned_order[purchase_games, purchase_cells] = self.purchase_order
+            self.purchase_order += 1
+            self.recalculate_monopoly_multipliers(purchase_games, purchase_cells)
+            for game, player, cell in zip(purchase_games.tolist(), p[purchase].tolist(), purchase_cells.tolist()):
+                self.purchases[game].append((player, cell))
+            # Houses can be built and lists of properties to trade change only when the last property
+            # of a group is bought, lists also catch up with earlier changes of owners (all lists are updated)
+            group_bought = (self.owner[purchase_games[:, None], tables.group_cells[purchase_cells]] != -1).all(axis=1)
+            self.update_cheapest_improvements(purchase_games[group_bought])
+            trade_games = purchase_games[group_bought | self.trade_lists_behind[purchase_games].any(axis=1)]
+            self.trade_lists_behind[purchase_games] = False
+            self.update_trade_offers(trade_games)
+
+        # Complex moves are made by CompactGame
+        complex_games = games[complex_move]
+        if len(complex_games):
+            self.load(complex_games)
+            trade_games = []
+            for game, player in zip(complex_games.tolist(), p[complex_move].tolist()):
+                compact_game = self.compact_games[game]
+                trade_lists_updates = compact_game.trade_lists_updates
+                if compact_game.make_a_move(player) == MoveResult.BANKRUPT:
+                    self.bankruptcies[game].append((compact_game.names[player], self.turn[game].item()))
+                # Trade offers change with the lists of properties to trade
+                if compact_game.trade_lists_updates != trade_lists_updates:
+                    trade_games.append(game)
+                # Owners may have changed without the lists catching up (bankruptcy)
+                self.update_trade_lists_behind(game)
+            self.store(complex_games)
+            self.update_trade_offers(np.array(trade_games, dtype=np.int64))
+            self.fallback_moves += len(complex_games)
+
+        self.next_player(games[move_over | complex_move])
+
+
+def batch_monopoly_games(game_numbers_and_seeds: List[Tuple[int, int]], game_config: GameConfig = None,
+                         stats_log: StatsLog = None) -> List[GameResult]:
+    """ Simulate a batch of games with the batch engine, return the games' results
+    (the events log is not kept), stats_log gets snapshots of players' state (see monopoly_game)
+    """
+    return BatchGame(game_numbers_and_seeds, game_config=game_config, stats_log=stats_log).run()
@@ -4,10 +4,13 @@ That includes:
     - Special cells (Go, Jail, etc.)
     - Decks (Chance, Community Chest)
 """
-from monopoly.core.cell import Cell, GoToJail, LuxuryTax, IncomeTax, FreeParking, Chance, CommunityChest, Property
+from monopoly.core.cards import CHANCE_CARDS, CHEST_CARDS
+from monopoly.core.cell import Cell, GoToJail, LuxuryTax, IncomeTax, FreeParking, Chance, CommunityChest, Property, \
+    CELL_KINDS, CELL_OTHER
 from monopoly.core.constants import INDIGO, GREEN, YELLOW, RED, ORANGE, PINK, LIGHTBLUE, BROWN, RAILROADS, UTILITIES
 from monopoly.core.deck import Deck
-from settings import GameMechanics
+from monopoly.core.game_config import PropertyPrices
+from monopoly.core.trade_index import TradeIndex
 
 
 class Board:
@@ -17,6 +20,7 @@ class Board:
 
     def __init__(self, settings):
         """ Initialize board configuration: properties, special cells etc
+        settings is the game's GameConfig
         """
         # Keep a copy of game settings (to use in in-game calculations)
         self.settings = settings
@@ -71,59 +75,52 @@ class Board:
         self.cells.append(LuxuryTax("LT Luxury Tax"))
         self.cells.append(Property("H2 Boardwalk", 400, 50, 200, (200, 600, 1400, 1700, 2000), INDIGO))
 
+        # Kind of each cell (see CELL_KINDS), to find the handler of the cell a player lands on
+        self.cell_kinds = [CELL_KINDS.get(type(cell), CELL_OTHER) for cell in self.cells]
+        # Position of each cell on the board {cell: position}, to sort cells in the board order
+        self.cell_positions = {cell: position for position, cell in enumerate(self.cells)}
+
         # Board fields, grouped by group self.groups["Green"] - list of all greens
         self.groups = self.create_property_groups()
 
+        # Prices that depend on game rules (mortgage, selling houses, rents), calculated once per GameConfig
+        for cell in self.cells:
+            if isinstance(cell, Property):
+                prices = settings.property_prices(cell.cost_base, cell.cost_house, cell.rent_base, cell.rent_house)
+                for price_name, price in zip(PropertyPrices._fields, prices):
+                    setattr(cell, price_name, price)
+
+        # Chance and Community Chest decks
+        self.chance = Deck("Chance", CHANCE_CARDS)
+        self.chest = Deck("Community Chest", CHEST_CARDS)
+
+        # Properties players offer in trades, and the deals between them
+        self.trade_index = TradeIndex()
+
+        self.reset()
+
+    def reset(self):
+        """ Put the board in its state at the start of a game (to play another game on the same board):
+        no owners and improvements, all houses and hotels in the bank, decks in their original order
+        """
+        for cell in self.cells:
+            if isinstance(cell, Property):
+                cell.reset()
+        self.chance.reset()
+        self.chest.reset()
+
         # when the "Free Parking" rule is active, Keep track of the amount of money at the "Free parking money"
         self.free_parking_money = 0
 
+        # Groups of properties that changed owners, in the order of changes.
+        # Players update their lists of properties to trade only for the groups
+        # changed since their last update (see Player.update_lists_of_properties_to_trade)
+        self.ownership_changes = []
+        self.trade_index.reset()
+
         # Available houses and hotels
-        self.available_houses = GameMechanics.available_houses
-        self.available_hotels = GameMechanics.available_hotels
-
-        # Chance deck
-        self.chance = Deck([
-            "Advance to Boardwalk",
-            "Advance to Go (Collect $200)",
-            "Advance to Illinois Avenue. If you pass Go, collect $200",
-            "Advance to St. Charles Place. If you pass Go, collect $200",
-            "Advance to the nearest Railroad. If owned, pay owner twice " + \
-            "the rental to which they are otherwise entitled",
-            "Advance to the nearest Railroad. If owned, pay owner twice " + \
-            "the rental to which they are otherwise entitled",
-            "Advance token to nearest Utility. " + \
-            "If owned, throw dice and pay owner a total ten times amount thrown.",
-            "Bank pays you dividend of $50",
-            "Get Out of Jail Free",
-            "Go Back 3 Spaces",
-            "Go to Jail. Go directly to Jail, do not pass Go, do not collect $200",
-            "Make general repairs on all your property. For each house pay $25. " + \
-            "For each hotel pay $100",
-            "Speeding fine $15",
-            "Take a trip to Reading Railroad. If you pass Go, collect $200",
-            "You have been elected Chairman of the Board. Pay each player $50",
-            "Your building loan matures. Collect $150"
-        ])
-
-        # Community Chest deck
-        self.chest = Deck([
-            "Advance to Go (Collect $200)",
-            "Bank error in your favor. Collect $200",
-            "Doctor's fee. Pay $50",
-            "From sale of stock you get $50",
-            "Get Out of Jail Free",
-            "Go to Jail. Go directly to jail, do not pass Go, do not collect $200",
-            "Holiday fund matures. Receive $100",
-            "Income tax refund. Collect $20",
-            "It is your birthday. Collect $10 from every player",
-            "Life insurance matures. Collect $100",
-            "Pay hospital fees of $100",
-            "Pay school fees of $50",
-            "Receive $25 consultancy fee",
-            "You are assessed for street repair. $40 per house. $115 per hotel",
-            "You have won second prize in a beauty contest. Collect $10",
-            "You inherit $100"
-        ])
+        self.available_houses = self.settings.available_houses
+        self.available_hotels = self.settings.available_hotels
 
     def create_property_groups(self):
         """ self.groups is a convenient way to group cells by color/type,
@@ -143,9 +140,9 @@ class Board:
     def log_board_state(self, log):
         """ Log the current state of the houses/hotels, free parking money
         """
-        log.add(f"Available houses/hotels: {self.available_houses}/{self.available_hotels}")
-        if GameMechanics.free_parking_money:
-            log.add(f"Free Parking Money: ${self.free_parking_money}")
+        log.add("Available houses/hotels: {}/{}", self.available_houses, self.available_hotels)
+        if self.settings.free_parking_money:
+            log.add("Free Parking Money: ${}", self.free_parking_money)
 
     def log_current_map(self, log):
         """ Log the current situation on the board,
@@ -162,10 +159,26 @@ class Board:
                 improvements = f"{cell.has_houses} house(s)"
             # Log property name, owner, rent multipliers, improvements:
             # G1 Pacific Avenue, Owner: Exp, Rent multiplier: 2, Can improve: False, Improvements: hotel
-            log.add(f"- {cell.name}, Owner: {cell.owner}, " +
-                    f"Rent multiplier: {cell.monopoly_multiplier}, Improvements: {improvements}")
+            log.add("- {}, Owner: {}, Rent multiplier: {}, Improvements: {}",
+                    cell.name, cell.owner, cell.monopoly_multiplier, improvements)
         log.add("")
 
+    def record_ownership_change(self, changed_cell):
+        """ Record that the property changed its owner (to update players' lists of properties to trade)
+        """
+        self.ownership_changes.append(changed_cell.group)
+        changed_cell.acquired_order = len(self.ownership_changes)
+
+    def update_improvable_properties(self, changed_cell):
+        """ Update the lists of properties that can be improved (see Player.update_improvable_properties)
+        for the owners of the changed property's group. Runs every time ownership, monopoly multipliers,
+        improvements or mortgages in the group change.
+        """
+        group_cells = self.groups[changed_cell.group]
+        for owner in dict.fromkeys(cell.owner for cell in group_cells):
+            if owner is not None:
+                owner.update_improvable_properties(group_cells)
+
     def recalculate_monopoly_multipliers(self, changed_cell):
         """ Go through all properties in the property group and update flags:
         - monopoly_multiplier
@@ -200,4 +213,4 @@ class Board:
             else:
                 cell.monopoly_multiplier = 1
 
-        return
+        self.update_improvable_properties(changed_cell)
@@ -0,0 +1,76 @@
+""" Chance and Community Chest cards.
+A card is its text (for the log) and its action: a code with an amount of money or a target cell.
+Game engines play cards with a table of handlers by action code, so a new deck
+(another edition, house rules) is a new list of cards here.
+Decks keep cards as their numbers in these lists (see Deck).
+"""
+from typing import NamedTuple
+
+# Card actions
+CARD_NOTHING = 0
+CARD_MOVE = 1  # Move to a cell (amount), collect salary if passing Go
+CARD_GO = 2  # Move to Go and collect salary
+CARD_BACK_3 = 3
+CARD_RAILROAD = 4  # Nearest railroad, double rent
+CARD_UTILITY = 5  # Nearest utility, 10 times dice rent
+CARD_GOOJF = 6
+CARD_GO_TO_JAIL = 7
+CARD_GAIN = 8  # Receive money from the bank
+CARD_PAY = 9  # Pay money to the bank
+CARD_REPAIRS = 10  # Pay per house (amount) and per hotel (amount_hotel)
+CARD_PAY_EACH = 11  # Pay each player
+CARD_COLLECT_EACH = 12  # Collect from each player
+
+
+class Card(NamedTuple):
+    """ One Chance / Community Chest card """
+    text: str
+    action: int = CARD_NOTHING
+    amount: int = 0  # Money or target cell
+    amount_hotel: int = 0  # Money per hotel (for repairs)
+
+
+CHANCE_CARDS = (
+    Card("Advance to Boardwalk", CARD_MOVE, 39),
+    Card("Advance to Go (Collect $200)", CARD_GO),
+    Card("Advance to Illinois Avenue. If you pass Go, collect $200", CARD_MOVE, 24),
+    Card("Advance to St. Charles Place. If you pass Go, collect $200", CARD_MOVE, 11),
+    Card("Advance to the nearest Railroad. If owned, pay owner twice " +
+         "the rental to which they are otherwise entitled", CARD_RAILROAD),
+    Card("Advance to the nearest Railroad. If owned, pay owner twice " +
+         "the rental to which they are otherwise entitled", CARD_RAILROAD),
+    Card("Advance token to nearest Utility. " +
+         "If owned, throw dice and pay owner a total ten times amount thrown.", CARD_UTILITY),
+    Card("Bank pays you dividend of $50", CARD_GAIN, 50),
+    Card("Get Out of Jail Free", CARD_GOOJF),
+    Card("Go Back 3 Spaces", CARD_BACK_3),
+    Card("Go to Jail. Go directly to Jail, do not pass Go, do not collect $200", CARD_GO_TO_JAIL),
+    Card("Make general repairs on all your property. For each house pay $25. " +
+         "For each hotel pay $100", CARD_REPAIRS, 25, 100),
+    Card("Speeding fine $15", CARD_PAY, 15),
+    Card("Take a trip to Reading Railroad. If you pass Go, collect $200", CARD_MOVE, 5),
+    Card("You have been elected Chairman of the Board. Pay each player $50", CARD_PAY_EACH, 50),
+    Card("Your building loan matures. Collect $150", CARD_GAIN, 150),
+)
+
+CHEST_CARDS = (
+    Card("Advance to Go (Collect $200)", CARD_GO),
+    Card("Bank error in your favor. Collect $200", CARD_GAIN, 200),
+    Card("Doctor's fee. Pay $50", CARD_PAY, 50),
+    Card("From sale of stock you get $50", CARD_GAIN, 50),
+    Card("Get Out of Jail Free", CARD_GOOJF),
+    # Does nothing, as in the original game (where its text was not recognized)
+    Card("Go to Jail. Go directly to jail, do not pass Go, do not collect $200"),
+    Card("Holiday fund matures. Receive $100", CARD_GAIN, 100),
+    Card("Income tax refund. Collect $20", CARD_GAIN, 20),
+    # Players pay $50 (not $10 as the text says), as in the original game
+    Card("It is your birthday. Collect $10 from every player", CARD_COLLECT_EACH, 50),
+    Card("Life insurance matures. Collect $100", CARD_GAIN, 100),
+    Card("Pay hospital fees of $100", CARD_PAY, 100),
+    Card("Pay school fees of $50", CARD_PAY, 50),
+    Card("Receive $25 consultancy fee", CARD_GAIN, 25),
+    Card("You are assessed for street repair. $40 per house. $115 per hotel", CARD_REPAIRS, 40, 115),
+    Card("You have won second prize in a beauty contest. Collect $10", CARD_GAIN, 10),
+    # Does nothing, as in the original game (where its text was not recognized)
+    Card("You inherit $100"),
+)
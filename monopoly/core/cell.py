@@ -63,10 +63,24 @@ class Property(Cell):
         self.rent_house = rent_house
         # Group of the property (color, or "Railroads", "Utilities")
         self.group = group
-
-        # Current state of the property
+        # Prices that depend on the game rules (see PropertyPrices), set by the Board
+        self.mortgage_price = 0
+        self.unmortgage_price = 0
+        self.mortgaged_worth = 0
+        self.house_sale_price = 0
+        self.houses_sale_value = ()
+        self.hotel_sale_value = 0
+        self.rents = ()
+
+        self.reset()
+
+    def reset(self):
+        """ Put the property in its state at the start of a game: not owned, not improved
+        """
         # Owner of the property (Will be a Player object or None if not owned)
         self.owner = None
+        # When the owner got the property (a number that grows with every change of owners), set by the Board
+        self.acquired_order = 0
         # Is the property mortgaged
         self.is_mortgaged = False
 
@@ -84,11 +98,11 @@ class Property(Cell):
         """
         # There is a hotel on this property
         if self.has_hotel == 1:
-            return self.rent_house[-1]
+            return self.rents[5]
 
         # There are 1 or more houses on this property
         if self.has_houses:
-            return self.rent_house[self.has_houses - 1]
+            return self.rents[self.has_houses]
 
         if self.group != UTILITIES:
             # Undeveloped monopoly: double rent
@@ -98,3 +112,26 @@ class Property(Cell):
         # Utilities: Dice roll * 4/10
         _, dice_sum, _ = dice.roll()
         return dice_sum * self.monopoly_multiplier
+
+
+# Cell kinds. When a player lands on a cell, kinds are handled in this order:
+# Chance first (it can send the player to Community Chest, a property or Income Tax), then Community Chest
+# (it can send the player to Go), so a card moves the player to a cell of a later kind, if at all
+CELL_OTHER = 0
+CELL_CHANCE = 1
+CELL_CHEST = 2
+CELL_PROPERTY = 3
+CELL_GO_TO_JAIL = 4
+CELL_FREE_PARKING = 5
+CELL_LUXURY_TAX = 6
+CELL_INCOME_TAX = 7
+
+CELL_KINDS = {
+    Chance: CELL_CHANCE,
+    CommunityChest: CELL_CHEST,
+    Property: CELL_PROPERTY,
+    GoToJail: CELL_GO_TO_JAIL,
+    FreeParking: CELL_FREE_PARKING,
+    LuxuryTax: CELL_LUXURY_TAX,
+    IncomeTax: CELL_INCOME_TAX,
+}
@@ -0,0 +1,1086 @@
+""" Compact (structure-of-arrays) version of the game engine.
+Instead of Cell/Property/Player objects, the state of a game is kept in
+fixed-size lists:
+    - per cell: owner, mortgage flag, houses, hotel, monopoly multiplier
+    - per player: money, position, jail status, owned cells, etc.
+Cells are referred to by their position on the board, players by their number
+(in the order they make moves). Static cell information (costs, rents, groups)
+is taken from the Board once and shared by all games.
+
+The rules (and the game log) are the same as in Player/Board, so for the same seed
+compact_monopoly_game plays exactly the same game as monopoly_game
+(scripts/check_compact.py plays games with both engines and compares them).
+"""
+from typing import Iterator, List, Tuple
+
+from monopoly.core.board import Board
+from monopoly.core.cards import CARD_NOTHING, CARD_MOVE, CARD_GO, CARD_BACK_3, CARD_RAILROAD, CARD_UTILITY, \
+    CARD_GOOJF, CARD_GO_TO_JAIL, CARD_GAIN, CARD_PAY, CARD_REPAIRS, CARD_PAY_EACH, CARD_COLLECT_EACH
+from monopoly.core.cell import Property, CELL_OTHER, CELL_CHANCE, CELL_CHEST, CELL_PROPERTY, CELL_GO_TO_JAIL, \
+    CELL_FREE_PARKING, CELL_LUXURY_TAX, CELL_INCOME_TAX
+from monopoly.core.constants import INDIGO, BROWN, RAILROADS, UTILITIES
+from monopoly.core.deck import Deck
+from monopoly.core.dice import create_dice
+from monopoly.core.game_config import GameConfig, PropertyPrices
+from monopoly.core.game_result import GameEnd, GameResult
+from monopoly.core.move_result import MoveResult
+from monopoly.log import Log
+from monopoly.log_settings import LogSettings
+from monopoly.stats_log import StatsLog
+
+ORDINAL = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
+
+
+class BoardTables:
+    """ Static (not changing during the game) information about the board cells,
+    as lists indexed by cell position. Non-property cells have zero costs and rents.
+    """
+
+    def __init__(self, board):
+        self.names = [cell.name for cell in board.cells]
+        self.kinds = list(board.cell_kinds)
+
+        properties = [cell if isinstance(cell, Property) else None for cell in board.cells]
+        self.cost_base = [cell.cost_base if cell else 0 for cell in properties]
+        self.rent_base = [cell.rent_base if cell else 0 for cell in properties]
+        self.cost_house = [cell.cost_house if cell else 0 for cell in properties]
+        self.rent_house = [cell.rent_house if cell else () for cell in properties]
+        self.group = [cell.group if cell else None for cell in properties]
+
+        # Positions of properties, grouped by color/type (same order as board.groups)
+        self.groups = {group: tuple(board.cells.index(cell) for cell in cells)
+                       for group, cells in board.groups.items()}
+
+        # Cards of the decks (see cards.py)
+        self.chance_cards = board.chance.all_cards
+        self.chest_cards = board.chest.all_cards
+
+
+# Tables are the same for all games, build them once
+BOARD_TABLES = BoardTables(Board(GameConfig()))
+
+
+class CompactGame:
+    """ State of one game, kept in fixed-size lists, and the game engine working on it.
+    Methods mirror the ones of Player and Board, but receive a player number `p`
+    instead of being called on a Player object.
+    """
+
+    def __init__(self, game_seed, log, game_config, tables=BOARD_TABLES):
+        self.tables = tables
+        self.log = log
+        self.game_config = game_config
+        n_cells = len(tables.names)
+
+        # Prices that depend on game rules (see PropertyPrices): self.mortgage_price[cell] etc.
+        prices = [game_config.property_prices(cost_base, cost_house, rent_base, rent_house)
+                  for cost_base, cost_house, rent_base, rent_house
+                  in zip(tables.cost_base, tables.cost_house, tables.rent_base, tables.rent_house)]
+        for price_name, cell_prices in zip(PropertyPrices._fields, zip(*prices)):
+            setattr(self, price_name, list(cell_prices))
+
+        # Same order of random generator calls as in setup_game / setup_players
+        self.dice = create_dice(game_seed, game_config, log)
+        self.chance = Deck("Chance", tables.chance_cards)
+        self.chest = Deck("Community Chest", tables.chest_cards)
+        self.dice.shuffle(self.chance.cards)
+        self.dice.shuffle(self.chest.cards)
+
+        # Cells' state
+        # Owner of the property (player number or None if not owned)
+        self.owner = [None] * n_cells
+        self.is_mortgaged = [False] * n_cells
+        self.monopoly_multiplier = [1] * n_cells
+        self.has_houses = [0] * n_cells
+        self.has_hotel = [0] * n_cells
+
+        # Board's state
+        self.free_parking_money = 0
+        self.available_houses = game_config.available_houses
+        self.available_hotels = game_config.available_hotels
+        # Number of times a property changed owners (lists to trade depend only on the owners)
+        self.ownership_changes = 0
+        # Number of times any player's lists to trade were updated
+        self.trade_lists_updates = 0
+
+        # Players' state, players are numbered in the order they make moves
+        players_list = list(game_config.players_list)
+        if game_config.shuffle_players:
+            self.dice.shuffle(players_list)
+        n_players = len(players_list)
+
+        self.n_players = n_players
+        self.names = [player_name for player_name, _ in players_list]
+        self.settings = [player_setting for _, player_setting in players_list]
+        self.money = [0] * n_players
+        self.position = [0] * n_players
+        self.in_jail = [False] * n_players
+        self.had_doubles = [0] * n_players
+        self.days_in_jail = [0] * n_players
+        self.get_out_of_jail_chance = [False] * n_players
+        self.get_out_of_jail_comm_chest = [False] * n_players
+        self.owned = [[] for _ in range(n_players)]
+        # Number of color groups (not railroads or utilities) the player owns in full, i.e. can build on
+        self.color_monopolies = [0] * n_players
+        # Who owns the color group in full: {group: player number}
+        self.color_monopoly_owners = {}
+        self.wants_to_sell = [set() for _ in range(n_players)]
+        self.wants_to_buy = [set() for _ in range(n_players)]
+        # Value of ownership_changes when the player's lists to trade were last updated
+        self.ownership_changes_seen = [0] * n_players
+        # Value of trade_lists_updates when the player last found no trade (to not look for it again)
+        self.no_trade_seen = [-1] * n_players
+        self.is_bankrupt = [False] * n_players
+        self.other_notes = [""] * n_players
+
+        # Starting money (a dict of money per-player or a single value)
+        starting_money = game_config.starting_money
+        for p in range(n_players):
+            if isinstance(starting_money, dict):
+                self.money[p] = starting_money.get(self.names[p], 0)
+            else:
+                self.money[p] = starting_money
+
+        # Starting properties
+        for p in range(n_players):
+            for cell_index in game_config.starting_properties.get(self.names[p], []):
+                self.owner[cell_index] = p
+                self.ownership_changes += 1
+                self.owned[p].append(cell_index)
+                self.recalculate_monopoly_multipliers(cell_index)
+                self.update_lists_of_properties_to_trade(p)
+
+    def payee_name(self, payee):
+        """ Name of the payee ("bank" or a player number) for the log """
+        return payee if payee == "bank" else self.names[payee]
+
+    def owner_name(self, cell):
+        """ Name of the cell's owner for the log """
+        owner = self.owner[cell]
+        return None if owner is None else self.names[owner]
+
+    # Board-level functions
+
+    def recalculate_monopoly_multipliers(self, changed_cell):
+        """ Go through all properties in the property group and update monopoly_multiplier.
+        Same logic as in Board.recalculate_monopoly_multipliers
+        """
+        group = self.tables.group[changed_cell]
+        group_cells = self.tables.groups[group]
+        owners = [self.owner[cell] for cell in group_cells]
+
+        for cell in group_cells:
+            ownership_count = owners.count(self.owner[cell])
+            if group == RAILROADS:
+                self.monopoly_multiplier[cell] = 2 ** (ownership_count - 1)
+            elif group == UTILITIES:
+                self.monopoly_multiplier[cell] = 10 if ownership_count == 2 else 4
+            elif ownership_count == len(group_cells):
+                self.monopoly_multiplier[cell] = 2
+            else:
+                self.monopoly_multiplier[cell] = 1
+
+        if group not in (RAILROADS, UTILITIES):
+            monopoly_owner = owners[0] if owners.count(owners[0]) == len(owners) else None
+            old_monopoly_owner = self.color_monopoly_owners.get(group)
+            if monopoly_owner != old_monopoly_owner:
+                if old_monopoly_owner is not None:
+                    self.color_monopolies[old_monopoly_owner] -= 1
+                if monopoly_owner is not None:
+                    self.color_monopolies[monopoly_owner] += 1
+                self.color_monopoly_owners[group] = monopoly_owner
+
+    def calculate_rent(self, cell):
+        """ Calculate the rent amount for a property, including monopoly, houses etc.
+        """
+        if self.has_hotel[cell] == 1:
+            return self.rents[cell][5]
+        if self.has_houses[cell]:
+            return self.rents[cell][self.has_houses[cell]]
+        if self.tables.group[cell] != UTILITIES:
+            return self.tables.rent_base[cell] * self.monopoly_multiplier[cell]
+        _, dice_sum, _ = self.dice.roll()
+        return dice_sum * self.monopoly_multiplier[cell]
+
+    def log_board_state(self):
+        """ Log the current state of the houses/hotels, free parking money
+        """
+        self.log.add("Available houses/hotels: {}/{}", self.available_houses, self.available_hotels)
+        if self.game_config.free_parking_money:
+            self.log.add("Free Parking Money: ${}", self.free_parking_money)
+
+    def log_current_map(self):
+        """ Log who owns what, monopolies, improvements, etc.
+        """
+        self.log.add("\n== BOARD ==")
+        for cell, kind in enumerate(self.tables.kinds):
+            if kind != CELL_PROPERTY:
+                continue
+            improvements = "none"
+            if self.has_hotel[cell] == 1:
+                improvements = "hotel"
+            if self.has_houses[cell] > 0:
+                improvements = f"{self.has_houses[cell]} house(s)"
+            self.log.add("- {}, Owner: {}, Rent multiplier: {}, Improvements: {}", self.tables.names[cell],
+                         self.owner_name(cell), self.monopoly_multiplier[cell], improvements)
+        self.log.add("")
+
+    def log_players_and_board_state(self):
+        """ Current players' position, money and net worth
+        """
+        for p in range(self.n_players):
+            if not self.is_bankrupt[p]:
+                self.log.add("- {}: ${} (net ${}), at position {} ({})", self.names[p], int(self.money[p]),
+                             self.net_worth(p), self.position[p], self.tables.names[self.position[p]])
+            else:
+                self.log.add("- Player {}, '{}': Bankrupt", p, self.names[p])
+
+    def check_end_conditions(self, game_number, turn_n):
+        """ Return the reason the game is over (None if it is not):
+        fewer than 2 players remain or all remaining players are rich.
+        Same logic as in game_utils._check_end_conditions
+        """
+        alive = [p for p in range(self.n_players) if not self.is_bankrupt[p]]
+        n_alive = len(alive)
+
+        if n_alive < 2:
+            self.log.add("Only {} alive player remains, game over", n_alive)
+            return GameEnd.ONE_PLAYER_LEFT
+
+        threshold = self.game_config.never_bankrupt_cash
+        if all(self.money[p] > threshold for p in alive):
+            self.log.add("== All Rich ==: GAME {}, Turn {}: all non-bankrupt players have more than {}$, " +
+                         "this game will never end", game_number, turn_n, threshold)
+            return GameEnd.ALL_RICH
+        return None
+
+    def count_monopolies(self, p):
+        """ Number of street groups (not railroads or utilities) the player owns completely.
+        Same as game_utils.count_monopolies
+        """
+        return sum(self.owner[cells[0]] == p and all(self.owner[cell] == p for cell in cells)
+                   for group, cells in self.tables.groups.items() if group not in (RAILROADS, UTILITIES))
+
+    def record_players_state(self, stats_log, game_number, turn_n):
+        """ Snapshot of not bankrupt players' state for the statistics (see game_utils.record_players_state)
+        """
+        for p in range(self.n_players):
+            if not self.is_bankrupt[p]:
+                stats_log.add_snapshot(game_number, turn_n, self.names[p], int(self.money[p]), self.net_worth(p),
+                                       self.position[p], len(self.owned[p]), self.count_monopolies(p))
+
+    # Player-level functions
+
+    def net_worth(self, p, count_mortgaged_as_full_value=False):
+        """ Calculate player's net worth (cash + property + houses)
+        """
+        net_worth = int(self.money[p])
+        for cell in self.owned[p]:
+            if self.is_mortgaged[cell] and not count_mortgaged_as_full_value:
+                net_worth += self.mortgaged_worth[cell]
+            else:
+                net_worth += self.tables.cost_base[cell]
+                net_worth += (self.has_houses[cell] + self.has_hotel[cell]) * self.tables.cost_house[cell]
+        return net_worth
+
+    def play_turns(self, game_number, bankruptcies, stats_log=None, first_turn=1, first_player=0):
+        """ Play the game until it is over, starting with the move of player first_player in first_turn
+        (see game.play_turns), adding bankruptcies [(player name, turn), ...] to the list.
+        Returns why the game ended and the number of turns played
+        """
+        log = self.log
+        snapshot_interval = stats_log.snapshot_interval if stats_log else 0
+        for turn_n in range(first_turn, self.game_config.n_moves + 1):
+            # Moves of the first turn start with first_player (a game can be resumed in the middle of a turn)
+            turn_first_player = first_player if turn_n == first_turn else 0
+            if turn_first_player == 0:
+                if not log.disabled:
+                    log.add("\n== GAME {} Turn {} ===", game_number, turn_n)
+                    self.log_players_and_board_state()
+                    self.log_board_state()
+                    log.add("")
+
+                end_condition = self.check_end_conditions(game_number, turn_n)
+                if end_condition:
+                    return end_condition, turn_n - 1
+
+            for p in range(turn_first_player, self.n_players):
+                if self.is_bankrupt[p]:
+                    continue
+                if self.make_a_move(p) == MoveResult.BANKRUPT:
+                    bankruptcies.append((self.names[p], turn_n))
+
+            if snapshot_interval and turn_n % snapshot_interval == 0:
+                self.record_players_state(stats_log, game_number, turn_n)
+        return GameEnd.TURN_LIMIT, self.game_config.n_moves
+
+    def make_a_move(self, p) -> MoveResult:
+        """ Main function for a player to make a move (see Player.make_a_move)
+        """
+        move_result = MoveResult.CONTINUE
+        while move_result == MoveResult.CONTINUE:
+            move_result = self.roll_and_move(p)
+        return move_result
+
+    def roll_and_move(self, p) -> MoveResult:
+        """ One roll of the dice (see Player.roll_and_move)
+        """
+        log = self.log
+        kinds = self.tables.kinds
+
+        if self.is_bankrupt[p]:
+            return MoveResult.BANKRUPT
+
+        log.add("=== {} (${}, at {}) goes: ===", self.names[p], self.money[p], self.tables.names[self.position[p]])
+
+        # Before the throwing of the dice: trade, unmortgage, improve
+        while self.do_a_two_way_trade(p):
+            pass
+        while self.unmortgage_a_property(p):
+            pass
+        self.improve_properties(p)
+
+        _, dice_sum, is_double = self.dice.roll()
+
+        if is_double and self.had_doubles[p] == 2:
+            self.handle_going_to_jail(p, "rolled 3 doubles in a row")
+            return MoveResult.END_MOVE
+
+        if self.in_jail[p]:
+            if self.is_player_stay_in_jail(p, is_double):
+                return MoveResult.END_MOVE
+
+        position = self.position[p] + dice_sum
+        self.position[p] = position
+        if position >= 40:
+            self.handle_salary(p)
+        self.position[p] = position % 40
+        log.add("{} goes to: {}", self.names[p], self.tables.names[self.position[p]])
+
+        # Handle the cell the player landed on (and the cell a card moves them to, see Player.make_a_move)
+        kind = kinds[self.position[p]]
+        while kind != CELL_OTHER:
+            if COMPACT_CELL_HANDLERS[kind](self, p) == MoveResult.END_MOVE:
+                return MoveResult.END_MOVE
+            landed_kind = kinds[self.position[p]]
+            if landed_kind <= kind:
+                break
+            kind = landed_kind
+
+        self.other_notes[p] = ""
+
+        if self.is_bankrupt[p]:
+            return MoveResult.BANKRUPT
+
+        if is_double:
+            self.had_doubles[p] += 1
+            log.add("{} rolled a double ({} in a row) so they go again.", self.names[p], self.had_doubles[p])
+            return MoveResult.CONTINUE
+        self.had_doubles[p] = 0
+        return MoveResult.END_MOVE
+
+    def handle_landing_on_go_to_jail(self, p):
+        """ Go to jail, the move is over """
+        self.handle_going_to_jail(p, "landed on Go To Jail")
+        return MoveResult.END_MOVE
+
+    def handle_free_parking(self, p):
+        """ Get the Free Parking money (if the house rule is on) """
+        if self.game_config.free_parking_money:
+            self.log.add("{} gets ${} from Free Parking", self.names[p], self.free_parking_money)
+            self.money[p] += self.free_parking_money
+            self.free_parking_money = 0
+
+    def handle_luxury_tax(self, p):
+        """ Pay Luxury Tax """
+        self.pay_money(p, self.game_config.luxury_tax, "bank")
+        if not self.is_bankrupt[p]:
+            self.log.add("{} pays Luxury Tax ${}", self.names[p], self.game_config.luxury_tax)
+
+    def handle_salary(self, p):
+        """ Adding Salary to the player's money """
+        self.money[p] += self.game_config.salary
+        self.log.add(" {} receives salary ${}", self.names[p], self.game_config.salary)
+
+    def handle_going_to_jail(self, p, message):
+        """ Start the jail time
+        """
+        self.log.add("{} {}, and goes to Jail.", self.names[p], message)
+        self.position[p] = 10
+        self.in_jail[p] = True
+        self.had_doubles[p] = 0
+        self.days_in_jail[p] = 0
+
+    def is_player_stay_in_jail(self, p, dice_roll_is_double):
+        """ Handle a player being in Jail
+        Return True if the player stays in jail (to end his turn)
+        """
+        log = self.log
+        name = self.names[p]
+        if self.get_out_of_jail_chance[p] or self.get_out_of_jail_comm_chest[p]:
+            log.add("{} uses a GOOJF card", name)
+            self.in_jail[p] = False
+            self.days_in_jail[p] = 0
+            if self.get_out_of_jail_chance[p]:
+                self.chance.add(self.chance.get_out_of_jail_free)
+                self.get_out_of_jail_chance[p] = False
+            else:
+                self.chest.add(self.chest.get_out_of_jail_free)
+                self.get_out_of_jail_comm_chest[p] = False
+        elif dice_roll_is_double:
+            log.add("{} rolled a double, a leaves jail for free", name)
+            self.in_jail[p] = False
+            self.days_in_jail[p] = 0
+        elif self.days_in_jail[p] == 2:
+            log.add("{} did not rolled a double for the third time, pays {} and leaves jail",
+                    name, self.game_config.exit_jail_fine)
+            self.pay_money(p, self.game_config.exit_jail_fine, "bank")
+            self.in_jail[p] = False
+            self.days_in_jail[p] = 0
+        else:
+            log.add("{} stays in jail", name)
+            self.days_in_jail[p] += 1
+            return True
+        return False
+
+    def handle_chance(self, p):
+        """ Draw and act on a Chance card (see Player.handle_chance)
+        """
+        return self.handle_card(p, self.chance)
+
+    def handle_community_chest(self, p):
+        """ Draw and act on a Community Chest card (see Player.handle_community_chest)
+        """
+        return self.handle_card(p, self.chest)
+
+    def handle_card(self, p, deck):
+        """ Draw a card from the deck and act on it (see Player.handle_card)
+        """
+        card = deck.all_cards[deck.draw()]
+        self.log.add("{} drew {} card: '{}'", self.names[p], deck.name, card.text)
+        return COMPACT_CARD_HANDLERS[card.action](self, p, card, deck)
+
+    # Card handlers, by card action (see Player.card_* and COMPACT_CARD_HANDLERS)
+
+    def card_nothing(self, p, card, deck):
+        pass
+
+    def card_move(self, p, card, deck):
+        self.advance_to(p, card.amount)
+
+    def card_go(self, p, card, deck):
+        self.log.add("{} goes to {}", self.names[p], self.tables.names[0])
+        self.position[p] = 0
+        self.handle_salary(p)
+
+    def card_back_3(self, p, card, deck):
+        self.position[p] -= 3
+        self.log.add("{} goes to {}", self.names[p], self.tables.names[self.position[p]])
+
+    def card_railroad(self, p, card, deck):
+        nearest_railroad = self.position[p]
+        while (nearest_railroad - 5) % 10 != 0:
+            nearest_railroad += 1
+            nearest_railroad %= 40
+        self.advance_to(p, nearest_railroad)
+        self.other_notes[p] = "double rent"
+
+    def card_utility(self, p, card, deck):
+        nearest_utility = self.position[p]
+        while nearest_utility not in (12, 28):
+            nearest_utility += 1
+            nearest_utility %= 40
+        self.advance_to(p, nearest_utility)
+        self.other_notes[p] = "10 times dice"
+
+    def card_get_out_of_jail_free(self, p, card, deck):
+        self.log.add("{} now has a 'Get Out of Jail Free' card", self.names[p])
+        if deck is self.chance:
+            self.get_out_of_jail_chance[p] = True
+        else:
+            self.get_out_of_jail_comm_chest[p] = True
+        deck.remove(deck.get_out_of_jail_free)
+
+    def card_go_to_jail(self, p, card, deck):
+        self.handle_going_to_jail(p, f"got GTJ {deck.name} card")
+        return MoveResult.END_MOVE
+
+    def card_gain(self, p, card, deck):
+        self.log.add("{} gets ${}", self.names[p], card.amount)
+        self.money[p] += card.amount
+
+    def card_pay(self, p, card, deck):
+        self.pay_money(p, card.amount, "bank")
+
+    def card_repairs(self, p, card, deck):
+        repair_cost = sum(self.has_houses[cell] * card.amount + self.has_hotel[cell] * card.amount_hotel
+                          for cell in self.owned[p])
+        self.log.add("Repair cost: ${}", repair_cost)
+        self.pay_money(p, repair_cost, "bank")
+
+    def card_pay_each(self, p, card, deck):
+        for other_player in range(self.n_players):
+            if other_player != p and not self.is_bankrupt[other_player]:
+                self.pay_money(p, card.amount, other_player)
+                if not self.is_bankrupt[p]:
+                    self.log.add("{} pays {} ${}", self.names[p], self.names[other_player], card.amount)
+
+    def card_collect_each(self, p, card, deck):
+        for other_player in range(self.n_players):
+            if other_player != p and not self.is_bankrupt[other_player]:
+                self.pay_money(other_player, card.amount, p)
+                if not self.is_bankrupt[other_player]:
+                    self.log.add("{} pays {} ${}", self.names[other_player], self.names[p], card.amount)
+
+    def advance_to(self, p, target):
+        """ Move the player to the target cell (a card), collect salary if passing Go
+        """
+        self.log.add("{} goes to {}", self.names[p], self.tables.names[target])
+        if self.position[p] > target:
+            self.handle_salary(p)
+        self.position[p] = target
+
+    def handle_income_tax(self, p):
+        """ Handle Income tax: choose which option (fix or %) is less money and go with it
+        """
+        game_config = self.game_config
+        tax_to_pay = min(
+            game_config.income_tax,
+            int(game_config.income_tax_percentage *
+                self.net_worth(p, count_mortgaged_as_full_value=True)))
+
+        if tax_to_pay == game_config.income_tax:
+            self.log.add("{} pays fixed Income tax {}", self.names[p], game_config.income_tax)
+        else:
+            self.log.add("{} pays {:.0f}% Income tax {}",
+                         self.names[p], game_config.income_tax_percent, tax_to_pay)
+        self.pay_money(p, tax_to_pay, "bank")
+
+    def handle_landing_on_property(self, p):
+        """ Landing on property: either buy it or pay rent
+        """
+        log = self.log
+        tables = self.tables
+        name = self.names[p]
+        landed_property = self.position[p]
+        cost_base = tables.cost_base[landed_property]
+        owner = self.owner[landed_property]
+
+        if owner is None:
+            settings = self.settings[p]
+            # Same checks as in is_willing_to_buy_property
+            if self.money[p] - cost_base >= settings.unspendable_cash and \
+                    cost_base <= self.money[p] and \
+                    tables.group[landed_property] not in settings.ignore_property_groups:
+                self.buy_property(p, landed_property)
+                for player in range(self.n_players):
+                    self.update_lists_of_properties_to_trade(player)
+            else:
+                log.add("{} landed on a {}, he refuses to buy it", name, tables.names[landed_property])
+
+        elif self.is_mortgaged[landed_property]:
+            log.add("Property is mortgaged, no rent")
+        elif owner == p:
+            log.add("Own property, no rent")
+        else:
+            log.add("{} landed on a property, owned by {}", name, self.names[owner])
+            rent_amount = self.calculate_rent(landed_property)
+            if self.other_notes[p] == "double rent":
+                rent_amount *= 2
+                log.add("Per Chance card, rent is doubled (${}).", rent_amount)
+            if self.other_notes[p] == "10 times dice":
+                rent_amount = rent_amount // self.monopoly_multiplier[landed_property] * 10
+                log.add("Per Chance card, rent is 10x dice throw (${}).", rent_amount)
+            self.pay_money(p, rent_amount, owner)
+            if not self.is_bankrupt[p]:
+                log.add("{} pays {} rent ${}", name, self.names[owner], rent_amount)
+
+    def buy_property(self, p, cell):
+        """ Player buys the property (see Player.buy_property),
+        the caller then updates the players' lists of properties to trade
+        """
+        self.owner[cell] = p
+        self.ownership_changes += 1
+        self.owned[p].append(cell)
+        self.money[p] -= self.tables.cost_base[cell]
+        self.log.add("{} bought {} for ${}", self.names[p], self.tables.names[cell], self.tables.cost_base[cell])
+        self.recalculate_monopoly_multipliers(cell)
+
+    def get_next_property_to_improve(self, p):
+        """ Cheapest property that can be improved (see Player.improve_properties)
+        """
+        # No color group to build on
+        if not self.color_monopolies[p]:
+            return None
+        tables = self.tables
+        has_houses = self.has_houses
+        has_hotel = self.has_hotel
+        is_mortgaged = self.is_mortgaged
+        can_be_improved = []
+        for cell in self.owned[p]:
+            if (
+                    has_hotel[cell] == 0
+                    and not is_mortgaged[cell]
+                    and self.monopoly_multiplier[cell] == 2
+                    and tables.group[cell] not in (RAILROADS, UTILITIES)
+            ):
+                for other_cell in tables.groups[tables.group[cell]]:
+                    if (has_houses[other_cell] < has_houses[cell] and not has_hotel[other_cell]) or \
+                            is_mortgaged[other_cell]:
+                        break
+                else:
+                    if has_houses[cell] != 4 and self.available_houses > 0 or \
+                            has_houses[cell] == 4 and self.available_hotels > 0:
+                        can_be_improved.append(cell)
+        can_be_improved.sort(key=tables.cost_house.__getitem__)
+        if can_be_improved:
+            return can_be_improved[0]
+        return None
+
+    def improve_properties(self, p):
+        """ While there is money to spend and properties to improve,
+        keep building houses/hotels
+        """
+        name = self.names[p]
+        unspendable_cash = self.settings[p].unspendable_cash
+        while True:
+            cell_to_improve = self.get_next_property_to_improve(p)
+            if cell_to_improve is None:
+                break
+
+            improvement_cost = self.tables.cost_house[cell_to_improve]
+            if self.money[p] - improvement_cost < unspendable_cash:
+                break
+
+            if self.has_houses[cell_to_improve] != 4:
+                self.has_houses[cell_to_improve] += 1
+                self.available_houses -= 1
+                self.money[p] -= improvement_cost
+                self.log.add("{} built {} house on {} for ${}", name, ORDINAL[self.has_houses[cell_to_improve]],
+                             self.tables.names[cell_to_improve], improvement_cost)
+            else:
+                self.has_houses[cell_to_improve] = 0
+                self.has_hotel[cell_to_improve] = 1
+                self.available_houses += 4
+                self.available_hotels -= 1
+                self.money[p] -= improvement_cost
+                self.log.add("{} built a hotel on {}", name, self.tables.names[cell_to_improve])
+
+    def unmortgage_a_property(self, p):
+        """ Unmortgage one property if there is enough money to do so.
+        Return True, if any unmortgaging took place (to call it again)
+        """
+        for cell in self.owned[p]:
+            if self.is_mortgaged[cell]:
+                cost_to_unmortgage = self.unmortgage_price[cell]
+                if self.money[p] - cost_to_unmortgage >= self.settings[p].unspendable_cash:
+                    self.log.add("{} unmortgages {} for ${}",
+                                 self.names[p], self.tables.names[cell], cost_to_unmortgage)
+                    self.money[p] -= cost_to_unmortgage
+                    self.is_mortgaged[cell] = False
+                    self.update_lists_of_properties_to_trade(p)
+                    return True
+        return False
+
+    def get_next_property_to_downgrade(self, p, required_amount):
+        """ Get the next property to sell houses/hotel from (see Player.raise_money)
+        """
+        tables = self.tables
+        has_houses = self.has_houses
+        has_hotel = self.has_hotel
+
+        can_be_downgrade = []
+        can_be_downgrade_has_houses = False
+        for cell in self.owned[p]:
+            if has_houses[cell] > 0 or has_hotel[cell] > 0:
+                for other_cell in tables.groups[tables.group[cell]]:
+                    if has_hotel[cell] == 0 and (
+                            has_houses[other_cell] > has_houses[cell] or has_hotel[other_cell] > 0):
+                        break
+                else:
+                    can_be_downgrade.append(cell)
+                    if has_houses[cell] > 0:
+                        can_be_downgrade_has_houses = True
+
+        if len(can_be_downgrade) == 0:
+            return None
+
+        if can_be_downgrade_has_houses:
+            can_be_downgrade = [cell for cell in can_be_downgrade if has_hotel[cell] == 0]
+
+        can_be_downgrade.sort(key=self.house_sale_price.__getitem__)
+        while True:
+            if len(can_be_downgrade) == 1:
+                return can_be_downgrade[0]
+            if self.house_sale_price[can_be_downgrade[-2]] < required_amount:
+                return can_be_downgrade[-1]
+            can_be_downgrade.pop()
+
+    def raise_money(self, p, required_amount):
+        """ Sell houses, hotels, mortgage property until the player has `required_amount` of money
+        """
+        log = self.log
+        name = self.names[p]
+        tables = self.tables
+
+        while True:
+            money_to_raise = required_amount - self.money[p]
+            cell_to_deimprove = self.get_next_property_to_downgrade(p, money_to_raise)
+
+            if cell_to_deimprove is None or money_to_raise <= 0:
+                break
+
+            sell_price = self.house_sale_price[cell_to_deimprove]
+
+            if self.has_hotel[cell_to_deimprove]:
+                if self.available_houses >= 4:
+                    self.has_hotel[cell_to_deimprove] = 0
+                    self.has_houses[cell_to_deimprove] = 4
+                    self.available_hotels += 1
+                    self.available_houses -= 4
+                    log.add("{} sells a hotel on {}, raising ${}",
+                            name, tables.names[cell_to_deimprove], sell_price)
+                    self.money[p] += sell_price
+                else:
+                    self.has_hotel[cell_to_deimprove] = 0
+                    self.has_houses[cell_to_deimprove] = 0
+                    self.available_hotels += 1
+                    log.add("{} sells a hotel and all houses on {}, raising ${}",
+                            name, tables.names[cell_to_deimprove], sell_price * 5)
+                    self.money[p] += sell_price * 5
+            else:
+                self.has_houses[cell_to_deimprove] -= 1
+                self.available_houses += 1
+                log.add("{} sells {} house on {}, raising ${}",
+                        name, ORDINAL[self.has_houses[cell_to_deimprove] + 1], tables.names[cell_to_deimprove],
+                        sell_price)
+                self.money[p] += sell_price
+
+        # Mortgage properties, starting from the cheapest
+        list_to_mortgage = [(self.mortgage_price[cell], cell)
+                            for cell in self.owned[p] if not self.is_mortgaged[cell]]
+        list_to_mortgage.sort(key=lambda x: -x[0])
+
+        while list_to_mortgage and self.money[p] < required_amount:
+            mortgage_price, cell_to_mortgage = list_to_mortgage.pop()
+            self.is_mortgaged[cell_to_mortgage] = True
+            self.money[p] += mortgage_price
+            log.add("{} mortgages {}, raising ${}", name, tables.names[cell_to_mortgage], mortgage_price)
+
+    def count_max_raisable_money(self, p):
+        """ How much cash can a player produce: 1/2 of houses cost + 1/2 of unmortgaged properties cost
+        """
+        tables = self.tables
+        max_raisable = self.money[p]
+        for cell in self.owned[p]:
+            if self.has_houses[cell] > 0:
+                max_raisable += self.houses_sale_value[cell][self.has_houses[cell]]
+            if self.has_hotel[cell] > 0:
+                max_raisable += self.hotel_sale_value[cell]
+            if not self.is_mortgaged[cell]:
+                max_raisable += self.mortgage_price[cell]
+        return max_raisable
+
+    def transfer_all_properties(self, p, payee):
+        """ Part of bankruptcy procedure, transfer all property to the creditor
+        """
+        owned = self.owned[p]
+        while owned:
+            cell_to_transfer = owned.pop()
+            self.ownership_changes += 1
+            if payee != "bank":
+                self.owner[cell_to_transfer] = payee
+                self.owned[payee].append(cell_to_transfer)
+            else:
+                self.owner[cell_to_transfer] = None
+                self.is_mortgaged[cell_to_transfer] = False
+            self.recalculate_monopoly_multipliers(cell_to_transfer)
+            self.log.add("{} transfers {} to {}",
+                         self.names[p], self.tables.names[cell_to_transfer], self.payee_name(payee))
+
+    def pay_money(self, p, amount, payee):
+        """ Pay money to another player (player number) or "bank".
+        This is where Bankruptcy is triggered.
+        """
+        log = self.log
+        name = self.names[p]
+
+        if amount < self.money[p]:
+            self.money[p] -= amount
+            if payee != "bank":
+                self.money[payee] += amount
+            elif self.game_config.free_parking_money:
+                self.free_parking_money += amount
+            return
+
+        max_raisable_money = self.count_max_raisable_money(p)
+        if amount < max_raisable_money:
+            log.add("{} has ${}, he can pay ${}, but needs to mortgage/sell some things for that",
+                    name, self.money[p], amount)
+            self.raise_money(p, amount)
+            self.money[p] -= amount
+            if payee != "bank":
+                self.money[payee] += amount
+            elif self.game_config.free_parking_money:
+                self.free_parking_money += amount
+
+        else:
+            log.add("{} has to pay ${}, max they can raise is ${}", name, amount, max_raisable_money)
+            self.is_bankrupt[p] = True
+            log.add("{} is bankrupt", name)
+
+            self.raise_money(p, amount)
+            log.add("{} gave {} all their remaining money (${})", name, self.payee_name(payee), self.money[p])
+            if payee != "bank":
+                self.money[payee] += self.money[p]
+            elif self.game_config.free_parking_money:
+                self.free_parking_money += amount
+
+            self.money[p] = 0
+
+            self.transfer_all_properties(p, payee)
+
+            self.wants_to_sell[p] = set()
+            self.wants_to_buy[p] = set()
+            self.ownership_changes_seen[p] = -1
+            self.trade_lists_updates += 1
+
+    def update_lists_of_properties_to_trade(self, p):
+        """ Update list of properties player is willing to sell / buy
+        """
+        if not self.settings[p].is_willing_to_make_trades:
+            return
+        # Nobody's properties changed owners since the last update
+        if self.ownership_changes_seen[p] == self.ownership_changes:
+            return
+        self.ownership_changes_seen[p] = self.ownership_changes
+
+        wants_to_sell = set()
+        wants_to_buy = set()
+        owner = self.owner
+        for group_cells in self.tables.groups.values():
+            owned_by_me = []
+            owned_by_others = []
+            for cell in group_cells:
+                cell_owner = owner[cell]
+                if cell_owner is None:
+                    break
+                if cell_owner == p:
+                    owned_by_me.append(cell)
+                else:
+                    owned_by_others.append(cell)
+            # If there are properties to buy - no trades
+            else:
+                if len(owned_by_me) == 1:
+                    wants_to_sell.add(owned_by_me[0])
+                if len(owned_by_others) == 1:
+                    wants_to_buy.add(owned_by_others[0])
+        self.wants_to_sell[p] = wants_to_sell
+        self.wants_to_buy[p] = wants_to_buy
+        self.trade_lists_updates += 1
+
+    def get_price_difference(self, gives, receives):
+        """ Price difference between items player gives and receives:
+        absolute (in $), relative for a giver, relative for a receiver
+        """
+        cost_gives = sum(self.tables.cost_base[cell] for cell in gives)
+        cost_receives = sum(self.tables.cost_base[cell] for cell in receives)
+
+        diff_abs = cost_gives - cost_receives
+
+        diff_giver, diff_receiver = float("inf"), float("inf")
+        if receives:
+            diff_giver = cost_gives / cost_receives
+        if gives:
+            diff_receiver = cost_receives / cost_gives
+
+        return diff_abs, diff_giver, diff_receiver
+
+    def fair_deal(self, p, player_gives, player_receives, other_player):
+        """ Remove properties from to_sell and to_buy to make it as fair as possible
+        """
+        group = self.tables.group
+        cost_base = self.tables.cost_base
+        color_receives = [group[cell] for cell in player_receives]
+        color_gives = [group[cell] for cell in player_gives]
+
+        both_colors = set(color_receives + color_gives)
+        if both_colors.issubset({UTILITIES, INDIGO, BROWN}):
+            return [], []
+
+        for questionable_color in [UTILITIES, INDIGO, BROWN]:
+            if questionable_color in color_receives and questionable_color in color_gives:
+                if len(player_receives) > len(player_gives):
+                    player_receives = [cell for cell in player_receives if group[cell] != questionable_color]
+                elif len(player_receives) < len(player_gives):
+                    player_gives = [cell for cell in player_gives if group[cell] != questionable_color]
+                else:
+                    player_receives = [cell for cell in player_receives if group[cell] != questionable_color]
+                    player_gives = [cell for cell in player_gives if group[cell] != questionable_color]
+
+        player_receives.sort(key=lambda cell: -cost_base[cell])
+        player_gives.sort(key=lambda cell: -cost_base[cell])
+
+        settings = self.settings[p]
+        other_settings = self.settings[other_player]
+        while player_gives and player_receives:
+            diff_abs, diff_giver, diff_receiver = self.get_price_difference(player_gives, player_receives)
+            if diff_abs > settings.trade_max_diff_absolute or \
+                    diff_giver > settings.trade_max_diff_relative:
+                player_gives.pop()
+                continue
+            if -diff_abs > other_settings.trade_max_diff_absolute or \
+                    diff_receiver > other_settings.trade_max_diff_relative:
+                player_receives.pop()
+                continue
+            break
+
+        return player_gives, player_receives
+
+    def find_trade(self, p):
+        """ Find the two-way trade the player would offer (see Player.find_trade):
+        (other player, properties to give, properties to receive), None if there is no such trade
+        """
+        wants_to_buy = self.wants_to_buy[p]
+        wants_to_sell = self.wants_to_sell[p]
+        # Nothing to buy or nothing to sell (most of the time)
+        if not wants_to_buy or not wants_to_sell:
+            return None
+        # No trade was found, and the lists did not change since
+        if self.no_trade_seen[p] == self.trade_lists_updates:
+            return None
+        for other_player in range(self.n_players):
+            if wants_to_buy.intersection(self.wants_to_sell[other_player]) and \
+                    wants_to_sell.intersection(self.wants_to_buy[other_player]):
+                player_receives = sorted(wants_to_buy.intersection(self.wants_to_sell[other_player]))
+                player_gives = sorted(wants_to_sell.intersection(self.wants_to_buy[other_player]))
+
+                player_gives, player_receives = self.fair_deal(p, player_gives, player_receives, other_player)
+
+                if player_receives and player_gives:
+                    return other_player, player_gives, player_receives
+
+        self.no_trade_seen[p] = self.trade_lists_updates
+        return None
+
+    def do_a_two_way_trade(self, p):
+        """ Look for and perform a two-way trade (see Player.do_a_two_way_trade)
+        """
+        trade = self.find_trade(p)
+        if trade is None:
+            return False
+        other_player, player_gives, player_receives = trade
+        log = self.log
+        names = self.names
+        price_difference, _, _ = self.get_price_difference(player_gives, player_receives)
+
+        if price_difference > 0:
+            if self.money[other_player] - price_difference < \
+                    self.settings[other_player].unspendable_cash:
+                return False
+            self.money[other_player] -= price_difference
+            self.money[p] += price_difference
+
+        if price_difference < 0:
+            if self.money[p] - abs(price_difference) < self.settings[p].unspendable_cash:
+                return False
+            self.money[other_player] += abs(price_difference)
+            self.money[p] -= abs(price_difference)
+
+        self.ownership_changes += 1
+        for cell_to_receive in player_receives:
+            self.owner[cell_to_receive] = p
+            self.owned[p].append(cell_to_receive)
+            self.owned[other_player].remove(cell_to_receive)
+        for cell_to_give in player_gives:
+            self.owner[cell_to_give] = other_player
+            self.owned[other_player].append(cell_to_give)
+            self.owned[p].remove(cell_to_give)
+
+        if not log.disabled:
+            log.add("Trade: {} gives {}, receives {} from {}", names[p],
+                    [self.tables.names[cell] for cell in player_gives],
+                    [self.tables.names[cell] for cell in player_receives], names[other_player])
+
+        if price_difference > 0:
+            log.add("{} received price difference compensation ${} from {}",
+                    names[p], abs(price_difference), names[other_player])
+        if price_difference < 0:
+            log.add("{} received price difference compensation ${} from {}",
+                    names[other_player], abs(price_difference), names[p])
+
+        self.recalculate_monopoly_multipliers(player_gives[0])
+        self.recalculate_monopoly_multipliers(player_receives[0])
+
+        for player in range(self.n_players):
+            self.update_lists_of_properties_to_trade(player)
+
+        return True
+
+
+# Handlers of Chance / Community Chest cards, by card action (see cards.py)
+COMPACT_CARD_HANDLERS = {
+    CARD_NOTHING: CompactGame.card_nothing,
+    CARD_MOVE: CompactGame.card_move,
+    CARD_GO: CompactGame.card_go,
+    CARD_BACK_3: CompactGame.card_back_3,
+    CARD_RAILROAD: CompactGame.card_railroad,
+    CARD_UTILITY: CompactGame.card_utility,
+    CARD_GOOJF: CompactGame.card_get_out_of_jail_free,
+    CARD_GO_TO_JAIL: CompactGame.card_go_to_jail,
+    CARD_GAIN: CompactGame.card_gain,
+    CARD_PAY: CompactGame.card_pay,
+    CARD_REPAIRS: CompactGame.card_repairs,
+    CARD_PAY_EACH: CompactGame.card_pay_each,
+    CARD_COLLECT_EACH: CompactGame.card_collect_each,
+}
+
+
+# Handlers of the cell a player lands on, by cell kind (see CELL_KINDS)
+COMPACT_CELL_HANDLERS = {
+    CELL_CHANCE: CompactGame.handle_chance,
+    CELL_CHEST: CompactGame.handle_community_chest,
+    CELL_PROPERTY: CompactGame.handle_landing_on_property,
+    CELL_GO_TO_JAIL: CompactGame.handle_landing_on_go_to_jail,
+    CELL_FREE_PARKING: CompactGame.handle_free_parking,
+    CELL_LUXURY_TAX: CompactGame.handle_luxury_tax,
+    CELL_INCOME_TAX: CompactGame.handle_income_tax,
+}
+
+
+def compact_monopoly_game(game_number_and_seeds: Tuple[int, int], game_config: GameConfig = None,
+                          block_log: Log = None, stats_log: StatsLog = None) -> GameResult:
+    """ Simulation of one game on the compact game state.
+    Same parameters, logs and results as monopoly_game
+    """
+    game_number, game_seed = game_number_and_seeds
+    if game_config is None:
+        game_config = GameConfig()
+
+    events_log = block_log
+    if events_log is None:
+        events_log = LogSettings.new_events_log()
+    events_log.add("= GAME {} of {} (seed = {}) =", game_number, game_config.n_games, game_seed)
+
+    game = CompactGame(game_seed, events_log, game_config)
+
+    bankruptcies = []
+    game_end, turns_played = game.play_turns(game_number, bankruptcies, stats_log)
+
+    if not events_log.disabled:
+        game.log_current_map()
+    if block_log is None:
+        events_log.save()
+
+    return GameResult(game_number, tuple(bankruptcies), game_end, turns_played,
+                      {game.names[p]: game.net_worth(p) for p in range(game.n_players)},
+                      {game.names[p]: int(game.money[p]) for p in range(game.n_players)},
+                      {game.names[p]: game.count_monopolies(p) for p in range(game.n_players)})
+
+
+def compact_monopoly_games(game_seed_pairs: List[Tuple[int, int]], game_config: GameConfig = None,
+                           block_log: Log = None, stats_log: StatsLog = None) -> Iterator[GameResult]:
+    """ Play games one after another (see monopoly_games), the compact state is small enough to create it anew
+    """
+    for game_number_and_seeds in game_seed_pairs:
+        yield compact_monopoly_game(game_number_and_seeds, game_config, block_log, stats_log)
@@ -1,10 +1,25 @@
+from monopoly.core.cards import CARD_GOOJF
+
+
 class Deck:
     """ Parent for Community Chest and Chance cards
     """
 
-    def __init__(self, cards):
-        # List of cards
-        self.cards = cards
+    def __init__(self, name, all_cards):
+        # Name of the deck (for the log)
+        self.name = name
+        # All cards of the deck (see cards.py)
+        self.all_cards = all_cards
+        # The "Get Out of Jail Free" card (None if the deck has none)
+        self.get_out_of_jail_free = next(
+            (card_id for card_id, card in enumerate(all_cards) if card.action == CARD_GOOJF), None)
+        self.reset()
+
+    def reset(self):
+        """ Put all cards back, in their original order (not shuffled)
+        """
+        # List of cards, as their numbers in all_cards
+        self.cards = list(range(len(self.all_cards)))
         # Pointer to the next card to draw
         self.pointer = 0
 
@@ -12,6 +27,7 @@ class Deck:
         """ Draw one card from the deck and put it underneath.
         Actually, we don't manipulate cards, just shuffle them once
         and then move the pointer through the deck.
+        Returns the card's number in all_cards
         """
         drawn_card = self.cards[self.pointer]
         self.pointer += 1
@@ -5,12 +5,43 @@ that can:
 """
 
 import random
+from functools import lru_cache
+from itertools import product
+from typing import NamedTuple, Tuple
+
+import numpy as np
 
 
 def is_dice_are_double(cast):
     return len(set(cast)) == 1
 
 
+class RollOutcomes(NamedTuple):
+    """ Probabilities of dice rolls by the score (index is the score, from 0 to dice_count * dice_sides)
+    """
+    sum_probabilities: Tuple[float, ...]  # Probability of the score
+    double_probabilities: Tuple[float, ...]  # Probability of a double with the score
+
+
+@lru_cache(maxsize=None)
+def roll_outcomes(dice_count, dice_sides) -> RollOutcomes:
+    """ Probabilities of the scores and doubles of a roll, counting all casts
+    """
+    sum_counts = [0] * (dice_count * dice_sides + 1)
+    double_counts = [0] * (dice_count * dice_sides + 1)
+    for cast in product(range(1, dice_sides + 1), repeat=dice_count):
+        sum_counts[sum(cast)] += 1
+        if is_dice_are_double(cast):
+            double_counts[sum(cast)] += 1
+    n_casts = dice_sides ** dice_count
+    return RollOutcomes(tuple(count / n_casts for count in sum_counts),
+                        tuple(count / n_casts for count in double_counts))
+
+
+# Two six-sided dice (the default game)
+ROLL_OUTCOMES_2D6 = roll_outcomes(2, 6)
+
+
 class Dice:
     """ Class to have dice settings, in case we want to play with that """
     def __init__(self, seed, dice_count, dice_sides, log):
@@ -26,11 +57,53 @@ class Dice:
     def roll(self):
         """ Cast dice and return: return raw cast, the score, is it a double """
         cast = [self.local_random.randint(1, self.dice_sides) for _ in range(self.dice_count)]
-        self.log.add(f"roll: {sum(cast)}, ({cast}{',double' if is_dice_are_double(cast) else ''})")
-        
+        dice_sum = sum(cast)
         # if values are the same (double in case of 2 dice)
-        return cast, sum(cast), is_dice_are_double(cast)
+        is_double = is_dice_are_double(cast)
+        self.log.add("roll: {}, ({}{})", dice_sum, cast, ",double" if is_double else "")
+
+        return cast, dice_sum, is_double
 
     def shuffle(self, object_to_shuffle):
         """ Copy of random.shuffle, but with local random generator (thread safe) """
         self.local_random.shuffle(object_to_shuffle)
+
+
+class PrerolledDice(Dice):
+    """ Dice that roll in advance, a block of rolls at a time (with NumPy), and hand them out one by one.
+    Faster than Dice, but the rolls are different: for a seed, the rolls are
+    numpy.random.Generator(numpy.random.PCG64(seed)).integers(1, dice_sides + 1, size=(n, dice_count)),
+    the same for any block size. Decks are shuffled as in Dice, with random.Random(seed).
+    """
+    def __init__(self, seed, dice_count, dice_sides, log, block_size):
+        super().__init__(seed, dice_count, dice_sides, log)
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.block_size = block_size
+        # Rolls of the current block: (cast, the score, is it a double), and the next one to hand out
+        self.rolls = []
+        self.next_roll = 0
+
+    def roll_block(self):
+        """ Roll the next block of rolls """
+        casts = self.generator.integers(1, self.dice_sides + 1, size=(self.block_size, self.dice_count))
+        dice_sums = casts.sum(axis=1)
+        is_doubles = (casts == casts[:, :1]).all(axis=1)
+        self.rolls = list(zip(casts.tolist(), dice_sums.tolist(), is_doubles.tolist()))
+        self.next_roll = 0
+
+    def roll(self):
+        """ Hand out the next roll: return raw cast, the score, is it a double """
+        if self.next_roll == len(self.rolls):
+            self.roll_block()
+        cast, dice_sum, is_double = self.rolls[self.next_roll]
+        self.next_roll += 1
+        self.log.add("roll: {}, ({}{})", dice_sum, cast, ",double" if is_double else "")
+        return cast, dice_sum, is_double
+
+
+def create_dice(seed, game_config, log):
+    """ Dice for a game: PrerolledDice if game_config.dice_block_size is set, otherwise Dice
+    """
+    if game_config.dice_block_size:
+        return PrerolledDice(seed, game_config.dice_count, game_config.dice_sides, log, game_config.dice_block_size)
+    return Dice(seed, game_config.dice_count, game_config.dice_sides, log)
@@ -3,69 +3,141 @@
 2. Players
 3. Making moves by all players
 """
-from typing import Tuple
+from typing import Iterator, List, NamedTuple, Tuple
 
 from monopoly.core.move_result import MoveResult
 from monopoly.core.board import Board
-from monopoly.core.dice import Dice
-from monopoly.core.game_utils import assign_property, _check_end_conditions, log_players_and_board_state
+from monopoly.core.dice import create_dice
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import GameEnd, GameResult
+from monopoly.core.game_utils import assign_property, _check_end_conditions, log_players_and_board_state, \
+    count_monopolies, record_players_state
 from monopoly.core.player import Player
 from monopoly.log import Log
 from monopoly.log_settings import LogSettings
-from settings import SimulationSettings, GameSettings, GameMechanics
+from monopoly.stats_log import StatsLog
 
 
-def monopoly_game(game_number_and_seeds: Tuple[int,int]) -> None:
+class GamePieces(NamedTuple):
+    """ Board and players that are reused from game to game (reset before each game)
+    """
+    board: Board
+    players: List[Player]  # In the order of game_config.players_list
+
+
+def monopoly_game(game_number_and_seeds: Tuple[int,int], game_config: GameConfig = None,
+                  block_log: Log = None, pieces: GamePieces = None, stats_log: StatsLog = None) -> GameResult:
     """ Simulation of one game.
     For convenience to set up a multi-thread,
     parameters are packed into a tuple: (game_number, game_seed):
     - "game number" is here to print out in the game log
     - "game_seed" to initialize random generator for the game
+    game_config is the game's settings (GameConfig), by default taken from settings.py
+    block_log is the events log shared by a block of games (written by the caller),
+    by default the game writes its own log when it is over
+    pieces are the board and players to reset and play on, by default new ones are created
+    stats_log gets snapshots of players' state every stats_log.snapshot_interval turns (if provided)
+    Returns the game's result (bankruptcies, why the game ended etc.)
     """
     game_number, game_seed = game_number_and_seeds
-    board, dice, events_log, bankruptcies_log = setup_game(game_number, game_seed)
+    if game_config is None:
+        game_config = GameConfig()
+    board, dice, events_log = setup_game(game_number, game_seed, game_config, block_log,
+                                         pieces.board if pieces else None)
 
     # Set up players with their behavior settings, starting money and properties.
-    players = setup_players(board, dice)
+    players = setup_players(board, dice, game_config, pieces.players if pieces else None)
 
     # Play the game until:
     # 1. Win: Only 1 player did not bankrupt
     # 2. Several survivors: All non-bankrupt players have more cash than `never_bankrupt_cash`
     # 3. Turn limit reached
-    for turn_n in range(1, SimulationSettings.n_moves + 1):
-        events_log.add(f"\n== GAME {game_number} Turn {turn_n} ===")
-        log_players_and_board_state(board, events_log, players)
-        board.log_board_state(events_log)
-        events_log.add("")
+    bankruptcies = []
+    game_end, turns_played = play_turns(board, players, dice, events_log, game_config, game_number, bankruptcies,
+                                        stats_log)
 
-        if _check_end_conditions(players, events_log, game_number, turn_n):
-            break
+    # log the final game state
+    if not events_log.disabled:
+        board.log_current_map(events_log)
+    if block_log is None:
+        events_log.save()
+
+    return GameResult(game_number, tuple(bankruptcies), game_end, turns_played,
+                      {player.name: player.net_worth() for player in players},
+                      {player.name: int(player.money) for player in players},
+                      {player.name: count_monopolies(board, player) for player in players})
+
+
+def play_turns(board, players, dice, events_log, game_config, game_number, bankruptcies, stats_log=None,
+               first_turn=1, first_player=0) -> Tuple[GameEnd, int]:
+    """ Play the game until it is over, starting with the move of players[first_player] in first_turn
+    (by default, from the start of the game), adding bankruptcies [(player name, turn), ...] to the list.
+    Returns why the game ended and the number of turns played
+    """
+    snapshot_interval = stats_log.snapshot_interval if stats_log else 0
+    for turn_n in range(first_turn, game_config.n_moves + 1):
+        # Moves of the first turn start with first_player (a game can be resumed in the middle of a turn)
+        turn_players = players[first_player:] if turn_n == first_turn else players
+        if len(turn_players) == len(players):
+            # Per-turn state dump is the most expensive part of the log, skip it entirely if the log is off
+            if not events_log.disabled:
+                events_log.add("\n== GAME {} Turn {} ===", game_number, turn_n)
+                log_players_and_board_state(board, events_log, players)
+                board.log_board_state(events_log)
+                events_log.add("")
+
+            end_condition = _check_end_conditions(players, events_log, game_number, turn_n, game_config)
+            if end_condition:
+                return end_condition, turn_n - 1
 
         # Players make their moves
-        for player in players:
+        for player in turn_players:
             if player.is_bankrupt:
                 continue
             move_result = player.make_a_move(board, players, dice, events_log)
             if move_result == MoveResult.BANKRUPT:
-                bankruptcies_log.add(f"{game_number}\t{player}\t{turn_n}")
+                bankruptcies.append((player.name, turn_n))
+            if game_config.debug_checks:
+                for any_player in players:
+                    any_player.check_property_totals()
 
-    # log the final game state
-    board.log_current_map(events_log)
-    events_log.save()
-    if bankruptcies_log.content:
-        bankruptcies_log.save()
+        if snapshot_interval and turn_n % snapshot_interval == 0:
+            record_players_state(board, stats_log, players, game_number, turn_n)
+
+    return GameEnd.TURN_LIMIT, game_config.n_moves
 
 
-def setup_players(board, dice):
-    players = [Player(player_name, player_setting)
-               for player_name, player_setting in GameSettings.players_list]
+def monopoly_games(game_seed_pairs: List[Tuple[int, int]], game_config: GameConfig = None,
+                   block_log: Log = None, stats_log: StatsLog = None) -> Iterator[GameResult]:
+    """ Play games one after another (see monopoly_game) on the same board and players,
+    which are reset before each game instead of being created again
+    """
+    if game_config is None:
+        game_config = GameConfig()
+    pieces = GamePieces(Board(game_config), [Player(player_name, player_setting, game_config)
+                                             for player_name, player_setting in game_config.players_list])
+    for game_number_and_seeds in game_seed_pairs:
+        yield monopoly_game(game_number_and_seeds, game_config, block_log, pieces, stats_log)
+
+
+def setup_players(board, dice, game_config, players=None):
+    """ Players with their starting money and properties, in the order they make moves.
+    players are the ones to reset (in the order of game_config.players_list), by default new ones are created
+    """
+    if players is None:
+        players = [Player(player_name, player_setting, game_config)
+                   for player_name, player_setting in game_config.players_list]
+    else:
+        for player in players:
+            player.reset()
+        players = list(players)
 
-    if GameSettings.shuffle_players:
+    if game_config.shuffle_players:
         dice.shuffle(players)  # dice has a thread-safe copy of random.shuffle
 
     # Set up players starting money according to the game settings:
     # Supports either a dict (money per-player) or single value
-    starting_money = GameSettings.starting_money
+    starting_money = game_config.starting_money
     if isinstance(starting_money, dict):
         for player in players:
             player.money = starting_money.get(player.name, 0)
@@ -76,22 +148,24 @@ def setup_players(board, dice):
 
     # set up players' initial properties
     for player in players:
-        property_indices = GameSettings.starting_properties.get(player.name, [])
+        property_indices = game_config.starting_properties.get(player.name, [])
         for cell_index in property_indices:
             assign_property(player, board.cells[cell_index], board)
 
     return players
 
 
-def setup_game(game_number, game_seed):
-    events_log = Log(LogSettings.EVENTS_LOG_PATH, disabled=not LogSettings.KEEP_GAME_LOG)
-    events_log.add(f"= GAME {game_number} of {SimulationSettings.n_games} (seed = {game_seed}) =")
+def setup_game(game_number, game_seed, game_config, events_log=None, board=None):
+    if events_log is None:
+        events_log = LogSettings.new_events_log()
+    events_log.add("= GAME {} of {} (seed = {}) =", game_number, game_config.n_games, game_seed)
 
-    bankruptcies_log = Log(LogSettings.BANKRUPTCIES_PATH)
-
-    # Initialize the board (plots, chance, community chest etc.)
-    board = Board(GameSettings)
-    dice = Dice(game_seed, GameMechanics.dice_count, GameMechanics.dice_sides, events_log)
+    # Initialize the board (plots, chance, community chest etc.), or reset the one from the previous game
+    if board is None:
+        board = Board(game_config)
+    else:
+        board.reset()
+    dice = create_dice(game_seed, game_config, events_log)
     dice.shuffle(board.chance.cards)
     dice.shuffle(board.chest.cards)
-    return board, dice, events_log, bankruptcies_log
+    return board, dice, events_log
@@ -0,0 +1,109 @@
+""" Settings of one game, as one object that is passed to the board, players and game engines
+(instead of them reading the classes in settings.py), so games with different settings
+can be played side by side in the same process.
+"""
+from typing import Any, Dict, NamedTuple, Tuple
+
+from settings import SimulationSettings, GameSettings, GameMechanics, StandardPlayerSettings, HeroPlayerSettings
+
+# Settings classes that can be overridden: {"ClassName.attribute": value}
+OVERRIDABLE_SETTINGS = {settings_class.__name__: settings_class
+                        for settings_class in (GameMechanics, StandardPlayerSettings, HeroPlayerSettings)}
+
+
+def parse_overrides(overrides: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """ {"ClassName.attribute": value} -> {"ClassName": {"attribute": value}}, checking that both exist
+    """
+    parsed = {}
+    for key, value in overrides.items():
+        class_name, _, attribute = key.partition(".")
+        if class_name not in OVERRIDABLE_SETTINGS or not hasattr(OVERRIDABLE_SETTINGS[class_name], attribute):
+            raise ValueError(f"Unknown setting to override: {key} " +
+                             f"(expected ClassName.attribute with ClassName in {', '.join(OVERRIDABLE_SETTINGS)})")
+        parsed.setdefault(class_name, {})[attribute] = value
+    return parsed
+
+
+class PropertyPrices(NamedTuple):
+    """ Prices of a property, derived from its costs, rents and the game rules """
+    mortgage_price: int  # Cash the player gets for mortgaging the property
+    unmortgage_price: float  # Cash the player needs to unmortgage the property
+    mortgaged_worth: int  # Value of the mortgaged property for the net worth
+    house_sale_price: int  # Cash for selling one house (half of its cost)
+    houses_sale_value: Tuple[int, ...]  # Cash for selling all houses, by number of houses (0-4)
+    hotel_sale_value: int  # Cash for selling a hotel with all its houses
+    rents: Tuple[int, ...]  # Rent by improvement level: 0 - base rent, 1-4 houses, 5 hotel
+
+
+class GameConfig:
+    """ Game rules, players and their behavior, game length: everything a game needs from the settings,
+    taken from settings.py when the object is created, with optional overrides,
+    for example GameConfig({"GameMechanics.free_parking_money": True}).
+    """
+
+    def __init__(self, overrides: Dict[str, Any] = None, simulation_settings=SimulationSettings):
+        overrides = parse_overrides(overrides or {})
+        mechanics = overrides.get(GameMechanics.__name__, {})
+
+        def mechanics_value(attribute):
+            return mechanics.get(attribute, getattr(GameMechanics, attribute))
+
+        # Game rules (GameMechanics)
+        self.available_houses = mechanics_value("available_houses")
+        self.available_hotels = mechanics_value("available_hotels")
+        self.salary = mechanics_value("salary")
+        self.luxury_tax = mechanics_value("luxury_tax")
+        self.income_tax = mechanics_value("income_tax")
+        self.income_tax_percentage = mechanics_value("income_tax_percentage")
+        self.mortgage_value = mechanics_value("mortgage_value")
+        self.mortgage_fee = mechanics_value("mortgage_fee")
+        self.exit_jail_fine = mechanics_value("exit_jail_fine")
+        self.free_parking_money = mechanics_value("free_parking_money")
+        self.dice_count = mechanics_value("dice_count")
+        self.dice_sides = mechanics_value("dice_sides")
+
+        # Game length (SimulationSettings)
+        self.n_games = simulation_settings.n_games
+        self.n_moves = simulation_settings.n_moves
+        self.never_bankrupt_cash = simulation_settings.never_bankrupt_cash
+        self.debug_checks = simulation_settings.debug_checks
+        self.dice_block_size = simulation_settings.dice_block_size
+
+        # Players and their behavior settings (GameSettings)
+        self.players_list = [(player_name, self.override_player_settings(player_settings, overrides))
+                             for player_name, player_settings in GameSettings.players_list]
+        self.shuffle_players = GameSettings.shuffle_players
+        self.starting_money = GameSettings.starting_money
+        self.starting_properties = GameSettings.starting_properties
+
+        # Derived constants, used in the log
+        self.income_tax_percent = self.income_tax_percentage * 100
+        # Prices of properties {(cost_base, cost_house, rent_base, rent_house): PropertyPrices}
+        self._property_prices = {}
+
+    @staticmethod
+    def override_player_settings(player_settings, overrides):
+        """ Player's settings class with the overrides (of this class or any of its parents) applied.
+        Overrides of a child class take precedence over the parent's ones.
+        """
+        attributes = {}
+        for settings_class in reversed(player_settings.__mro__):
+            attributes.update(overrides.get(settings_class.__name__, {}))
+        if not attributes:
+            return player_settings
+        return type(player_settings.__name__, (player_settings,), attributes)
+
+    def property_prices(self, cost_base, cost_house, rent_base, rent_house) -> PropertyPrices:
+        """ Prices of a property (see PropertyPrices), calculated once per GameConfig
+        """
+        key = (cost_base, cost_house, rent_base, rent_house)
+        if key not in self._property_prices:
+            self._property_prices[key] = PropertyPrices(
+                mortgage_price=int(cost_base * self.mortgage_value),
+                unmortgage_price=cost_base * self.mortgage_value + cost_base * self.mortgage_fee,
+                mortgaged_worth=int(cost_base * (1 - self.mortgage_value)),
+                house_sale_price=cost_house // 2,
+                houses_sale_value=tuple(cost_house * houses // 2 for houses in range(5)),
+                hotel_sale_value=cost_house * 5 // 2,
+                rents=(rent_base,) + tuple(rent_house))
+        return self._property_prices[key]
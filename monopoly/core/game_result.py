@@ -0,0 +1,28 @@
+""" Result of one game: a compact record that game engines return to the simulation
+"""
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Dict, Tuple
+
+
+class GameEnd(Enum):
+    """ Why the game is over """
+    ONE_PLAYER_LEFT = auto()  # Fewer than 2 players remain
+    ALL_RICH = auto()  # All remaining players have more than never_bankrupt_cash
+    TURN_LIMIT = auto()  # All GameConfig.n_moves turns were played
+
+
+@dataclass(frozen=True)
+class GameResult:
+    game_number: int
+    # Bankrupt players, in the order they went bankrupt: ((player name, turn), ...)
+    bankruptcies: Tuple[Tuple[str, int], ...]
+    end: GameEnd
+    # Number of turns played
+    turns: int
+    # Players' net worth at the end of the game {player name: net worth}
+    net_worth: Dict[str, int]
+    # Players' cash at the end of the game {player name: cash}
+    cash: Dict[str, int]
+    # Number of street groups each player owns completely at the end of the game {player name: monopolies}
+    monopolies: Dict[str, int]
@@ -1,21 +1,24 @@
-from typing import List
+from typing import List, Optional
 
+from monopoly.core.constants import RAILROADS, UTILITIES
+from monopoly.core.game_result import GameEnd
 from monopoly.core.player import Player
 from monopoly.log import Log
-from settings import SimulationSettings
 
 
 def assign_property(player, property_to_assign, board):
     """ Assigns a property to a player and updates the board state and check if a multiplier needs to be updated."""
     property_to_assign.owner = player
     player.owned.append(property_to_assign)
+    player.count_property(property_to_assign)
+    board.record_ownership_change(property_to_assign)
     board.recalculate_monopoly_multipliers(property_to_assign)
     player.update_lists_of_properties_to_trade(board)
 
 
-def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n) -> bool:
+def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n, game_config) -> Optional[GameEnd]:
     """
-    Return True when:
+    Return the reason the game is over (None if it is not) when:
       1) fewer than 2 players remain, or
       2) all rich: all non-bankrupt players have > never_bankrupt_cash.
     Logs the reason before returning.
@@ -25,15 +28,16 @@ def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n)
 
     # 1) fewer than 2 players left
     if n_alive < 2:
-        log.add(f"Only {n_alive} alive player remains, game over")
-        return True
+        log.add("Only {} alive player remains, game over", n_alive)
+        return GameEnd.ONE_PLAYER_LEFT
 
     # 2) everyone is above the never_bankrupt_cash threshold
-    threshold = SimulationSettings.never_bankrupt_cash
+    threshold = game_config.never_bankrupt_cash
     if all(p.money > threshold for p in alive):
-        log.add(f"== All Rich ==: GAME {game_number}, Turn {turn_n}: all non-bankrupt players have more than {threshold}$, this game will never end")
-        return True
-    return False
+        log.add("== All Rich ==: GAME {}, Turn {}: all non-bankrupt players have more than {}$, " +
+                "this game will never end", game_number, turn_n, threshold)
+        return GameEnd.ALL_RICH
+    return None
 
 
 def log_players_and_board_state(board, log, players):
@@ -42,8 +46,21 @@ def log_players_and_board_state(board, log, players):
     for player_n, player in enumerate(players):
         if not player.is_bankrupt:
 
-            log.add(f"- {player.name}: " +
-                    f"${int(player.money)} (net ${player.net_worth()}), " +
-                    f"at position {player.position} ({board.cells[player.position].name})")
+            log.add("- {}: ${} (net ${}), at position {} ({})", player.name, int(player.money),
+                    player.net_worth(), player.position, board.cells[player.position].name)
         else:
-            log.add(f"- Player {player_n}, '{player.name}': Bankrupt")
+            log.add("- Player {}, '{}': Bankrupt", player_n, player.name)
+
+
+def count_monopolies(board, player) -> int:
+    """ Number of street groups (not railroads or utilities) the player owns completely """
+    return sum(cells[0].owner is player and all(cell.owner is player for cell in cells)
+               for group, cells in board.groups.items() if group not in (RAILROADS, UTILITIES))
+
+
+def record_players_state(board, stats_log, players, game_number, turn_n):
+    """ Snapshot of not bankrupt players' cash, net worth, position and properties for the statistics """
+    for player in players:
+        if not player.is_bankrupt:
+            stats_log.add_snapshot(game_number, turn_n, player.name, int(player.money), player.net_worth(),
+                                   player.position, len(player.owned), count_monopolies(board, player))
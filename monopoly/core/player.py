@@ -1,9 +1,13 @@
 """ Player Class
 """
-from monopoly.core.cell import GoToJail, LuxuryTax, IncomeTax, FreeParking, Chance, CommunityChest, Property
+import heapq
+
+from monopoly.core.cards import CARD_NOTHING, CARD_MOVE, CARD_GO, CARD_BACK_3, CARD_RAILROAD, CARD_UTILITY, \
+    CARD_GOOJF, CARD_GO_TO_JAIL, CARD_GAIN, CARD_PAY, CARD_REPAIRS, CARD_PAY_EACH, CARD_COLLECT_EACH
+from monopoly.core.cell import CELL_OTHER, CELL_CHANCE, CELL_CHEST, CELL_PROPERTY, CELL_GO_TO_JAIL, \
+    CELL_FREE_PARKING, CELL_LUXURY_TAX, CELL_INCOME_TAX
 from monopoly.core.constants import INDIGO, BROWN, RAILROADS, UTILITIES
 from monopoly.core.move_result import MoveResult
-from settings import GameMechanics
 
 
 class Player:
@@ -12,12 +16,20 @@ class Player:
     - actions to buy property of handle Chance cards etc.
     """
 
-    def __init__(self, name, settings):
+    def __init__(self, name, settings, game_config):
 
         # Player's name and behavioral settings
         self.name = name
         self.settings = settings
+        # Game rules (GameConfig)
+        self.game_config = game_config
+
+        self.reset()
 
+    def reset(self):
+        """ Put the player in their state at the start of a game (to play another game with the same Player):
+        no money (it is set up by the simulation), no properties, at Go
+        """
         # Player's money (will be set up by the simulation)
         self.money = 0
 
@@ -37,11 +49,26 @@ class Player:
 
         # Owned properties
         self.owned = []
-
-        # List of properties the player wants to sell / buy
-        # through trading with other players
-        self.wants_to_sell = set()
-        self.wants_to_buy = set()
+        # Running totals over owned properties (see count_property):
+        # their worth for the net worth, the same counting mortgaged as full value (for Income Tax)
+        # and the cash they can raise (for max raisable money)
+        self.property_worth = 0
+        self.property_worth_full = 0
+        self.property_raisable = 0
+
+        # Properties that can be improved (if the bank has houses / hotels left), see update_improvable_properties,
+        # and a heap of them: (cost of a house, order of acquiring, property), the cheapest first,
+        # with the latest heap entry of each property (older entries are skipped)
+        self.improvable = set()
+        self.improvable_heap = []
+        self.improvable_entries = {}
+
+        # Properties the player wants to sell / buy through trading with other players,
+        # by group: {group: (cell to sell, cell to buy)}, None for nothing
+        # (the board's trade index keeps them all, see TradeIndex)
+        self.trade_lists_by_group = {}
+        # Number of board.ownership_changes already taken into account in these lists
+        self.ownership_changes_seen = 0
 
         # Bankrupt (game ended for this player)
         self.is_bankrupt = False
@@ -58,36 +85,77 @@ class Player:
         - True: count as full, for Income Tax calculation
         - False: count partially, for net worth statistics
         """
-        net_worth = int(self.money)
+        if count_mortgaged_as_full_value:
+            return int(self.money) + self.property_worth_full
+        return int(self.money) + self.property_worth
+
+    def count_property(self, cell, sign=1):
+        """ Add (sign=1) or remove (sign=-1) the property to/from the player's running totals.
+        Every change of ownership, improvements or mortgage of a property goes like this:
+        count_property(cell, -1), change the cell, count_property(cell)
+        """
+        worth_full = cell.cost_base + (cell.has_houses + cell.has_hotel) * cell.cost_house
+        raisable = 0
+        if cell.has_houses > 0:
+            raisable += cell.houses_sale_value[cell.has_houses]
+        if cell.has_hotel > 0:
+            raisable += cell.hotel_sale_value
+
+        self.property_worth_full += sign * worth_full
+        # Partially count mortgaged properties
+        if cell.is_mortgaged:
+            self.property_worth += sign * cell.mortgaged_worth
+        else:
+            self.property_worth += sign * worth_full
+            raisable += cell.mortgage_price
+        self.property_raisable += sign * raisable
 
+    def check_property_totals(self):
+        """ Debug check: compare running totals with the ones counted from scratch
+        """
+        property_worth, property_worth_full, property_raisable = 0, 0, 0
         for cell in self.owned:
-
-            if cell.is_mortgaged and not count_mortgaged_as_full_value:
-                # Partially count mortgaged properties
-                net_worth += int(cell.cost_base * (1 - GameMechanics.mortgage_value))
-            else:
-                net_worth += cell.cost_base
-                net_worth += (cell.has_houses + cell.has_hotel) * cell.cost_house
-
-        return net_worth
+            worth_full = cell.cost_base + (cell.has_houses + cell.has_hotel) * cell.cost_house
+            property_worth_full += worth_full
+            property_worth += cell.mortgaged_worth if cell.is_mortgaged else worth_full
+            if cell.has_houses > 0:
+                property_raisable += cell.houses_sale_value[cell.has_houses]
+            if cell.has_hotel > 0:
+                property_raisable += cell.hotel_sale_value
+            if not cell.is_mortgaged:
+                property_raisable += cell.mortgage_price
+        totals = (self.property_worth, self.property_worth_full, self.property_raisable)
+        assert totals == (property_worth, property_worth_full, property_raisable), \
+            f"{self.name}: running totals (worth, full worth, raisable) {totals} != " + \
+            f"{(property_worth, property_worth_full, property_raisable)}"
 
     def make_a_move(self, board, players, dice, log) -> MoveResult:
-        """ Main function for a player to make a move
+        """ Main function for a player to make a move: roll the dice and move,
+        again and again while rolling doubles (see roll_and_move)
         Receives:
         - the game state: board, cells, players' state
         - other players (in case we need to make transactions with them)
         - dice (to roll)
         - log handle
         Returns:
-            MoveResult: CONTINUE, BANKRUPT, END_MOVE
+            MoveResult: BANKRUPT, END_MOVE
+        """
+        move_result = MoveResult.CONTINUE
+        while move_result == MoveResult.CONTINUE:
+            move_result = self.roll_and_move(board, players, dice, log)
+        return move_result
+
+    def roll_and_move(self, board, players, dice, log) -> MoveResult:
+        """ One roll of the dice (a part of the move): trade, unmortgage and improve, roll and move
+        Returns:
+            MoveResult: CONTINUE (rolled a double, goes again), BANKRUPT, END_MOVE
         """
 
         # If the player bankrupt - do nothing
         if self.is_bankrupt:
             return MoveResult.BANKRUPT  # check if this is needed or this will writes bankrupt twice
 
-        log.add(f"=== {self.name} (${self.money}, " +
-                f"at {board.cells[self.position].name}) goes: ===")
+        log.add("=== {} (${}, at {}) goes: ===", self.name, self.money, board.cells[self.position].name)
 
         # Before the throwing of the dice:
         # 1. Trade with other players. Keep trading until no trades are possible
@@ -120,49 +188,19 @@ class Player:
             self.handle_salary(board, log)
         # Get the correct position if we passed GO
         self.position %= 40
-        log.add(f"{self.name} goes to: {board.cells[self.position].name}")
-
-        # Handle special cells:
-
-        # Both Chance and Community Chest are processed first, as they may send the player to a property
-        # Chance is before "Community Chest" as Chance can send to Community Chest
-
-        # Player lands on "Chance"
-        if isinstance(board.cells[self.position], Chance):
-            if self.handle_chance(board, players, log) == MoveResult.END_MOVE:
-                return MoveResult.END_MOVE
-
-        # Player lands on "Community Chest"
-        if isinstance(board.cells[self.position], CommunityChest):
-            if self.handle_community_chest(board, players, log) == MoveResult.END_MOVE:
+        log.add("{} goes to: {}", self.name, board.cells[self.position].name)
+
+        # Handle the cell the player landed on.
+        # A card can move the player to another cell: it is handled too
+        # if it is of a later kind (as cells are handled in the order of their kinds, see CELL_KINDS)
+        kind = board.cell_kinds[self.position]
+        while kind != CELL_OTHER:
+            if CELL_HANDLERS[kind](self, board, players, dice, log) == MoveResult.END_MOVE:
                 return MoveResult.END_MOVE
-
-        # Player lands on a property
-        if isinstance(board.cells[self.position], Property):
-            self.handle_landing_on_property(board, players, dice, log)
-
-        # Player lands on "Go To Jail"
-        if isinstance(board.cells[self.position], GoToJail):
-            self.handle_going_to_jail("landed on Go To Jail", log)
-            return MoveResult.END_MOVE
-
-        # Player lands on "Free Parking"
-        if isinstance(board.cells[self.position], FreeParking):
-            # If Free Parking Money house rule is on: get the money
-            if GameMechanics.free_parking_money:
-                log.add(f"{self} gets ${board.free_parking_money} from Free Parking")
-                self.money += board.free_parking_money
-                board.free_parking_money = 0
-
-        # Player lands on "Luxury Tax"
-        if isinstance(board.cells[self.position], LuxuryTax):
-            self.pay_money(GameMechanics.luxury_tax, "bank", board, log)
-            if not self.is_bankrupt:
-                log.add(f"{self} pays Luxury Tax ${GameMechanics.luxury_tax}")
-
-        # Player lands on "Income Tax"
-        if isinstance(board.cells[self.position], IncomeTax):
-            self.handle_income_tax(board, log)
+            landed_kind = board.cell_kinds[self.position]
+            if landed_kind <= kind:
+                break
+            kind = landed_kind
 
         # Reset the other_notes flag
         self.other_notes = ""
@@ -173,22 +211,42 @@ class Player:
 
         if is_double:
             self.had_doubles += 1
-            log.add(f"{self} rolled a double ({self.had_doubles} in a row) so they go again.")
-            move_result_of_double_move = self.make_a_move(board, players, dice, log)
-            return move_result_of_double_move
+            log.add("{} rolled a double ({} in a row) so they go again.", self, self.had_doubles)
+            return MoveResult.CONTINUE
         # not a double: Reset doubles count
         self.had_doubles = 0
         return MoveResult.END_MOVE
 
+    def handle_landing_on_go_to_jail(self, log):
+        """ Go to jail, the move is over
+        """
+        self.handle_going_to_jail("landed on Go To Jail", log)
+        return MoveResult.END_MOVE
+
+    def handle_free_parking(self, board, log):
+        """ If Free Parking Money house rule is on: get the money
+        """
+        if self.game_config.free_parking_money:
+            log.add("{} gets ${} from Free Parking", self, board.free_parking_money)
+            self.money += board.free_parking_money
+            board.free_parking_money = 0
+
+    def handle_luxury_tax(self, board, log):
+        """ Pay Luxury Tax
+        """
+        self.pay_money(self.game_config.luxury_tax, "bank", board, log)
+        if not self.is_bankrupt:
+            log.add("{} pays Luxury Tax ${}", self, self.game_config.luxury_tax)
+
     def handle_salary(self, board, log):
         """ Adding Salary to the player's money, according to the game's settings """
-        self.money += board.settings.mechanics.salary
-        log.add(f" {self.name} receives salary ${board.settings.mechanics.salary}")
+        self.money += self.game_config.salary
+        log.add(" {} receives salary ${}", self.name, self.game_config.salary)
 
     def handle_going_to_jail(self, message, log):
         """ Start the jail time
         """
-        log.add(f"{self} {message}, and goes to Jail.")
+        log.add("{} {}, and goes to Jail.", self, message)
         self.position = 10
         self.in_jail = True
         self.had_doubles = 0
@@ -200,249 +258,162 @@ class Player:
         """
         # Get out of jail on rolling double
         if self.get_out_of_jail_chance or self.get_out_of_jail_comm_chest:
-            log.add(f"{self} uses a GOOJF card")
+            log.add("{} uses a GOOJF card", self)
             self.in_jail = False
             self.days_in_jail = 0
             # Return the card to the deck
             if self.get_out_of_jail_chance:
-                board.chance.add("Get Out of Jail Free")
+                board.chance.add(board.chance.get_out_of_jail_free)
                 self.get_out_of_jail_chance = False
             else:
-                board.chest.add("Get Out of Jail Free")
+                board.chest.add(board.chest.get_out_of_jail_free)
                 self.get_out_of_jail_comm_chest = False
 
         # Get out of jail on rolling double
         elif dice_roll_is_double:
-            log.add(f"{self} rolled a double, a leaves jail for free")
+            log.add("{} rolled a double, a leaves jail for free", self)
             self.in_jail = False
             self.days_in_jail = 0
         # Get out of jail and pay a fine
         elif self.days_in_jail == 2:  # It's your third day
-            log.add(f"{self} did not rolled a double for the third time, " +
-                    f"pays {GameMechanics.exit_jail_fine} and leaves jail")
-            self.pay_money(GameMechanics.exit_jail_fine, "bank", board, log)
+            log.add("{} did not rolled a double for the third time, pays {} and leaves jail",
+                    self, self.game_config.exit_jail_fine)
+            self.pay_money(self.game_config.exit_jail_fine, "bank", board, log)
             self.in_jail = False
             self.days_in_jail = 0
         # Stay in jail for another turn
         else:
-            log.add(f"{self} stays in jail")
+            log.add("{} stays in jail", self)
             self.days_in_jail += 1
             return True
         return False
 
     def handle_chance(self, board, players, log):
         """ Draw and act on a Chance card
-        Return True if the move should be over (go to jail)
+        Return MoveResult.END_MOVE if the move should be over (go to jail)
         """
-        card = board.chance.draw()
-        log.add(f"{self} drew Chance card: '{card}'")
-
-        # Cards that send you to a certain location on board
-
-        if card == "Advance to Boardwalk":
-            log.add(f"{self} goes to {board.cells[39]}")
-            self.position = 39
-
-        elif card == "Advance to Go (Collect $200)":
-            log.add(f"{self} goes to {board.cells[0]}")
-            self.position = 0
-            self.handle_salary(board, log)
-
-        elif card == "Advance to Illinois Avenue. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[24]}")
-            if self.position > 24:
-                self.handle_salary(board, log)
-            self.position = 24
-
-        elif card == "Advance to St. Charles Place. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[11]}")
-            if self.position > 11:
-                self.handle_salary(board, log)
-            self.position = 11
-
-        elif card == "Take a trip to Reading Railroad. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[5]}")
-            if self.position > 5:
-                self.handle_salary(board, log)
-            self.position = 5
-
-        # Going backwards
-
-        elif card == "Go Back 3 Spaces":
-            self.position -= 3
-            log.add(f"{self} goes to {board.cells[self.position]}")
-
-        # Sends to a type of location, and affects the rent amount
-
-        elif card == "Advance to the nearest Railroad. " + \
-                "If owned, pay owner twice the rental to which they are otherwise entitled":
-            nearest_railroad = self.position
-            while (nearest_railroad - 5) % 10 != 0:
-                nearest_railroad += 1
-                nearest_railroad %= 40
-            log.add(f"{self} goes to {board.cells[nearest_railroad]}")
-            if self.position > nearest_railroad:
-                self.handle_salary(board, log)
-            self.position = nearest_railroad
-            self.other_notes = "double rent"
-
-        elif card == "Advance token to nearest Utility. " + \
-                "If owned, throw dice and pay owner a total ten times amount thrown.":
-            nearest_utility = self.position
-            while nearest_utility not in (12, 28):
-                nearest_utility += 1
-                nearest_utility %= 40
-            log.add(f"{self} goes to {board.cells[nearest_utility]}")
-            if self.position > nearest_utility:
-                self.handle_salary(board, log)
-            self.position = nearest_utility
-            self.other_notes = "10 times dice"
-
-        # Jail related (go to jail or GOOJF card)
-
-        elif card == "Get Out of Jail Free":
-            log.add(f"{self} now has a 'Get Out of Jail Free' card")
-            self.get_out_of_jail_chance = True
-            # Remove the card from the deck
-            board.chance.remove("Get Out of Jail Free")
-
-        elif card == "Go to Jail. Go directly to Jail, do not pass Go, do not collect $200":
-            self.handle_going_to_jail("got GTJ Chance card", log)
-            return MoveResult.END_MOVE
-
-        # Receiving money
-
-        elif card == "Bank pays you dividend of $50":
-            log.add(f"{self} gets $50")
-            self.money += 50
-
-        elif card == "Your building loan matures. Collect $150":
-            log.add(f"{self} gets $150")
-            self.money += 150
-
-        # Paying money (+ depending on property + to other players)
-
-        elif card == "Speeding fine $15":
-            self.pay_money(15, "bank", board, log)
-
-        elif card == "Make general repairs on all your property. For each house pay $25. " + \
-                "For each hotel pay $100":
-            repair_cost = sum(cell.has_houses * 25 + cell.has_hotel * 100 for cell in self.owned)
-            log.add(f"Repair cost: ${repair_cost}")
-            self.pay_money(repair_cost, "bank", board, log)
-
-        elif card == "You have been elected Chairman of the Board. Pay each player $50":
-            for other_player in players:
-                if other_player != self and not other_player.is_bankrupt:
-                    self.pay_money(50, other_player, board, log)
-                    if not self.is_bankrupt:
-                        log.add(f"{self} pays {other_player} $50")
-
-        return ""
+        return self.handle_card(board.chance, board, players, log)
 
     def handle_community_chest(self, board, players, log):
         """ Draw and act on a Community Chest card
-        Return True if the move should be over (go to jail)
+        Return MoveResult.END_MOVE if the move should be over (go to jail)
         """
+        return self.handle_card(board.chest, board, players, log)
 
-        card = board.chest.draw()
-        log.add(f"{self} drew Community Chest card: '{card}'")
+    def handle_card(self, deck, board, players, log):
+        """ Draw a card from the deck and act on it (with the handler of the card's action)
+        """
+        card = deck.all_cards[deck.draw()]
+        log.add("{} drew {} card: '{}'", self, deck.name, card.text)
+        return CARD_HANDLERS[card.action](self, card, deck, board, players, log)
 
-        # Moving to Go
+    # Card handlers, by card action (see cards.py and CARD_HANDLERS)
 
-        if card == "Advance to Go (Collect $200)":
-            log.add(f"{self} goes to {board.cells[0]}")
-            self.position = 0
-            self.handle_salary(board, log)
+    def card_nothing(self, card, deck, board, players, log):
+        """ A card without an action """
 
-        # Jail related
+    def card_move(self, card, deck, board, players, log):
+        """ Advance to a cell, collect salary if passing Go """
+        self.advance_to(card.amount, board, log)
 
-        elif card == "Get Out of Jail Free":
-            log.add(f"{self} now has a 'Get Out of Jail Free' card")
+    def card_go(self, card, deck, board, players, log):
+        """ Advance to Go and collect salary """
+        log.add("{} goes to {}", self, board.cells[0])
+        self.position = 0
+        self.handle_salary(board, log)
+
+    def card_back_3(self, card, deck, board, players, log):
+        """ Go back 3 spaces """
+        self.position -= 3
+        log.add("{} goes to {}", self, board.cells[self.position])
+
+    def card_railroad(self, card, deck, board, players, log):
+        """ Advance to the nearest railroad, the rent there is doubled """
+        nearest_railroad = self.position
+        while (nearest_railroad - 5) % 10 != 0:
+            nearest_railroad += 1
+            nearest_railroad %= 40
+        self.advance_to(nearest_railroad, board, log)
+        self.other_notes = "double rent"
+
+    def card_utility(self, card, deck, board, players, log):
+        """ Advance to the nearest utility, the rent there is 10 times dice """
+        nearest_utility = self.position
+        while nearest_utility not in (12, 28):
+            nearest_utility += 1
+            nearest_utility %= 40
+        self.advance_to(nearest_utility, board, log)
+        self.other_notes = "10 times dice"
+
+    def card_get_out_of_jail_free(self, card, deck, board, players, log):
+        """ Keep the card (it leaves the deck until used) """
+        log.add("{} now has a 'Get Out of Jail Free' card", self)
+        if deck is board.chance:
+            self.get_out_of_jail_chance = True
+        else:
             self.get_out_of_jail_comm_chest = True
-            # Remove the card from the deck
-            board.chest.remove("Get Out of Jail Free")
-
-        elif card == "Go to Jail. Go directly to Jail, do not pass Go, do not collect $200":
-            self.handle_going_to_jail("got GTJ Community Chest card", log)
-            return MoveResult.END_MOVE
-
-        # Paying money
-
-        elif card == "Doctor's fee. Pay $50":
-            self.pay_money(50, "bank", board, log)
-
-        elif card == "Pay hospital fees of $100":
-            self.pay_money(100, "bank", board, log)
-
-        elif card == "Pay school fees of $50":
-            self.pay_money(50, "bank", board, log)
+        # Remove the card from the deck
+        deck.remove(deck.get_out_of_jail_free)
 
-        elif card == "You are assessed for street repair. $40 per house. $115 per hotel":
-            repair_cost = sum(cell.has_houses * 40 + cell.has_hotel * 115 for cell in self.owned)
-            log.add(f"Repair cost: ${repair_cost}")
-            self.pay_money(repair_cost, "bank", board, log)
-
-        # Receive money
-
-        elif card == "Bank error in your favor. Collect $200":
-            log.add(f"{self} gets $200")
-            self.money += 200
-
-        elif card == "From sale of stock you get $50":
-            log.add(f"{self} gets $50")
-            self.money += 50
-
-        elif card == "Holiday fund matures. Receive $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
-
-        elif card == "Income tax refund. Collect $20":
-            log.add(f"{self} gets $20")
-            self.money += 20
-
-        elif card == "Life insurance matures. Collect $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
+    def card_go_to_jail(self, card, deck, board, players, log):
+        """ Go to jail, the move is over """
+        self.handle_going_to_jail(f"got GTJ {deck.name} card", log)
+        return MoveResult.END_MOVE
 
-        elif card == "Receive $25 consultancy fee":
-            log.add(f"{self} gets $25")
-            self.money += 25
+    def card_gain(self, card, deck, board, players, log):
+        """ Receive money from the bank """
+        log.add("{} gets ${}", self, card.amount)
+        self.money += card.amount
 
-        elif card == "You have won second prize in a beauty contest. Collect $10":
-            log.add(f"{self} gets $10")
-            self.money += 10
+    def card_pay(self, card, deck, board, players, log):
+        """ Pay money to the bank """
+        self.pay_money(card.amount, "bank", board, log)
 
-        elif card == "You inherit $100""You inherit $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
+    def card_repairs(self, card, deck, board, players, log):
+        """ Pay for each house and each hotel """
+        repair_cost = sum(cell.has_houses * card.amount + cell.has_hotel * card.amount_hotel for cell in self.owned)
+        log.add("Repair cost: ${}", repair_cost)
+        self.pay_money(repair_cost, "bank", board, log)
 
-        # Receiving money from other players
+    def card_pay_each(self, card, deck, board, players, log):
+        """ Pay each (not bankrupt) player """
+        for other_player in players:
+            if other_player != self and not other_player.is_bankrupt:
+                self.pay_money(card.amount, other_player, board, log)
+                if not self.is_bankrupt:
+                    log.add("{} pays {} ${}", self, other_player, card.amount)
 
-        elif card == "It is your birthday. Collect $10 from every player":
-            for other_player in players:
-                if other_player != self and not other_player.is_bankrupt:
-                    other_player.pay_money(50, self, board, log)
-                    if not other_player.is_bankrupt:
-                        log.add(f"{other_player} pays {self} $10")
+    def card_collect_each(self, card, deck, board, players, log):
+        """ Collect from each (not bankrupt) player """
+        for other_player in players:
+            if other_player != self and not other_player.is_bankrupt:
+                other_player.pay_money(card.amount, self, board, log)
+                if not other_player.is_bankrupt:
+                    log.add("{} pays {} ${}", other_player, self, card.amount)
 
-        return ""
+    def advance_to(self, target, board, log):
+        """ Move the player to the target cell (a card), collect salary if passing Go
+        """
+        log.add("{} goes to {}", self, board.cells[target])
+        if self.position > target:
+            self.handle_salary(board, log)
+        self.position = target
 
     def handle_income_tax(self, board, log):
         """ Handle Income tax: choose which option
         (fix or %) is less money and go with it
         """
         # Choose smaller between fixed rate and percentage
+        game_config = self.game_config
         tax_to_pay = min(
-            GameMechanics.income_tax,
-            int(GameMechanics.income_tax_percentage *
+            game_config.income_tax,
+            int(game_config.income_tax_percentage *
                 self.net_worth(count_mortgaged_as_full_value=True)))
 
-        if tax_to_pay == GameMechanics.income_tax:
-            log.add(f"{self} pays fixed Income tax {GameMechanics.income_tax}")
+        if tax_to_pay == game_config.income_tax:
+            log.add("{} pays fixed Income tax {}", self, game_config.income_tax)
         else:
-            log.add(f"{self} pays {GameMechanics.income_tax_percentage * 100:.0f}% " +
-                    f"Income tax {tax_to_pay}")
+            log.add("{} pays {:.0f}% Income tax {}", self, game_config.income_tax_percent, tax_to_pay)
         self.pay_money(tax_to_pay, "bank", board, log)
 
     def handle_landing_on_property(self, board, players, dice, log):
@@ -469,13 +440,6 @@ class Player:
             # Nothing stops the player from making a purchase
             return True
 
-        def buy_property(property_to_buy):
-            """ Player buys the property
-            """
-            property_to_buy.owner = self
-            self.owned.append(property_to_buy)
-            self.money -= property_to_buy.cost_base
-
         # This is the property a player landed on
         landed_property = board.cells[self.position]
 
@@ -484,21 +448,9 @@ class Player:
 
             # Does the player want to buy it?
             if is_willing_to_buy_property(landed_property):
-                # Buy property
-                buy_property(landed_property)
-                log.add(f"{self.name} bought {landed_property} " +
-                        f"for ${landed_property.cost_base}")
-
-                # Recalculate all monopolies / can build flags
-                board.recalculate_monopoly_multipliers(landed_property)
-
-                # Recalculate who wants to buy what
-                # (for all players, it may affect their decisions too)
-                for player in players:
-                    player.update_lists_of_properties_to_trade(board)
-
+                self.buy_property(landed_property, board, players, log)
             else:
-                log.add(f"{self.name} landed on a {landed_property}, he refuses to buy it")
+                log.add("{} landed on a {}, he refuses to buy it", self.name, landed_property)
                 # TODO: Bank auctions the property
 
         # Property has an owner
@@ -511,20 +463,37 @@ class Player:
                 log.add("Own property, no rent")
             # Handle rent payments
             else:
-                log.add(f"{self.name} landed on a property, " +
-                        f"owned by {landed_property.owner}")
+                log.add("{} landed on a property, owned by {}", self.name, landed_property.owner)
                 rent_amount = landed_property.calculate_rent(dice)
                 if self.other_notes == "double rent":
                     rent_amount *= 2
-                    log.add(f"Per Chance card, rent is doubled (${rent_amount}).")
+                    log.add("Per Chance card, rent is doubled (${}).", rent_amount)
                 if self.other_notes == "10 times dice":
                     # Divide by monopoly_coef to restore the dice throw
                     # Multiply that by 10
                     rent_amount = rent_amount // landed_property.monopoly_multiplier * 10
-                    log.add(f"Per Chance card, rent is 10x dice throw (${rent_amount}).")
+                    log.add("Per Chance card, rent is 10x dice throw (${}).", rent_amount)
                 self.pay_money(rent_amount, landed_property.owner, board, log)
                 if not self.is_bankrupt:
-                    log.add(f"{self} pays {landed_property.owner} rent ${rent_amount}")
+                    log.add("{} pays {} rent ${}", self, landed_property.owner, rent_amount)
+
+    def buy_property(self, property_to_buy, board, players, log):
+        """ Player buys the property (an unowned one they landed on)
+        """
+        property_to_buy.owner = self
+        self.owned.append(property_to_buy)
+        self.count_property(property_to_buy)
+        self.money -= property_to_buy.cost_base
+        board.record_ownership_change(property_to_buy)
+        log.add("{} bought {} for ${}", self.name, property_to_buy, property_to_buy.cost_base)
+
+        # Recalculate all monopolies / can build flags
+        board.recalculate_monopoly_multipliers(property_to_buy)
+
+        # Recalculate who wants to buy what
+        # (for all players, it may affect their decisions too)
+        for player in players:
+            player.update_lists_of_properties_to_trade(board)
 
     def improve_properties(self, board, log):
         """ While there is money to spend and properties to improve,
@@ -534,38 +503,37 @@ class Player:
         def get_next_property_to_improve():
             """ Decide what is the next property to improve:
             - it should be eligible for improvement (is monopoly, not mortgaged,
-            has not more houses than other cells in the group)
+            has not more houses than other cells in the group), see update_improvable_properties
+            - there are houses / hotel in the bank to build it
             - start with cheapest
             """
-            can_be_improved = []
-            for cell in self.owned:
-                # Property has to be:
-                # - not maxed out (no hotel)
-                # - not mortgaged
-                # - a part of monopoly, but not railway or utility (so the monopoly_multiplier is 2)
-                if (
-                        cell.has_hotel == 0
-                        and not cell.is_mortgaged
-                        and cell.monopoly_multiplier == 2
-                        and cell.group not in (RAILROADS, UTILITIES)
-                ):
-                    # In order for this cell to be able to be improved, it needs that all cells in the group:
-                    # 1. have at least as many houses as this cell (or a hotel)
-                    # 2. not be mortgaged
-                    # 3. available houses/hotel in the bank
-                    for other_cell in board.groups[cell.group]:
-                        if (other_cell.has_houses < cell.has_houses and not other_cell.has_hotel) or other_cell.is_mortgaged:
-                            break
-                    else:
-                        if cell.has_houses != 4 and board.available_houses > 0 or \
-                                cell.has_houses == 4 and board.available_hotels > 0:
-                            can_be_improved.append(cell)
-            # Sort the list by the cost of house
-            can_be_improved.sort(key=lambda x: x.cost_house)
-
-            # Return first (the cheapest) property that can be improved
-            if can_be_improved:
-                return can_be_improved[0]
+
+            def is_current(entry):
+                cell = entry[2]
+                return self.improvable_entries.get(cell) is entry and cell in self.improvable and cell.owner is self
+
+            def bank_has_improvement(cell):
+                return cell.has_houses != 4 and board.available_houses > 0 or \
+                    cell.has_houses == 4 and board.available_hotels > 0
+
+            # Drop outdated entries from the top of the heap
+            while self.improvable_heap and not is_current(self.improvable_heap[0]):
+                entry = heapq.heappop(self.improvable_heap)
+                cell = entry[2]
+                if self.improvable_entries.get(cell) is entry:
+                    del self.improvable_entries[cell]
+                    self.improvable.discard(cell)
+
+            if not self.improvable_heap:
+                return None
+            cheapest = self.improvable_heap[0][2]
+            if bank_has_improvement(cheapest):
+                return cheapest
+
+            # Bank is out of houses or hotels: the cheapest of the rest
+            for _, _, cell in sorted(entry for entry in self.improvable_heap if is_current(entry)):
+                if bank_has_improvement(cell):
+                    return cell
             return None
 
         while True:
@@ -584,13 +552,14 @@ class Player:
             # Building a house
             ordinal = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
 
+            self.count_property(cell_to_improve, -1)
             if cell_to_improve.has_houses != 4:
                 cell_to_improve.has_houses += 1
                 board.available_houses -= 1
                 # Paying for the improvement
                 self.money -= cell_to_improve.cost_house
-                log.add(f"{self} built {ordinal[cell_to_improve.has_houses]} " +
-                        f"house on {cell_to_improve} for ${cell_to_improve.cost_house}")
+                log.add("{} built {} house on {} for ${}",
+                        self, ordinal[cell_to_improve.has_houses], cell_to_improve, cell_to_improve.cost_house)
 
             # Building a hotel
             elif cell_to_improve.has_houses == 4:
@@ -600,7 +569,9 @@ class Player:
                 board.available_hotels -= 1
                 # Paying for the improvement
                 self.money -= cell_to_improve.cost_house
-                log.add(f"{self} built a hotel on {cell_to_improve}")
+                log.add("{} built a hotel on {}", self, cell_to_improve)
+            self.count_property(cell_to_improve)
+            board.update_improvable_properties(cell_to_improve)
 
     def unmortgage_a_property(self, board, log):
         """ Go through the list of properties and unmortgage one,
@@ -610,13 +581,14 @@ class Player:
 
         for cell in self.owned:
             if cell.is_mortgaged:
-                cost_to_unmortgage = \
-                    cell.cost_base * GameMechanics.mortgage_value + \
-                    cell.cost_base * GameMechanics.mortgage_fee
+                cost_to_unmortgage = cell.unmortgage_price
                 if self.money - cost_to_unmortgage >= self.settings.unspendable_cash:
-                    log.add(f"{self} unmortgages {cell} for ${cost_to_unmortgage}")
+                    log.add("{} unmortgages {} for ${}", self, cell, cost_to_unmortgage)
                     self.money -= cost_to_unmortgage
+                    self.count_property(cell, -1)
                     cell.is_mortgaged = False
+                    self.count_property(cell)
+                    board.update_improvable_properties(cell)
                     self.update_lists_of_properties_to_trade(board)
                     return True
 
@@ -627,6 +599,29 @@ class Player:
         sell houses, hotels, mortgage property until you get the `required_amount` of money
         """
 
+        # Owned properties with houses / hotels, by group (in the order of the owned list)
+        # and their position in the owned list (to break ties in prices as before)
+        improved_by_group = {}
+        owned_position = {}
+        for position, cell in enumerate(self.owned):
+            owned_position[cell] = position
+            if cell.has_houses > 0 or cell.has_hotel > 0:
+                improved_by_group.setdefault(cell.group, []).append(cell)
+
+        def get_group_candidates(group):
+            """ Properties of the group (owned by the player) that can be de-improved:
+            the ones with a hotel, or with the highest house count in the group (if there are no hotels)
+            """
+            group_cells = board.groups[group]
+            most_houses = max(cell.has_houses for cell in group_cells)
+            group_has_hotel = any(cell.has_hotel > 0 for cell in group_cells)
+            return [cell for cell in improved_by_group[group]
+                    if cell.has_hotel > 0
+                    or cell.has_houses > 0 and cell.has_houses == most_houses and not group_has_hotel]
+
+        # Properties that can be de-improved, by group. After a sale only the group of the sold property changes
+        candidates_by_group = {group: get_group_candidates(group) for group in improved_by_group}
+
         def get_next_property_to_downgrade(required_amount):
             """ Get the next property to sell houses/hotel from.
             Logic goes as follows:
@@ -636,21 +631,7 @@ class Player:
 
             # 1. let's see which properties CAN be de-improved
             # The house/hotel count is the highest in the group
-            can_be_downgrade = []
-            can_be_downgrade_has_houses = False
-            for cell in self.owned:
-                if cell.has_houses > 0 or cell.has_hotel > 0:
-                    # Look at other cells in this group
-                    # Do they have more houses or hotels?
-                    # If so, this property cannot be de-improved
-                    for other_cell in board.groups[cell.group]:
-                        if cell.has_hotel == 0 and (
-                                other_cell.has_houses > cell.has_houses or other_cell.has_hotel > 0):
-                            break
-                    else:
-                        can_be_downgrade.append(cell)
-                        if cell.has_houses > 0:
-                            can_be_downgrade_has_houses = True
+            can_be_downgrade = [cell for group_candidates in candidates_by_group.values() for cell in group_candidates]
 
             # No further de-improvements possible
             if len(can_be_downgrade) == 0:
@@ -658,21 +639,19 @@ class Player:
 
             # 2. If there are houses and hotels, remove hotels from the list
             # Selling a hotel is a last resort
-            if can_be_downgrade_has_houses:
+            if any(cell.has_houses > 0 for cell in can_be_downgrade):
                 can_be_downgrade = [x for x in can_be_downgrade if x.has_hotel == 0]
 
-            # 3. Find one that's just above the required amount (or the most expensive one)
-            # Sort potential de-improvements from cheap to expensive
-            can_be_downgrade.sort(key=lambda x: x.cost_house // 2)
-            while True:
-                # Only one possible option left
-                if len(can_be_downgrade) == 1:
-                    return can_be_downgrade[0]
-                # The second expensive option is not enough, sell most expensive
-                if can_be_downgrade[-2].cost_house // 2 < required_amount:
-                    return can_be_downgrade[-1]
-                # Remove the most expensive option
-                can_be_downgrade.pop()
+            # 3. Find one that's just above the required amount (or the most expensive one):
+            # the cheapest one that is enough, or the most expensive if none is
+            # (ties go to the first in the owned list, or the last one for the most expensive)
+            def sale_order(cell):
+                return cell.house_sale_price, owned_position[cell]
+
+            enough = [cell for cell in can_be_downgrade if cell.house_sale_price >= required_amount]
+            if enough:
+                return min(enough, key=sale_order)
+            return max(can_be_downgrade, key=sale_order)
 
         def get_list_of_properties_to_mortgage():
             """ Put together a list of properties a player can sell houses from.
@@ -680,8 +659,7 @@ class Player:
             list_to_mortgage = []
             for cell in self.owned:
                 if not cell.is_mortgaged:
-                    list_to_mortgage.append(
-                        (int(cell.cost_base * GameMechanics.mortgage_value), cell))
+                    list_to_mortgage.append((cell.mortgage_price, cell))
 
             # It will be popped from the end, so first to sell should be last
             list_to_mortgage.sort(key=lambda x: -x[0])
@@ -696,7 +674,8 @@ class Player:
             if cell_to_deimprove is None or money_to_raise <= 0:
                 break
 
-            sell_price = cell_to_deimprove.cost_house // 2
+            sell_price = cell_to_deimprove.house_sale_price
+            self.count_property(cell_to_deimprove, -1)
 
             # Selling a hotel
             if cell_to_deimprove.has_hotel:
@@ -706,7 +685,7 @@ class Player:
                     cell_to_deimprove.has_houses = 4
                     board.available_hotels += 1
                     board.available_houses -= 4
-                    log.add(f"{self} sells a hotel on {cell_to_deimprove}, raising ${sell_price}")
+                    log.add("{} sells a hotel on {}, raising ${}", self, cell_to_deimprove, sell_price)
                     self.money += sell_price
                 # Selling hotel, must tear down all 5 houses from one plot
                 # TODO: I think we need to tear down all 3 hotels in this situation?
@@ -714,8 +693,8 @@ class Player:
                     cell_to_deimprove.has_hotel = 0
                     cell_to_deimprove.has_houses = 0
                     board.available_hotels += 1
-                    log.add(f"{self} sells a hotel and all houses on {cell_to_deimprove}, " +
-                            f"raising ${sell_price * 5}")
+                    log.add("{} sells a hotel and all houses on {}, raising ${}",
+                            self, cell_to_deimprove, sell_price * 5)
                     self.money += sell_price * 5
 
             # Selling a house
@@ -723,9 +702,12 @@ class Player:
                 cell_to_deimprove.has_houses -= 1
                 board.available_houses += 1
                 ordinal = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
-                log.add(f"{self} sells {ordinal[cell_to_deimprove.has_houses + 1]} " +
-                        f"house on {cell_to_deimprove}, raising ${sell_price}")
+                log.add("{} sells {} house on {}, raising ${}",
+                        self, ordinal[cell_to_deimprove.has_houses + 1], cell_to_deimprove, sell_price)
                 self.money += sell_price
+            self.count_property(cell_to_deimprove)
+            board.update_improvable_properties(cell_to_deimprove)
+            candidates_by_group[cell_to_deimprove.group] = get_group_candidates(cell_to_deimprove.group)
 
         # Mortgage properties
         list_to_mortgage = get_list_of_properties_to_mortgage()
@@ -735,9 +717,12 @@ class Player:
             mortgage_price, cell_to_mortgage = list_to_mortgage.pop()
 
             # Mortgage this property
+            self.count_property(cell_to_mortgage, -1)
             cell_to_mortgage.is_mortgaged = True
+            self.count_property(cell_to_mortgage)
+            board.update_improvable_properties(cell_to_mortgage)
             self.money += mortgage_price
-            log.add(f"{self} mortgages {cell_to_mortgage}, raising ${mortgage_price}")
+            log.add("{} mortgages {}, raising ${}", self, cell_to_mortgage, mortgage_price)
 
     def pay_money(self, amount, payee, board, log):
         """ Function to pay money to another player (or bank)
@@ -749,15 +734,7 @@ class Player:
             Used to determine if they should go bankrupt or not.
             Max raisable money is 1/2 of houses cost + 1/2 of unmortgaged properties cost
             """
-            max_raisable = self.money
-            for cell in self.owned:
-                if cell.has_houses > 0:
-                    max_raisable += cell.cost_house * cell.has_houses // 2
-                if cell.has_hotel > 0:
-                    max_raisable += cell.cost_house * 5 // 2
-                if not cell.is_mortgaged:
-                    max_raisable += int(cell.cost_base * GameMechanics.mortgage_value)
-            return max_raisable
+            return self.money + self.property_raisable
 
         def transfer_all_properties(payee, board, log):
             """ Part of bankruptcy procedure, transfer all mortgaged property to the creditor
@@ -765,54 +742,57 @@ class Player:
 
             while self.owned:
                 cell_to_transfer = self.owned.pop()
+                self.count_property(cell_to_transfer, -1)
 
                 # Transfer to a player
                 # TODO: Unmortgage the property right away, or pay more
                 if isinstance(payee, Player):
                     cell_to_transfer.owner = payee
                     payee.owned.append(cell_to_transfer)
+                    payee.count_property(cell_to_transfer)
                 # Transfer to the bank
                 # TODO: Auction the property
                 else:
                     cell_to_transfer.owner = None
                     cell_to_transfer.is_mortgaged = False
 
+                board.record_ownership_change(cell_to_transfer)
                 board.recalculate_monopoly_multipliers(cell_to_transfer)
-                log.add(f"{self} transfers {cell_to_transfer} to {payee}")
+                log.add("{} transfers {} to {}", self, cell_to_transfer, payee)
 
         # Regular transaction
         if amount < self.money:
             self.money -= amount
             if payee != "bank":
                 payee.money += amount
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and self.game_config.free_parking_money:
                 board.free_parking_money += amount
             return
 
         max_raisable_money = count_max_raisable_money()
         # Can pay but need to sell some things first
         if amount < max_raisable_money:
-            log.add(f"{self} has ${self.money}, he can pay ${amount}, " +
-                    "but needs to mortgage/sell some things for that")
+            log.add("{} has ${}, he can pay ${}, but needs to mortgage/sell some things for that",
+                    self, self.money, amount)
             self.raise_money(amount, board, log)
             self.money -= amount
             if payee != "bank":
                 payee.money += amount
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and self.game_config.free_parking_money:
                 board.free_parking_money += amount
 
         # Bankruptcy (can't pay even after selling and mortgaging all)
         else:
-            log.add(f"{self} has to pay ${amount}, max they can raise is ${max_raisable_money}")
+            log.add("{} has to pay ${}, max they can raise is ${}", self, amount, max_raisable_money)
             self.is_bankrupt = True
-            log.add(f"{self} is bankrupt")
+            log.add("{} is bankrupt", self)
 
             # Raise as much cash as possible to give payee
             self.raise_money(amount, board, log)
-            log.add(f"{self} gave {payee} all their remaining money (${self.money})")
+            log.add("{} gave {} all their remaining money (${})", self, payee, self.money)
             if payee != "bank":
                 payee.money += self.money
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and self.game_config.free_parking_money:
                 board.free_parking_money += amount
 
             self.money = 0
@@ -821,11 +801,46 @@ class Player:
             transfer_all_properties(payee, board, log)
 
             # Reset all trade settings
-            self.wants_to_sell = set()
-            self.wants_to_buy = set()
+            for to_sell, to_buy in self.trade_lists_by_group.values():
+                board.trade_index.update_offers(self, to_sell, to_buy, None, None)
+            self.trade_lists_by_group = {}
+            self.ownership_changes_seen = 0
+
+    def update_improvable_properties(self, group_cells):
+        """ Update which of the properties in the group can be improved
+        (apart from the houses / hotels available in the bank)
+        """
+        for cell in group_cells:
+            # Property has to be:
+            # - owned by the player
+            # - not maxed out (no hotel)
+            # - not mortgaged
+            # - a part of monopoly, but not railway or utility (so the monopoly_multiplier is 2)
+            # In order for this cell to be able to be improved, it needs that all cells in the group:
+            # 1. have at least as many houses as this cell (or a hotel)
+            # 2. not be mortgaged
+            if (
+                    cell.owner is self
+                    and cell.has_hotel == 0
+                    and not cell.is_mortgaged
+                    and cell.monopoly_multiplier == 2
+                    and cell.group not in (RAILROADS, UTILITIES)
+                    and not any((other_cell.has_houses < cell.has_houses and not other_cell.has_hotel)
+                                or other_cell.is_mortgaged for other_cell in group_cells)
+            ):
+                self.improvable.add(cell)
+                entry = self.improvable_entries.get(cell)
+                # Ties in the cost of a house go to the property acquired first (as in the list of owned)
+                if entry is None or entry[1] != cell.acquired_order:
+                    entry = (cell.cost_house, cell.acquired_order, cell)
+                    self.improvable_entries[cell] = entry
+                    heapq.heappush(self.improvable_heap, entry)
+            else:
+                self.improvable.discard(cell)
 
     def update_lists_of_properties_to_trade(self, board):
-        """ Update list of properties player is willing to sell / buy
+        """ Update list of properties player is willing to sell / buy,
+        going through the property groups that changed owners since the last update
         """
 
         # If player is not willing to trade, he would
@@ -834,19 +849,18 @@ class Player:
         if not self.settings.is_willing_to_make_trades:
             return
 
-        # Reset the lists
-        self.wants_to_sell = set()
-        self.wants_to_buy = set()
+        # Only the groups that changed owners since the last update can change the lists
+        changed_groups = set(board.ownership_changes[self.ownership_changes_seen:])
+        self.ownership_changes_seen = len(board.ownership_changes)
 
-        # Go through each group
-        for group_cells in board.groups.values():
+        for group in changed_groups:
 
             # Break down all properties within each color group into
             # "owned by me" / "owned by others" / "not owned"
             owned_by_me = []
             owned_by_others = []
             not_owned = []
-            for cell in group_cells:
+            for cell in board.groups[group]:
                 if cell.owner == self:
                     owned_by_me.append(cell)
                 elif cell.owner is None:
@@ -854,167 +868,228 @@ class Player:
                 else:
                     owned_by_others.append(cell)
 
+            to_sell, to_buy = None, None
             # If there are properties to buy - no trades
-            if not_owned:
-                continue
-            # If I own 1: I am ready to sell it
-            if len(owned_by_me) == 1:
-                self.wants_to_sell.add(owned_by_me[0])
-            # If someone owns 1 (and I own the rest): I want to buy it
-            if len(owned_by_others) == 1:
-                self.wants_to_buy.add(owned_by_others[0])
-
-    def do_a_two_way_trade(self, players, board, log):
-        """ Look for and perform a two-way trade
+            if not not_owned:
+                # If I own 1: I am ready to sell it
+                if len(owned_by_me) == 1:
+                    to_sell = owned_by_me[0]
+                # If someone owns 1 (and I own the rest): I want to buy it
+                if len(owned_by_others) == 1:
+                    to_buy = owned_by_others[0]
+
+            # Replace what this group had in the lists
+            old_to_sell, old_to_buy = self.trade_lists_by_group.get(group, (None, None))
+            board.trade_index.update_offers(self, old_to_sell, old_to_buy, to_sell, to_buy)
+            self.trade_lists_by_group[group] = (to_sell, to_buy)
+
+    def fair_deal(self, player_gives, player_receives, other_player):
+        """ Remove properties from to_sell and to_buy to make it as fair as possible
         """
 
-        def get_price_difference(gives, receives):
-            """ Calculate price difference between items player
-            is about to give minus what he is about to receive.
-            >0 means a player gives away more
-            Return both absolute (in $), relative for a giver, relative for a receiver
-            """
-
-            cost_gives = sum(cell.cost_base for cell in gives)
-            cost_receives = sum(cell.cost_base for cell in receives)
-
-            diff_abs = cost_gives - cost_receives
+        # First, get all colors in both sides of the deal
+        color_receives = [cell.group for cell in player_receives]
+        color_gives = [cell.group for cell in player_gives]
+
+        # If there are only properties from size-2 groups, no trade
+        both_colors = set(color_receives + color_gives)
+        if both_colors.issubset({UTILITIES, INDIGO, BROWN}):
+            return [], []
+
+        # Look at "Indigo", "Brown", "Utilities". These have 2 properties,
+        # so both players would want to receive them
+        # If they are present, remove it from the guy who has the longer list
+        # If a list has the same length, remove both questionable items
+
+        for questionable_color in [UTILITIES, INDIGO, BROWN]:
+            if questionable_color in color_receives and questionable_color in color_gives:
+                if len(player_receives) > len(player_gives):
+                    player_receives = remove_by_color(player_receives, questionable_color)
+                elif len(player_receives) < len(player_gives):
+                    player_gives = remove_by_color(player_gives, questionable_color)
+                else:
+                    player_receives = remove_by_color(player_receives, questionable_color)
+                    player_gives = remove_by_color(player_gives, questionable_color)
 
-            diff_giver, diff_receiver = float("inf"), float("inf")
-            if receives:
-                diff_giver = cost_gives / cost_receives
-            if gives:
-                diff_receiver = cost_receives / cost_gives
+        # Sort, starting from the most expensive
+        player_receives.sort(key=lambda x: -x.cost_base)
+        player_gives.sort(key=lambda x: -x.cost_base)
 
-            return diff_abs, diff_giver, diff_receiver
+        # Check the difference in value and make sure it is not larger that player's preference
+        while player_gives and player_receives:
 
-        def remove_by_color(cells, color):
-            new_cells = [cell for cell in cells if cell.group != color]
-            return new_cells
+            diff_abs, diff_giver, diff_receiver = \
+                get_price_difference(player_gives, player_receives)
 
-        def fair_deal(player_gives, player_receives, other_player):
-            """ Remove properties from to_sell and to_buy to make it as fair as possible
-            """
+            # This player gives too much
+            if diff_abs > self.settings.trade_max_diff_absolute or \
+                    diff_giver > self.settings.trade_max_diff_relative:
+                player_gives.pop()
+                continue
+            # The Other player gives too much
+            if -diff_abs > other_player.settings.trade_max_diff_absolute or \
+                    diff_receiver > other_player.settings.trade_max_diff_relative:
+                player_receives.pop()
+                continue
+            break
 
-            # First, get all colors in both sides of the deal
-            color_receives = [cell.group for cell in player_receives]
-            color_gives = [cell.group for cell in player_gives]
-
-            # If there are only properties from size-2 groups, no trade
-            both_colors = set(color_receives + color_gives)
-            if both_colors.issubset({UTILITIES, INDIGO, BROWN}):
-                return [], []
-
-            # Look at "Indigo", "Brown", "Utilities". These have 2 properties,
-            # so both players would want to receive them
-            # If they are present, remove it from the guy who has the longer list
-            # If a list has the same length, remove both questionable items
-
-            for questionable_color in [UTILITIES, INDIGO, BROWN]:
-                if questionable_color in color_receives and questionable_color in color_gives:
-                    if len(player_receives) > len(player_gives):
-                        player_receives = remove_by_color(player_receives, questionable_color)
-                    elif len(player_receives) < len(player_gives):
-                        player_gives = remove_by_color(player_gives, questionable_color)
-                    else:
-                        player_receives = remove_by_color(player_receives, questionable_color)
-                        player_gives = remove_by_color(player_gives, questionable_color)
-
-            # Sort, starting from the most expensive
-            player_receives.sort(key=lambda x: -x.cost_base)
-            player_gives.sort(key=lambda x: -x.cost_base)
-
-            # Check the difference in value and make sure it is not larger that player's preference
-            while player_gives and player_receives:
-
-                diff_abs, diff_giver, diff_receiver = \
-                    get_price_difference(player_gives, player_receives)
-
-                # This player gives too much
-                if diff_abs > self.settings.trade_max_diff_absolute or \
-                        diff_giver > self.settings.trade_max_diff_relative:
-                    player_gives.pop()
-                    continue
-                # The Other player gives too much
-                if -diff_abs > other_player.settings.trade_max_diff_absolute or \
-                        diff_receiver > other_player.settings.trade_max_diff_relative:
-                    player_receives.pop()
-                    continue
-                break
+        return player_gives, player_receives
 
-            return player_gives, player_receives
+    def find_trade(self, players, board):
+        """ Find the two-way trade the player would offer: with the first player (in the order of players)
+        they have a fair deal with. Return (other player, properties to give, properties to receive),
+        None if there is no such trade
+        """
+        # Players whose lists match this player's both ways (most of the time, nobody)
+        trade_partners = board.trade_index.trade_partners(self)
+        if not trade_partners:
+            return None
 
         for other_player in players:
             # Selling/buying thing matches
-            if self.wants_to_buy.intersection(other_player.wants_to_sell) and \
-                    self.wants_to_sell.intersection(other_player.wants_to_buy):
-                player_receives = list(self.wants_to_buy.intersection(other_player.wants_to_sell))
-                player_gives = list(self.wants_to_sell.intersection(other_player.wants_to_buy))
+            if other_player in trade_partners:
+                # Sets of cells have no stable order (cells are hashed by id),
+                # so sort them by the board position to make the game reproducible
+                player_receives = sorted(board.trade_index.deal(self, other_player), key=board.cell_positions.__getitem__)
+                player_gives = sorted(board.trade_index.deal(other_player, self), key=board.cell_positions.__getitem__)
 
                 # Work out a fair deal (don't trade the same color,
                 # get value difference within the limit)
                 player_gives, player_receives = \
-                    fair_deal(player_gives, player_receives, other_player)
+                    self.fair_deal(player_gives, player_receives, other_player)
 
-                # If their deal is not empty, go on
+                # If their deal is not empty, this is the trade
                 if player_receives and player_gives:
+                    return other_player, player_gives, player_receives
 
-                    # Price difference in traded properties
-                    price_difference, _, _ = \
-                        get_price_difference(player_gives, player_receives)
-
-                    # Player gives await more expensive item, other play has to pay
-                    if price_difference > 0:
-                        # Other guy can't pay
-                        if other_player.money - price_difference < \
-                                other_player.settings.unspendable_cash:
-                            return False
-                        other_player.money -= price_difference
-                        self.money += price_difference
-
-                    # Player gives cheaper stuff, has to pay
-                    if price_difference < 0:
-                        # This player can't pay
-                        if self.money - abs(price_difference) < \
-                                self.settings.unspendable_cash:
-                            return False
-                        other_player.money += abs(price_difference)
-                        self.money -= abs(price_difference)
-
-                    # Property changes hands
-                    for cell_to_receive in player_receives:
-                        cell_to_receive.owner = self
-                        self.owned.append(cell_to_receive)
-                        other_player.owned.remove(cell_to_receive)
-                    for cell_to_give in player_gives:
-                        cell_to_give.owner = other_player
-                        other_player.owned.append(cell_to_give)
-                        self.owned.remove(cell_to_give)
-
-                    # Log the trade and compensation payment
-                    log.add(f"Trade: {self} gives {[str(cell) for cell in player_gives]}, " +
-                            f"receives {[str(cell) for cell in player_receives]} " +
-                            f"from {other_player}")
-
-                    if price_difference > 0:
-                        log.add(f"{self} received " +
-                                f"price difference compensation ${abs(price_difference)} " +
-                                f"from {other_player}")
-                    if price_difference < 0:
-                        log.add(f"{other_player} received " +
-                                f"price difference compensation ${abs(price_difference)} " +
-                                f"from {self}")
-
-                    # Recalculate monopoly and improvement status
-                    board.recalculate_monopoly_multipliers(player_gives[0])
-                    board.recalculate_monopoly_multipliers(player_receives[0])
-
-                    # Recalculate who wants to buy what
-                    # (for all players, it may affect their decisions too)
-                    for player in players:
-                        player.update_lists_of_properties_to_trade(board)
-
-                    # Return True to run a trading function again
-                    return True
+        return None
 
-        return False
+    def do_a_two_way_trade(self, players, board, log):
+        """ Look for and perform a two-way trade
+        """
+        trade = self.find_trade(players, board)
+        if trade is None:
+            return False
+        other_player, player_gives, player_receives = trade
+
+        # Price difference in traded properties
+        price_difference, _, _ = \
+            get_price_difference(player_gives, player_receives)
+
+        # Player gives await more expensive item, other play has to pay
+        if price_difference > 0:
+            # Other guy can't pay
+            if other_player.money - price_difference < \
+                    other_player.settings.unspendable_cash:
+                return False
+            other_player.money -= price_difference
+            self.money += price_difference
+
+        # Player gives cheaper stuff, has to pay
+        if price_difference < 0:
+            # This player can't pay
+            if self.money - abs(price_difference) < \
+                    self.settings.unspendable_cash:
+                return False
+            other_player.money += abs(price_difference)
+            self.money -= abs(price_difference)
+
+        # Property changes hands
+        for cell_to_receive in player_receives:
+            cell_to_receive.owner = self
+            board.record_ownership_change(cell_to_receive)
+            self.owned.append(cell_to_receive)
+            other_player.owned.remove(cell_to_receive)
+            other_player.count_property(cell_to_receive, -1)
+            self.count_property(cell_to_receive)
+        for cell_to_give in player_gives:
+            cell_to_give.owner = other_player
+            board.record_ownership_change(cell_to_give)
+            other_player.owned.append(cell_to_give)
+            self.owned.remove(cell_to_give)
+            self.count_property(cell_to_give, -1)
+            other_player.count_property(cell_to_give)
+
+        # Log the trade and compensation payment
+        # (the lists of names are only built for an enabled log)
+        if not log.disabled:
+            log.add("Trade: {} gives {}, receives {} from {}", self,
+                    [str(cell) for cell in player_gives], [str(cell) for cell in player_receives],
+                    other_player)
+
+        if price_difference > 0:
+            log.add("{} received price difference compensation ${} from {}",
+                    self, abs(price_difference), other_player)
+        if price_difference < 0:
+            log.add("{} received price difference compensation ${} from {}",
+                    other_player, abs(price_difference), self)
+
+        # Recalculate monopoly and improvement status
+        board.recalculate_monopoly_multipliers(player_gives[0])
+        board.recalculate_monopoly_multipliers(player_receives[0])
+        for traded_cell in player_gives + player_receives:
+            board.update_improvable_properties(traded_cell)
+
+        # Recalculate who wants to buy what
+        # (for all players, it may affect their decisions too)
+        for player in players:
+            player.update_lists_of_properties_to_trade(board)
+
+        # Return True to run a trading function again
+        return True
+
+
+def get_price_difference(gives, receives):
+    """ Calculate price difference between items player
+    is about to give minus what he is about to receive.
+    >0 means a player gives away more
+    Return both absolute (in $), relative for a giver, relative for a receiver
+    """
+
+    cost_gives = sum(cell.cost_base for cell in gives)
+    cost_receives = sum(cell.cost_base for cell in receives)
+
+    diff_abs = cost_gives - cost_receives
+
+    diff_giver, diff_receiver = float("inf"), float("inf")
+    if receives:
+        diff_giver = cost_gives / cost_receives
+    if gives:
+        diff_receiver = cost_receives / cost_gives
+
+    return diff_abs, diff_giver, diff_receiver
+
+
+def remove_by_color(cells, color):
+    new_cells = [cell for cell in cells if cell.group != color]
+    return new_cells
+
+
+# Handlers of Chance / Community Chest cards, by card action (see cards.py)
+CARD_HANDLERS = {
+    CARD_NOTHING: Player.card_nothing,
+    CARD_MOVE: Player.card_move,
+    CARD_GO: Player.card_go,
+    CARD_BACK_3: Player.card_back_3,
+    CARD_RAILROAD: Player.card_railroad,
+    CARD_UTILITY: Player.card_utility,
+    CARD_GOOJF: Player.card_get_out_of_jail_free,
+    CARD_GO_TO_JAIL: Player.card_go_to_jail,
+    CARD_GAIN: Player.card_gain,
+    CARD_PAY: Player.card_pay,
+    CARD_REPAIRS: Player.card_repairs,
+    CARD_PAY_EACH: Player.card_pay_each,
+    CARD_COLLECT_EACH: Player.card_collect_each,
+}
+
+
+# Handlers of the cell a player lands on, by cell kind (see CELL_KINDS)
+CELL_HANDLERS = {
+    CELL_CHANCE: lambda player, board, players, dice, log: player.handle_chance(board, players, log),
+    CELL_CHEST: lambda player, board, players, dice, log: player.handle_community_chest(board, players, log),
+    CELL_PROPERTY: Player.handle_landing_on_property,
+    CELL_GO_TO_JAIL: lambda player, board, players, dice, log: player.handle_landing_on_go_to_jail(log),
+    CELL_FREE_PARKING: lambda player, board, players, dice, log: player.handle_free_parking(board, log),
+    CELL_LUXURY_TAX: lambda player, board, players, dice, log: player.handle_luxury_tax(board, log),
+    CELL_INCOME_TAX: lambda player, board, players, dice, log: player.handle_income_tax(board, log),
+}
@@ -0,0 +1,77 @@
+""" Index of the properties players offer in trades, kept on the board.
+Each player offers up to one property to sell and one to buy in each group
+(see Player.update_lists_of_properties_to_trade), and updates its offers group by group.
+The index keeps the deals these offers make between pairs of players,
+so it answers which players have a two-way deal with a player without going through everyone's offers.
+"""
+
+
+class TradeIndex:
+    """ Players' offers by property and the deals they make:
+    a deal is a property the buyer wants to buy and the seller wants to sell,
+    two players have a two-way deal if each of them has a deal to buy from the other
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ No offers (at the start of a game) """
+        # {property: players who want to sell it}, {property: players who want to buy it}
+        self.sellers = {}
+        self.buyers = {}
+        # {(buyer, seller): properties}
+        self.deals = {}
+        # {player: players they have a two-way deal with}
+        self.partners = {}
+
+    def update_offers(self, player, old_to_sell, old_to_buy, to_sell, to_buy):
+        """ Replace what the player offered in a group (property to sell, property to buy, None for nothing)
+        """
+        if old_to_sell is not to_sell:
+            if old_to_sell is not None:
+                self.sellers[old_to_sell].discard(player)
+                for buyer in self.buyers.get(old_to_sell, ()):
+                    self.remove_deal(buyer, player, old_to_sell)
+            if to_sell is not None:
+                self.sellers.setdefault(to_sell, set()).add(player)
+                for buyer in self.buyers.get(to_sell, ()):
+                    self.add_deal(buyer, player, to_sell)
+        if old_to_buy is not to_buy:
+            if old_to_buy is not None:
+                self.buyers[old_to_buy].discard(player)
+                for seller in self.sellers.get(old_to_buy, ()):
+                    self.remove_deal(player, seller, old_to_buy)
+            if to_buy is not None:
+                self.buyers.setdefault(to_buy, set()).add(player)
+                for seller in self.sellers.get(to_buy, ()):
+                    self.add_deal(player, seller, to_buy)
+
+    def add_deal(self, buyer, seller, cell):
+        deal = self.deals.setdefault((buyer, seller), set())
+        deal.add(cell)
+        if len(deal) == 1:
+            self.update_partners(buyer, seller)
+
+    def remove_deal(self, buyer, seller, cell):
+        deal = self.deals[(buyer, seller)]
+        deal.discard(cell)
+        if not deal:
+            self.update_partners(buyer, seller)
+
+    def update_partners(self, player, other_player):
+        """ Whether the two players have a two-way deal, after a deal between them was added or removed """
+        if self.deals.get((player, other_player)) and self.deals.get((other_player, player)):
+            self.partners.setdefault(player, set()).add(other_player)
+            self.partners.setdefault(other_player, set()).add(player)
+        else:
+            self.partners.get(player, set()).discard(other_player)
+            self.partners.get(other_player, set()).discard(player)
+
+    def trade_partners(self, player):
+        """ Players the player has a two-way deal with """
+        return self.partners.get(player, ())
+
+    def deal(self, buyer, seller):
+        """ Properties the buyer wants to buy and the seller wants to sell """
+        return self.deals.get((buyer, seller), ())
@@ -0,0 +1,246 @@
+""" Binary events log: the same events as the text log, without formatting them into text while playing.
+An event is its template (the text with {} placeholders) and the values to put in it,
+the template's number in the log is the event's code.
+
+The log is written in segments, one per save, so several processes can append to the same file,
+or each worker can write its own shard, to be merged in the order of games (see merge_shards).
+A segment has:
+- a header (JSON): templates, strings (names of players and cells, card texts, etc.),
+  the kinds of template values, the arrays that follow, the number of the first game (if known)
+  and the sweep's variant of the games ("" for a simulation)
+- the codes of all events in the segment, in their order
+- for each template, a column of fixed-width numbers for each of its values:
+  integers, floats, or numbers of strings in the segment's strings
+
+decode_events renders the events into the lines of the text log, exactly as Log would write them.
+"""
+import heapq
+import json
+import struct
+from contextlib import ExitStack
+from os import PathLike
+from typing import BinaryIO, Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from monopoly.log import Log
+
+# A segment starts with these bytes and the length of its header
+SEGMENT_START = struct.Struct("<4sI")
+SEGMENT_MAGIC = b"MEV1"
+
+# Kinds of values' columns
+COLUMN_INT = "i"
+COLUMN_FLOAT = "f"
+COLUMN_NUMBER = "n"  # Integers and floats: a float column and an "is integer" column
+COLUMN_STRING = "s"  # Anything else, as text
+
+
+class EventLog(Log):
+    """ Log of game events, kept as event codes and values and saved in the binary format (see above)
+    """
+
+    def __init__(self, log_file_name: Union[str, PathLike] = "events.bin", disabled: bool = False,
+                 shard: bool = False):
+        super().__init__(log_file_name, disabled)
+        # A shard is written by one process only, without the lock
+        self.shard = shard
+        # Number of the first game of the events (set by the caller), to merge shards in the order of games
+        self.first_game = None
+        # Sweep's variant of the games (set by the caller): variants play the same game numbers
+        self.variant = ""
+        # {template: event code}
+        self.templates = {}
+        # Values of the events by event code, one after another: [[value, ...], ...]
+        # (not a tuple per event: many small objects kept in memory make garbage collection slow)
+        self.values = []
+        # self.content are the codes of the events, in order
+
+    def add(self, data, *args):
+        """ Add an event: data is the template, args are its values (as in Log.add)
+        """
+        if self.disabled:
+            return
+        code = self.templates.get(data)
+        if code is None:
+            code = self.templates[data] = len(self.templates)
+            self.values.append([])
+        self.content.append(code)
+        self.values[code].extend(args)
+
+    def save(self):
+        """ Write out the events as one segment
+        """
+        if self.disabled or not self.content:
+            return
+        segment = encode_segment(list(self.templates), self.values, self.content, self.first_game, self.variant)
+        if self.shard:
+            self.write(segment)
+        else:
+            with self.lock:
+                self.write(segment)
+
+    def write(self, segment: bytes):
+        """ Append the segment to the log file """
+        with open(self.log_file_name, "ab") as logfile:
+            logfile.write(segment)
+
+    def flush(self):
+        """ Write out the events and empty the log, to keep adding to it
+        """
+        self.save()
+        self.content = []
+        self.templates = {}
+        self.values = []
+
+    def reset(self, first_line=""):
+        """ Empty the log file, write first_line if provided
+        """
+        with self.lock:
+            with open(self.log_file_name, "wb") as logfile:
+                logfile.write(encode_segment([first_line], [[]], [0]))
+
+
+def smallest_dtype(array: np.ndarray) -> np.dtype:
+    """ Smallest integer type that fits all numbers of the (not empty) array """
+    return np.result_type(np.min_scalar_type(array.min()), np.min_scalar_type(array.max()))
+
+
+def encode_column(column: List, strings: Dict[str, int]) -> Tuple[str, List[np.ndarray]]:
+    """ Kind and arrays of a column of values, adding new strings to strings {string: number}
+    """
+    types = set(map(type, column))
+    if types == {int}:
+        array = np.array(column, dtype=np.int64)
+        return COLUMN_INT, [array.astype(smallest_dtype(array))]
+    if types == {float}:
+        return COLUMN_FLOAT, [np.array(column, dtype=np.float64)]
+    if types == {int, float}:
+        return COLUMN_NUMBER, [np.array(column, dtype=np.float64),
+                               np.array([type(value) is int for value in column], dtype=np.bool_)]
+    if types & {int, float, bool, list}:
+        # Numbers can be equal to each other as dict keys (1 == 1.0 == True), lists are not hashable
+        column = list(map(str, column))
+    # Convert each distinct value (mostly players and cells) to text only once
+    numbers = {value: strings.setdefault(str(value), len(strings)) for value in dict.fromkeys(column)}
+    array = np.fromiter(map(numbers.__getitem__, column), dtype=np.int64, count=len(column))
+    return COLUMN_STRING, [array.astype(smallest_dtype(array))]
+
+
+def encode_segment(templates: List[str], values: List[List], codes: List[int], first_game: int = None,
+                   variant: str = "") -> bytes:
+    """ Segment of the log (see above): templates and their values by event code
+    (values of all events of the template one after another), codes of the events in order
+    """
+    strings = {}
+    kinds = []
+    arrays = [np.array(codes, dtype=np.min_scalar_type(len(templates)))]
+    for template, template_values, n_events in zip(templates, values, np.bincount(arrays[0]).tolist()):
+        n_values, remainder = divmod(len(template_values), n_events)
+        if remainder:
+            raise ValueError(f"Events of the same template have different numbers of values: {template}")
+        template_kinds = []
+        for value_number in range(n_values):
+            kind, column_arrays = encode_column(template_values[value_number::n_values], strings)
+            template_kinds.append(kind)
+            arrays.extend(column_arrays)
+        kinds.append(template_kinds)
+
+    header = json.dumps({"templates": templates, "kinds": kinds, "strings": list(strings),
+                         "arrays": [[array.dtype.str, len(array)] for array in arrays],
+                         "first_game": first_game, "variant": variant}).encode("utf-8")
+    return b"".join([SEGMENT_START.pack(SEGMENT_MAGIC, len(header)), header] + [array.tobytes() for array in arrays])
+
+
+def arrays_size(header: dict) -> int:
+    """ Size of the segment's arrays (in bytes) """
+    return sum(np.dtype(dtype).itemsize * length for dtype, length in header["arrays"])
+
+
+def read_segments(logfile: BinaryIO) -> Iterator[Tuple[dict, bytes]]:
+    """ Segments of the open binary log file, one by one: (header, the whole segment)
+    """
+    while True:
+        start = logfile.read(SEGMENT_START.size)
+        if not start:
+            return
+        magic, header_length = SEGMENT_START.unpack(start)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{logfile.name} is not a binary events log (or it is damaged)")
+        header_bytes = logfile.read(header_length)
+        header = json.loads(header_bytes)
+        yield header, start + header_bytes + logfile.read(arrays_size(header))
+
+
+def render_segment(header: dict, segment: bytes) -> List[str]:
+    """ Lines of the text log for the segment's events
+    """
+    arrays = []
+    offset = len(segment) - arrays_size(header)
+    for dtype, length in header["arrays"]:
+        arrays.append(np.frombuffer(segment, dtype=dtype, count=length, offset=offset))
+        offset += arrays[-1].nbytes
+
+    strings = header["strings"]
+    # Rows of values of each template, in the order of events
+    template_rows = []
+    next_array = iter(arrays[1:])
+    for template_kinds in header["kinds"]:
+        columns = []
+        for kind in template_kinds:
+            column = next(next_array).tolist()
+            if kind == COLUMN_STRING:
+                column = [strings[number] for number in column]
+            elif kind == COLUMN_NUMBER:
+                column = [int(value) if is_int else value for value, is_int in zip(column, next(next_array).tolist())]
+            columns.append(column)
+        template_rows.append(iter(zip(*columns)) if columns else None)
+
+    lines = []
+    templates = header["templates"]
+    for code in arrays[0].tolist():
+        rows = template_rows[code]
+        lines.append(templates[code] if rows is None else templates[code].format(*next(rows)))
+    return lines
+
+
+def decode_events(log_file_name: Union[str, PathLike], variant: str = None) -> Iterator[str]:
+    """ Lines of the text log for the events in the binary log file, segment by segment:
+    the events of the sweep's variant, of all segments by default
+    """
+    with open(log_file_name, "rb") as logfile:
+        for header, segment in read_segments(logfile):
+            if variant is None or header.get("variant", "") == variant:
+                yield from render_segment(header, segment)
+
+
+def merge_shards(shard_file_names: List[Union[str, PathLike]], log_file_name: Union[str, PathLike],
+                 variants: Sequence[str] = ("",), last_game: int = None) -> None:
+    """ Append the segments of the shards to the log file: the games of each variant, one variant after another,
+    in the order of their first games.
+    If last_game is set, segments of later games are left out (a segment has the games of one block,
+    so a simulation that counts whole blocks of games gets the log of exactly the games it counted).
+    The segments of a variant are in the order of games in each shard already (a worker plays its blocks of games
+    in the order they are sent), and the segments of different blocks do not overlap,
+    so a streaming k-way merge of the shards orders all games of the variant
+    """
+    with open(log_file_name, "ab") as logfile:
+        for variant in variants:
+            with ExitStack() as stack:
+                shards = [(header_segment for header_segment in read_segments(stack.enter_context(open(shard, "rb")))
+                           if header_segment[0].get("variant", "") == variant
+                           and (last_game is None or (header_segment[0]["first_game"] or 0) <= last_game))
+                          for shard in shard_file_names]
+                for _, segment in heapq.merge(*shards,
+                                              key=lambda header_segment: header_segment[0]["first_game"] or 0):
+                    logfile.write(segment)
+
+
+def write_text_log(log_file_name: Union[str, PathLike], text_file_name: Union[str, PathLike],
+                   variant: str = None) -> None:
+    """ Render the binary log file into the text log (same as the one Log writes), of the variant or all of it
+    """
+    with open(text_file_name, "w", encoding="utf-8") as text_file:
+        for line in decode_events(log_file_name, variant):
+            text_file.write(line)
+            text_file.write("\n")
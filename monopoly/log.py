@@ -21,11 +21,15 @@ class Log:
         self.content = []
         self.disabled = disabled
 
-    def add(self, data):
+    def add(self, data, *args):
         """ Add a line to a Log
+        If args are provided, data is a template ("{} pays {}") that is formatted
+        only when the log is enabled, so a disabled log costs no string building
         """
         if self.disabled:
             return
+        if args:
+            data = data.format(*args)
         self.content.append(data)
 
     def save(self):
@@ -39,6 +43,12 @@ class Log:
                 if self.content:
                     logfile.write("\n")
 
+    def flush(self):
+        """ Write out the log and empty it, to keep adding to it
+        """
+        self.save()
+        self.content = []
+
     def reset(self, first_line=""):
         """ Empty the log file, write first_line if provided
         """
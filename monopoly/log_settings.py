@@ -1,6 +1,11 @@
+import json
+import os
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
 
+from monopoly.event_log import EventLog, merge_shards
 from monopoly.log import Log
+from monopoly.stats_log import StatsLog, remove_stats
 
 project_root = Path(__file__).resolve().parent
 results_dir = project_root.parent / "results"
@@ -8,19 +13,87 @@ results_dir = project_root.parent / "results"
 
 class LogSettings:
     KEEP_GAME_LOG = True
-    EVENTS_LOG_PATH = results_dir / "events.log"
+    # Binary events log (see event_log.py), scripts/decode_log.py renders it as text into EVENTS_TEXT_PATH
+    EVENTS_LOG_PATH = results_dir / "events.bin"
+    EVENTS_TEXT_PATH = results_dir / "events.log"
+    # Bankruptcies of a simulation, or of all variants of a sweep (with a first column, the variant)
     BANKRUPTCIES_PATH = results_dir / "bankruptcies.tsv"
+    # Number of games played by the simulation, or by each variant of a sweep, {variant: games} as JSON
+    # (the bankruptcies log has no rows for games without bankruptcies)
+    GAMES_PLAYED_PATH = results_dir / "games_played.json"
+    # Columnar statistics of games (Parquet, see stats_log.py): results of games and snapshots of players' state
+    # every STATS_SNAPSHOT_TURNS turns (0 for no snapshots)
+    KEEP_STATS = False
+    STATS_DIR = results_dir / "stats"
+    STATS_SNAPSHOT_TURNS = 10
+    # Survival curves' arrays (see survival.py), saved by scripts/survival.py
+    SURVIVAL_PATH = results_dir / "survival.npz"
 
     @classmethod
     def init_logs(cls):
         """Initiate & reset both logs; return (events_log, bankruptcies_log)."""
 
-        # 1) events log
-        events_log = Log(cls.EVENTS_LOG_PATH, disabled=not cls.KEEP_GAME_LOG)
+        # 1) events log (and no shards left from previous runs)
+        for shard in cls.events_shards():
+            shard.unlink()
+        events_log = cls.new_events_log()
         events_log.reset("Events log")
 
         # 2) bankruptcies summary log
         bankruptcies_log = Log(cls.BANKRUPTCIES_PATH)
         bankruptcies_log.reset("game_number\tplayer_bankrupt\tturn")
+        cls.GAMES_PLAYED_PATH.unlink(missing_ok=True)
+
+        # 3) statistics of previous runs
+        remove_stats(cls.STATS_DIR)
 
         return events_log, bankruptcies_log
+
+    @classmethod
+    def save_games_played(cls, games_played: Dict[str, int]):
+        """ Record the number of games played {variant: games} ("" for a simulation), next to the bankruptcies log
+        """
+        cls.GAMES_PLAYED_PATH.write_text(json.dumps(games_played) + "\n")
+
+    @classmethod
+    def games_played(cls, variant: str = "") -> Optional[int]:
+        """ Number of games played by the last simulation (or by the variant of the last sweep),
+        None if it is not recorded
+        """
+        if not cls.GAMES_PLAYED_PATH.exists():
+            return None
+        return json.loads(cls.GAMES_PLAYED_PATH.read_text()).get(variant)
+
+    @classmethod
+    def new_events_log(cls, shard=False):
+        """ Events log of a game (or a block of games), disabled if game logs are not kept.
+        With shard=True, the log is the worker process's own file (see merge_events_shards)
+        """
+        if shard:
+            path = cls.EVENTS_LOG_PATH.with_name(
+                f"{cls.EVENTS_LOG_PATH.stem}.shard-{os.getpid()}{cls.EVENTS_LOG_PATH.suffix}")
+            return EventLog(path, disabled=not cls.KEEP_GAME_LOG, shard=True)
+        return EventLog(cls.EVENTS_LOG_PATH, disabled=not cls.KEEP_GAME_LOG)
+
+    @classmethod
+    def new_stats_log(cls, variant=""):
+        """ Statistics of a block of games (of the sweep's variant), disabled if statistics are not kept """
+        return StatsLog(cls.STATS_DIR, cls.STATS_SNAPSHOT_TURNS, variant, disabled=not cls.KEEP_STATS)
+
+    @classmethod
+    def events_shards(cls) -> List[Path]:
+        """ Events log shards written by the workers """
+        return sorted(cls.EVENTS_LOG_PATH.parent.glob(
+            f"{cls.EVENTS_LOG_PATH.stem}.shard-*{cls.EVENTS_LOG_PATH.suffix}"))
+
+    @classmethod
+    def merge_events_shards(cls, variants: Sequence[str] = ("",), last_game: Optional[int] = None):
+        """ Append the workers' shards to the events log, in the order of games (variant by variant, for a sweep),
+        and delete them. Games after last_game (if set) are left out of the log
+        """
+        shards = cls.events_shards()
+        if not shards:
+            return
+        merge_shards(shards, cls.EVENTS_LOG_PATH, variants, last_game)
+        for shard in shards:
+            shard.unlink()
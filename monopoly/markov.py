@@ -0,0 +1,178 @@
+""" Exact probabilities of where players land, without playing games:
+the player's position is a Markov chain, with one step per roll of the dice.
+
+The state before a roll is either a cell and the number of doubles rolled in a row
+or one of the turns in jail. The chain follows the rules of Player.make_a_move:
+- the third double in a row sends the player to jail (without moving)
+- in jail, a double gets the player out (and they roll again, as after any double),
+  on the third turn the player pays the fine and moves anyway
+- Go To Jail, Chance and Community Chest cards (see cards.py) move the player,
+  a deck is drawn as if each of its cards were equally likely (as over a whole shuffled deck)
+"Get Out of Jail Free" cards are not modeled: the player always waits for a double or the third turn.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from monopoly.core.board import Board
+from monopoly.core.cards import CARD_MOVE, CARD_GO, CARD_BACK_3, CARD_RAILROAD, CARD_UTILITY, CARD_GO_TO_JAIL
+from monopoly.core.cell import CELL_OTHER, CELL_CHANCE, CELL_CHEST, CELL_GO_TO_JAIL
+from monopoly.core.dice import roll_outcomes
+from monopoly.core.game_config import GameConfig
+
+JAIL_CELL = 10
+# Turns in jail: the third one is the last
+JAIL_TURNS = 3
+# Where a move ends when the player is sent to jail
+GO_TO_JAIL = -1
+
+
+class LandingDistribution(NamedTuple):
+    """ Long-run share of rolls that end on each cell """
+    cells: np.ndarray  # By cell number (the Jail cell includes the players in jail)
+    in_jail: float  # Share of rolls that end in jail (a part of cells[JAIL_CELL])
+    rolls_per_turn: float  # Average number of rolls in a turn (with the rolls after doubles)
+
+
+def card_target(card, cell) -> int:
+    """ Cell a card moves the player to from the cell (GO_TO_JAIL to go to jail) """
+    if card.action == CARD_MOVE:
+        return card.amount
+    if card.action == CARD_GO:
+        return 0
+    if card.action == CARD_BACK_3:
+        return cell - 3
+    if card.action == CARD_RAILROAD:
+        while (cell - 5) % 10 != 0:
+            cell = (cell + 1) % 40
+        return cell
+    if card.action == CARD_UTILITY:
+        while cell not in (12, 28):
+            cell = (cell + 1) % 40
+        return cell
+    if card.action == CARD_GO_TO_JAIL:
+        return GO_TO_JAIL
+    return cell
+
+
+def landing_outcomes(board: Board, cell: int) -> Dict[int, float]:
+    """ Where a move to the cell ends: {cell or GO_TO_JAIL: probability}
+    Cells are handled in the order of their kinds, as in Player.make_a_move
+    """
+    decks = {CELL_CHANCE: board.chance.all_cards, CELL_CHEST: board.chest.all_cards}
+    outcomes = {}
+
+    def visit(cell, probability, handled_kind):
+        kind = board.cell_kinds[cell]
+        if kind == CELL_OTHER or kind <= handled_kind:
+            outcomes[cell] = outcomes.get(cell, 0) + probability
+        elif kind == CELL_GO_TO_JAIL:
+            outcomes[GO_TO_JAIL] = outcomes.get(GO_TO_JAIL, 0) + probability
+        elif kind in decks:
+            cards = decks[kind]
+            for card in cards:
+                target = card_target(card, cell)
+                if target == GO_TO_JAIL:
+                    outcomes[GO_TO_JAIL] = outcomes.get(GO_TO_JAIL, 0) + probability / len(cards)
+                else:
+                    visit(target, probability / len(cards), kind)
+        else:
+            outcomes[cell] = outcomes.get(cell, 0) + probability
+
+    visit(cell, 1.0, CELL_OTHER)
+    return outcomes
+
+
+def transition_matrix(game_config: GameConfig = None, board: Board = None) -> Tuple[np.ndarray, List[str]]:
+    """ Transition matrix of the chain (from state, to state) and the names of the states.
+    States are: (cell, doubles in a row) for all cells and 0-2 doubles, then the turns in jail
+    """
+    if game_config is None:
+        game_config = GameConfig()
+    if board is None:
+        board = Board(game_config)
+    n_cells = len(board.cells)
+    sum_probabilities, double_probabilities = roll_outcomes(game_config.dice_count, game_config.dice_sides)
+
+    def free_state(cell, doubles):
+        return doubles * n_cells + cell
+
+    def jail_state(turn):
+        return 3 * n_cells + turn
+
+    n_states = 3 * n_cells + JAIL_TURNS
+    transitions = np.zeros((n_states, n_states))
+    landings = [landing_outcomes(board, cell) for cell in range(n_cells)]
+
+    def move(from_state, start, dice_sum, probability, doubles_after):
+        """ Move from the start cell by the dice sum, the next state has doubles_after doubles in a row """
+        for target, target_probability in landings[(start + dice_sum) % n_cells].items():
+            to_state = jail_state(0) if target == GO_TO_JAIL else free_state(target, doubles_after)
+            transitions[from_state, to_state] += probability * target_probability
+
+    for dice_sum, sum_probability in enumerate(sum_probabilities):
+        double_probability = double_probabilities[dice_sum]
+        other_probability = sum_probability - double_probability
+        for cell in range(n_cells):
+            for doubles in range(3):
+                from_state = free_state(cell, doubles)
+                if other_probability:
+                    move(from_state, cell, dice_sum, other_probability, 0)
+                if double_probability:
+                    # Third double in a row: go to jail
+                    if doubles == 2:
+                        transitions[from_state, jail_state(0)] += double_probability
+                    else:
+                        move(from_state, cell, dice_sum, double_probability, doubles + 1)
+        for turn in range(JAIL_TURNS):
+            from_state = jail_state(turn)
+            if double_probability:
+                move(from_state, JAIL_CELL, dice_sum, double_probability, 1)
+            if other_probability:
+                if turn == JAIL_TURNS - 1:
+                    move(from_state, JAIL_CELL, dice_sum, other_probability, 0)
+                else:
+                    transitions[from_state, jail_state(turn + 1)] += other_probability
+
+    names = [f"{board.cells[cell].name} ({doubles} doubles)" for doubles in range(3) for cell in range(n_cells)] + \
+            [f"In jail (turn {turn + 1})" for turn in range(JAIL_TURNS)]
+    return transitions, names
+
+
+def stationary_distribution(transitions: np.ndarray) -> np.ndarray:
+    """ Stationary distribution of the chain: pi = pi * transitions, sum(pi) = 1
+    """
+    n_states = transitions.shape[0]
+    # One of the balance equations is redundant: replace it with the sum
+    equations = transitions.T - np.eye(n_states)
+    equations[-1] = 1
+    right_side = np.zeros(n_states)
+    right_side[-1] = 1
+    distribution = np.linalg.solve(equations, right_side)
+    # Unreachable states (like Go To Jail) can come out as tiny negative numbers
+    return np.clip(distribution, 0, None)
+
+
+def landing_distribution(game_config: GameConfig = None) -> LandingDistribution:
+    """ Long-run share of rolls that end on each cell of the board
+    """
+    if game_config is None:
+        game_config = GameConfig()
+    board = Board(game_config)
+    n_cells = len(board.cells)
+    distribution = stationary_distribution(transition_matrix(game_config, board)[0])
+    cells = distribution[:3 * n_cells].reshape(3, n_cells).sum(axis=0)
+    in_jail = distribution[3 * n_cells:].sum()
+    cells[JAIL_CELL] += in_jail
+    # A turn starts with a roll without doubles before it, or with a roll in jail
+    turn_starts = distribution[:n_cells].sum() + in_jail
+    return LandingDistribution(cells, float(in_jail), float(1 / turn_starts))
+
+
+def print_landing_distribution(landing: LandingDistribution, board: Board) -> None:
+    """ Print the share of rolls that end on each cell, from the most frequent
+    """
+    print("Landing probabilities (share of rolls that end on the cell):")
+    for cell in np.argsort(-landing.cells, kind="stable"):
+        print(f"  - {board.cells[cell].name}: {100 * landing.cells[cell]:.2f}%")
+    print(f"  (in jail: {100 * landing.in_jail:.2f}%)")
@@ -0,0 +1,161 @@
+""" Running results of the simulation: game results are folded into aggregates as they arrive,
+so the analysis does not need to re-read the bankruptcies log.
+Printing functions are shared with the Analyzer, to have the same output.
+"""
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import GameResult
+
+
+def print_remaining_players(remaining_players: Dict[int, int], n_games: int, n_moves: int) -> None:
+    """ Print number of games that had a clear winner, how many players remain at the end
+    remaining_players is {remaining players: games}, n_moves is the games' turn limit
+    """
+    # Games with a clear winner (just a single player remains)
+    clear_winner = remaining_players.get(1, 0)
+    print(f"Games that had clear winner: {clear_winner} / {n_games} " +
+          f"({100 * clear_winner / n_games:.1f}%)")
+
+    # Number of players by the end of simulation
+    print(f"Number of remaining players after: {n_moves} turns:")
+    for remaining, count in sorted(remaining_players.items()):
+        print(f"  - {remaining}: {count} ({count * 100 / n_games:.1f}%)")
+
+
+def nth_value(counts: Dict[int, int], index: int) -> int:
+    """ Value at the index in the sorted list of values, given as counts {value: times} (without building the list)
+    """
+    for value in sorted(counts):
+        index -= counts[value]
+        if index < 0:
+            return value
+    raise IndexError("index out of range")
+
+
+def print_game_length(lengths: Dict[int, int], n_games: int, n_moves: int) -> None:
+    """ Print median game length and average survival time
+    lengths is {game length: finished games}, the game length is the turn of the last bankruptcy,
+    n_moves is the games' turn limit
+    """
+    n_finished = sum(lengths.values())
+    # Unfinished games are counted as n_moves long (longer than any finished game)
+    all_lengths = Counter(lengths)
+    all_lengths[n_moves] += n_games - n_finished
+    if n_finished:
+        print(f"Median game length (for finished games): {nth_value(lengths, n_finished // 2)}")
+    print(f"Median game length (for all games): {nth_value(all_lengths, n_games // 2)}")
+
+    # Average survival time (for those who goes bankrupt)
+    survival_average = sum(length * count for length, count in lengths.items()) / n_finished \
+        if n_finished else float("nan")
+    print(f"Average survival time (for bankrupt players): {survival_average:.1f} turns")
+
+
+def survival_margin(survivals: int, n_games: int) -> float:
+    """ Margin of the survival rate estimate (95% confidence, normal approximation) """
+    survival_rate = survivals / n_games
+    return 1.96 * (survival_rate * (1 - survival_rate) / n_games) ** 0.5
+
+
+def print_winning_rate(loses: Dict[str, int], n_games: int, players: List[str]) -> None:
+    """ Print winning (survival) rate of players
+    loses is {player name: games lost}, players are the players' names
+    """
+    print("Players' survival rate:")
+
+    for player_name in players:
+        survivals = n_games - loses.get(player_name, 0)
+
+        survival_rate = survivals / n_games
+        margin = survival_margin(survivals, n_games)
+        print(f"  - {player_name}: {survivals} " +
+              f"({survival_rate * 100:.1f} "
+              f"+- {margin * 100:.1f}%)")
+
+
+class SimulationResults:
+    """ Aggregates of the games' results, updated with each game as it finishes.
+    game_config is the games' settings (players, turn limit), by default taken from settings.py
+    """
+
+    def __init__(self, game_config: GameConfig = None):
+        if game_config is None:
+            game_config = GameConfig()
+        self.n_moves = game_config.n_moves
+        self.players = [player_name for player_name, _ in game_config.players_list]
+        self.n_games = 0
+        # {remaining players: games}
+        self.remaining = Counter()
+        # {game length: finished games}, game length is the turn of the last bankruptcy
+        self.lengths = Counter()
+        # {player name: games lost}
+        self.loses = Counter()
+        # {(player name, turn): games lost on the turn}, for survival curves (see survival.py)
+        self.bankruptcy_turns = Counter()
+
+    def add(self, game_result: GameResult):
+        """ Add one game's result to the aggregates """
+        n_players = len(self.players)
+        self.n_games += 1
+        self.remaining[n_players - len(game_result.bankruptcies)] += 1
+        if len(game_result.bankruptcies) == n_players - 1:
+            self.lengths[max(turn for _, turn in game_result.bankruptcies)] += 1
+        for player_name, turn in game_result.bankruptcies:
+            self.loses[player_name] += 1
+            self.bankruptcy_turns[player_name, turn] += 1
+
+    def merge(self, other: "SimulationResults"):
+        """ Add the aggregates of other games (for example, of a block played by a worker) """
+        self.n_games += other.n_games
+        self.remaining.update(other.remaining)
+        self.lengths.update(other.lengths)
+        self.loses.update(other.loses)
+        self.bankruptcy_turns.update(other.bankruptcy_turns)
+
+    def survival_margins(self) -> Dict[str, float]:
+        """ Current margins of players' survival rates {player name: margin} """
+        return {player_name: survival_margin(self.n_games - self.loses[player_name], self.n_games)
+                for player_name in self.players}
+
+    def run_all(self):
+        """ Run all analysis functions """
+        self.remaining_players()
+        self.game_length()
+        self.winning_rate()
+
+    def remaining_players(self):
+        """ Number of games that had a clear winner, how many players remain at the end
+        """
+        remaining_players = {remaining: count for remaining, count in self.remaining.items() if count}
+        # Games with no losers (all players remained) are always shown
+        remaining_players.setdefault(len(self.players), 0)
+        print_remaining_players(remaining_players, self.n_games, self.n_moves)
+
+    def game_length(self):
+        """ Median game length (for all finite games)
+        """
+        print_game_length(self.lengths, self.n_games, self.n_moves)
+
+    def winning_rate(self):
+        """ Display winning (survival) rate of players
+        """
+        print_winning_rate(self.loses, self.n_games, self.players)
+
+
+class ResultBlock:
+    """ Results of a block of games played by a worker, sent back to the simulation in one piece
+    (instead of one GameResult per game): the aggregates and the bankruptcies for the log
+    """
+
+    def __init__(self, game_config: GameConfig = None):
+        self.results = SimulationResults(game_config)
+        # Bankruptcies in the order of games: [(game number, player name, turn), ...]
+        self.bankruptcies: List[Tuple[int, str, int]] = []
+
+    def add(self, game_result: GameResult):
+        """ Add one game's result to the block """
+        self.results.add(game_result)
+        self.bankruptcies.extend((game_result.game_number, player_name, turn)
+                                 for player_name, turn in game_result.bankruptcies)
@@ -0,0 +1,112 @@
+""" Expected rent and returns on investment of properties, computed exactly from the landing distribution
+(see markov.py) for all property groups and development levels at once, without playing games.
+
+Rents are per opponent turn (one turn of one opponent, with all its rolls),
+payback periods are in rounds (every opponent has a turn).
+The double rent of the "nearest Railroad" and "nearest Utility" Chance cards is not counted.
+"""
+from typing import List, NamedTuple
+
+import numpy as np
+
+from monopoly.core.board import Board
+from monopoly.core.cell import Property
+from monopoly.core.constants import RAILROADS, UTILITIES
+from monopoly.core.dice import roll_outcomes
+from monopoly.core.game_config import GameConfig
+from monopoly.markov import LandingDistribution, landing_distribution
+
+# Development levels of a street group (all properties of the group at the same level)
+LEVELS = ("Monopoly", "1 house", "2 houses", "3 houses", "4 houses", "Hotel")
+
+# Rent multipliers by the number of owned railroads / utilities (as in Board.recalculate_monopoly_multipliers)
+RAILROAD_MULTIPLIERS = (1, 2, 4, 8)
+UTILITY_MULTIPLIERS = (4, 10)
+
+
+class Returns(NamedTuple):
+    """ Returns of property groups (rows) by level (columns).
+    The level is the development level for streets (see LEVELS),
+    the number of owned properties (1, 2...) for railroads and utilities (nan if there are not that many)
+    """
+    groups: List[str]
+    investment: np.ndarray  # Cost of the properties and buildings
+    expected_rent: np.ndarray  # Rent per opponent turn
+    payback_rounds: np.ndarray  # Rounds to earn back the investment
+    marginal_roi: np.ndarray  # Extra rent per opponent turn for each $ of the step from the previous level
+
+
+def make_returns(groups, investment, expected_rent, n_opponents) -> Returns:
+    """ Returns from the investment and the expected rent (groups by levels)
+    """
+    # The first step is buying the properties
+    marginal_roi = np.diff(expected_rent, axis=1, prepend=0) / np.diff(investment, axis=1, prepend=0)
+    return Returns(groups, investment, expected_rent, investment / (expected_rent * n_opponents), marginal_roi)
+
+
+def street_returns(board: Board, landing: LandingDistribution, n_opponents: int) -> Returns:
+    """ Returns of the street groups, all their properties developed to the same level
+    """
+    streets = [(position, cell) for position, cell in enumerate(board.cells)
+               if isinstance(cell, Property) and cell.group not in (RAILROADS, UTILITIES)]
+    groups = list(dict.fromkeys(cell.group for _, cell in streets))
+    # Which street belongs to which group (groups by streets)
+    membership = np.array([[cell.group == group for _, cell in streets] for group in groups], dtype=float)
+
+    landings = landing.cells[[position for position, _ in streets]] * landing.rolls_per_turn
+    rents = np.array([cell.rents for _, cell in streets], dtype=float)
+    # Undeveloped monopoly: double rent
+    rents[:, 0] *= 2
+    costs = np.array([[cell.cost_base, cell.cost_house] for _, cell in streets], dtype=float)
+    # Hotel costs as the fifth house
+    investment = costs[:, :1] + costs[:, 1:] * np.arange(len(LEVELS))
+
+    return make_returns(groups, membership @ investment, membership @ (landings[:, None] * rents), n_opponents)
+
+
+def ownership_returns(board: Board, landing: LandingDistribution, n_opponents: int,
+                      dice_count: int, dice_sides: int) -> Returns:
+    """ Returns of railroads and utilities by the number owned, on average over which ones are owned
+    """
+    sum_probabilities, _ = roll_outcomes(dice_count, dice_sides)
+    # Utility rent is the dice sum (of a new roll) times the multiplier
+    expected_dice_sum = np.dot(np.arange(len(sum_probabilities)), sum_probabilities)
+    groups = [RAILROADS, UTILITIES]
+    levels = max(len(RAILROAD_MULTIPLIERS), len(UTILITY_MULTIPLIERS))
+    investment = np.full((len(groups), levels), np.nan)
+    expected_rent = np.full((len(groups), levels), np.nan)
+    for row, (group, multipliers) in enumerate(zip(groups, (RAILROAD_MULTIPLIERS, UTILITY_MULTIPLIERS))):
+        cells = board.groups[group]
+        positions = [board.cells.index(cell) for cell in cells]
+        owned = np.arange(1, len(multipliers) + 1)
+        average_landings = landing.cells[positions].mean() * landing.rolls_per_turn
+        base_rent = expected_dice_sum if group == UTILITIES else np.mean([cell.rent_base for cell in cells])
+        investment[row, :len(owned)] = owned * np.mean([cell.cost_base for cell in cells])
+        expected_rent[row, :len(owned)] = owned * average_landings * base_rent * np.array(multipliers)
+    return make_returns(groups, investment, expected_rent, n_opponents)
+
+
+def property_returns(game_config: GameConfig = None) -> List[Returns]:
+    """ Returns of all property groups under the game's rules: streets, then railroads and utilities
+    """
+    if game_config is None:
+        game_config = GameConfig()
+    board = Board(game_config)
+    landing = landing_distribution(game_config)
+    n_opponents = len(game_config.players_list) - 1
+    return [street_returns(board, landing, n_opponents),
+            ownership_returns(board, landing, n_opponents, game_config.dice_count, game_config.dice_sides)]
+
+
+def print_returns(returns: Returns, levels) -> None:
+    """ Print expected rent, payback and marginal ROI of each group by level
+    """
+    for row, group in enumerate(returns.groups):
+        print(f"{group}:")
+        for column, level in enumerate(levels):
+            if np.isnan(returns.investment[row, column]):
+                continue
+            print(f"  - {level}: investment ${returns.investment[row, column]:.0f}, " +
+                  f"rent ${returns.expected_rent[row, column]:.2f} per opponent turn, " +
+                  f"payback {returns.payback_rounds[row, column]:.1f} rounds, " +
+                  f"marginal ROI {100 * returns.marginal_roi[row, column]:.2f}% per opponent turn")
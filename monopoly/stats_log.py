@@ -0,0 +1,144 @@
+""" Columnar statistics of games: per-game results and players' state over the game, written as Parquet files,
+so they can be analyzed reading only the columns needed, without parsing the text of the events log.
+
+There are two tables, each is a directory of Parquet files (a worker writes a file per block of games):
+- games: a row for each player of each game, the game's result and the player's state at the end of the game
+- snapshots: a row for each player (not bankrupt) every snapshot_interval turns, the player's state after the turn
+Rows are in the order of games within a file, but the files are written by the workers in any order.
+"""
+import itertools
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from monopoly.core.game_result import GameResult
+
+GAMES_TABLE = "games"
+GAMES_SCHEMA = pa.schema([
+    ("variant", pa.string()),  # Name of the sweep's variant ("" for a simulation)
+    ("game_number", pa.int64()),
+    ("end", pa.string()),  # GameEnd name
+    ("turns", pa.int32()),
+    ("player", pa.string()),
+    ("bankrupt_turn", pa.int32()),  # Null if the player did not go bankrupt
+    ("cash", pa.int64()),
+    ("net_worth", pa.int64()),
+    ("monopolies", pa.int8()),
+])
+
+SNAPSHOTS_TABLE = "snapshots"
+SNAPSHOTS_SCHEMA = pa.schema([
+    ("variant", pa.string()),
+    ("game_number", pa.int64()),
+    ("turn", pa.int32()),
+    ("player", pa.string()),
+    ("cash", pa.int64()),
+    ("net_worth", pa.int64()),
+    ("position", pa.int8()),
+    ("properties", pa.int8()),
+    ("monopolies", pa.int8()),
+])
+
+# Numbers of the files a process writes, to give them unique names
+FILE_NUMBERS = itertools.count()
+
+
+class StatsLog:
+    """ Statistics of a block of games, kept in memory as rows of values and written out as Parquet files.
+    The caller adds the games' results (add_game), game engines add the snapshots of players' state
+    every snapshot_interval turns (add_snapshot)
+    """
+
+    def __init__(self, stats_dir: Union[str, PathLike], snapshot_interval: int, variant: str = "",
+                 disabled: bool = False):
+        self.stats_dir = Path(stats_dir)
+        self.variant = variant
+        self.disabled = disabled
+        # Turns between snapshots, 0 for no snapshots (engines check it before making a snapshot)
+        self.snapshot_interval = 0 if disabled else snapshot_interval
+        # Values of all rows one after another, without the variant
+        # (not a tuple per row: many small objects kept in memory make garbage collection slow)
+        self.games = []
+        self.snapshots = []
+
+    @property
+    def n_rows(self) -> int:
+        """ Number of rows kept in memory, in both tables """
+        return len(self.games) // (len(GAMES_SCHEMA) - 1) + len(self.snapshots) // (len(SNAPSHOTS_SCHEMA) - 1)
+
+    def add_game(self, game_result: GameResult):
+        """ Add the rows of a game's players """
+        if self.disabled:
+            return
+        bankrupt_turns = dict(game_result.bankruptcies)
+        for player_name, net_worth in game_result.net_worth.items():
+            self.games.extend((game_result.game_number, game_result.end.name, game_result.turns, player_name,
+                               bankrupt_turns.get(player_name), game_result.cash[player_name], net_worth,
+                               game_result.monopolies[player_name]))
+
+    def add_snapshot(self, game_number, turn, player_name, cash, net_worth, position, properties, monopolies):
+        """ Add a snapshot of a player's state after the turn """
+        self.snapshots.extend((game_number, turn, player_name, cash, net_worth, position, properties, monopolies))
+
+    def add_snapshots(self, *columns: List):
+        """ Add snapshots of many players at once, as columns of values (same as the arguments of add_snapshot)
+        """
+        self.snapshots.extend(itertools.chain.from_iterable(zip(*columns)))
+
+    def save(self):
+        """ Write out the rows of each table as a Parquet file """
+        if self.disabled:
+            return
+        for table, schema, values in ((GAMES_TABLE, GAMES_SCHEMA, self.games),
+                                      (SNAPSHOTS_TABLE, SNAPSHOTS_SCHEMA, self.snapshots)):
+            if values:
+                write_table(self.stats_dir / table, schema, values, self.variant)
+
+    def flush(self):
+        """ Write out the rows and empty the log, to keep adding to it """
+        self.save()
+        self.games = []
+        self.snapshots = []
+
+
+def write_table(table_dir: Path, schema: pa.Schema, values: List, variant: str) -> None:
+    """ Write the rows (values one after another, without the variant) as a new Parquet file of the table """
+    n_columns = len(schema) - 1
+    n_rows = len(values) // n_columns
+    columns = [pa.repeat(pa.scalar(variant, pa.string()), n_rows)]
+    columns += [pa.array(values[column::n_columns], type=field.type)
+                for column, field in enumerate(list(schema)[1:])]
+    table_dir.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_arrays(columns, schema=schema),
+                   table_dir / f"{os.getpid()}-{next(FILE_NUMBERS)}.parquet")
+
+
+def iter_table(stats_dir: Union[str, PathLike], table: str, columns: List[str], variant: str = None,
+               batch_size: int = 1_000_000) -> Iterator[pa.RecordBatch]:
+    """ Read the table (GAMES_TABLE or SNAPSHOTS_TABLE) in batches of up to batch_size rows:
+    only the columns needed and only the rows of the variant (all by default).
+    Files are read one by one, in the order of their rows, so the rows of a game come one after another
+    """
+    read_columns = columns if variant is None or "variant" in columns else columns + ["variant"]
+    for file_name in sorted((Path(stats_dir) / table).glob("*.parquet")):
+        for batch in pq.ParquetFile(file_name).iter_batches(batch_size, columns=read_columns):
+            if variant is not None:
+                batch = batch.filter(pc.equal(batch.column("variant"), variant))
+            yield batch.select(columns)
+
+
+def has_table(stats_dir: Union[str, PathLike], table: str) -> bool:
+    """ Whether the table has any files """
+    return any((Path(stats_dir) / table).glob("*.parquet"))
+
+
+def remove_stats(stats_dir: Union[str, PathLike]) -> None:
+    """ Delete the files of all tables (of a previous simulation) """
+    for table in (GAMES_TABLE, SNAPSHOTS_TABLE):
+        for file in (Path(stats_dir) / table).glob("*.parquet"):
+            file.unlink()
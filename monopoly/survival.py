@@ -0,0 +1,82 @@
+""" Survival curves: the share of games in which each player is still in the game after each turn,
+and the share of games that are over (one player left) by each turn, with 95% confidence bands.
+
+The curves are cumulative sums over turns of the bankruptcy counts by player and turn
+(kept by SimulationResults and Analyzer as {(player name, turn): games}), for all players at once.
+Turn 0 is the start of the game, the last turn is the games' turn limit (GameConfig.n_moves).
+"""
+from os import PathLike
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from monopoly.results import survival_margin
+
+
+class SurvivalCurves(NamedTuple):
+    """ Shares of games by turn, and their margins (95% confidence, normal approximation as in survival_margin) """
+    turns: np.ndarray  # 0, 1, ... n_moves
+    players: List[str]
+    alive: np.ndarray  # Players by turns: share of games where the player is not bankrupt after the turn
+    alive_margin: np.ndarray
+    game_over: np.ndarray  # By turns: share of games with only one player left after the turn
+    game_over_margin: np.ndarray
+    n_games: int
+
+
+def count_by_turn(counts: Dict, index, shape) -> np.ndarray:
+    """ Array of the counts {key: count}, at the indexes of the keys (index(key) is a tuple of indexes) """
+    array = np.zeros(shape, dtype=np.int64)
+    if counts:
+        np.add.at(array, tuple(np.array([index(key) for key in counts]).T), list(counts.values()))
+    return array
+
+
+def survival_curves(bankruptcy_turns: Dict[Tuple[str, int], int], lengths: Dict[int, int], n_games: int,
+                    n_moves: int, players: List[str]) -> SurvivalCurves:
+    """ Survival curves from the number of bankruptcies {(player name, turn): games}
+    and the lengths of finished games {game length: games}
+    """
+    player_numbers = {player_name: number for number, player_name in enumerate(players)}
+    bankruptcies = count_by_turn(bankruptcy_turns, lambda key: (player_numbers[key[0]], key[1]),
+                                 (len(players), n_moves + 1))
+    finished = count_by_turn(lengths, lambda length: (length,), n_moves + 1)
+
+    alive = n_games - np.cumsum(bankruptcies, axis=1)
+    game_over = np.cumsum(finished)
+    return SurvivalCurves(np.arange(n_moves + 1), list(players),
+                          alive / n_games, survival_margin(alive, n_games),
+                          game_over / n_games, survival_margin(game_over, n_games), n_games)
+
+
+def median_survival(curves: SurvivalCurves) -> Dict[str, Optional[int]]:
+    """ Turn by which each player is bankrupt in half of the games {player name: turn}, None if it never happens
+    """
+    below_half = curves.alive <= 0.5
+    first_turns = curves.turns[np.argmax(below_half, axis=1)]
+    return {player_name: int(turn) if below_half[player, turn] else None
+            for player, (player_name, turn) in enumerate(zip(curves.players, first_turns))}
+
+
+def print_survival_curves(curves: SurvivalCurves, every: int = 100) -> None:
+    """ Print the curves every `every` turns (and at the last turn), and the players' median survival
+    """
+    print("Survival curves (share of games the player is still in the game after the turn, 95% confidence):")
+    print("  Turn  " + "".join(f"{name:>16}" for name in curves.players + ["Game over"]))
+    turns = list(range(0, len(curves.turns), every))
+    if turns[-1] != curves.turns[-1]:
+        turns.append(int(curves.turns[-1]))
+    for turn in turns:
+        shares = [(curves.alive[player, turn], curves.alive_margin[player, turn])
+                  for player in range(len(curves.players))]
+        shares.append((curves.game_over[turn], curves.game_over_margin[turn]))
+        print(f"  {turn:>4}  " + "".join(f"{share * 100:>7.1f} +- {margin * 100:4.1f}%" for share, margin in shares))
+
+    print("Median survival (turn by which the player is bankrupt in half of the games):")
+    for player_name, turn in median_survival(curves).items():
+        print(f"  - {player_name}: {turn if turn is not None else f'more than {curves.turns[-1]}'}")
+
+
+def save_survival_curves(curves: SurvivalCurves, file_name: Union[str, PathLike]) -> None:
+    """ Save the curves' arrays into a NumPy .npz file (np.load gives them back by the field names) """
+    np.savez(file_name, **{**curves._asdict(), "players": np.array(curves.players)})
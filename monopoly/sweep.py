@@ -0,0 +1,148 @@
+""" Parameter sweep: play the same games under several settings variants on one process pool.
+A variant is a dict of overrides {"ClassName.attribute": value}, for example
+{"GameMechanics.free_parking_money": True, "StandardPlayerSettings.unspendable_cash": 0}.
+Each chunk of games is played with its variant's GameConfig, so chunks of different variants
+can share (and keep busy) the same workers.
+"""
+import itertools
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Type
+
+from tqdm import tqdm
+
+from monopoly.core.batch_game import batch_monopoly_games
+from monopoly.core.compact_game import compact_monopoly_games
+from monopoly.core.game import monopoly_games
+from monopoly.core.game_config import GameConfig, parse_overrides
+from monopoly.core.game_result import GameResult
+from monopoly.log import Log
+from monopoly.log_settings import LogSettings
+from monopoly.results import ResultBlock, SimulationResults
+from monopoly.stats_log import StatsLog
+from settings import SimulationSettings
+
+
+# Lines of the events log a worker keeps before writing them out (a few dozen games)
+LOG_BLOCK_LINES = 100_000
+# Rows of statistics a worker keeps before writing them out as a Parquet file
+STATS_BLOCK_ROWS = 1_000_000
+
+
+def play_games(games_function: Callable[[List[Tuple[int, int]], GameConfig, Log, StatsLog], Iterator[GameResult]],
+               game_seed_pairs: List[Tuple[int, int]], game_config: GameConfig = None,
+               variant: str = "") -> ResultBlock:
+    """ Play a chunk of games one by one (in a worker process), with monopoly_games or compact_monopoly_games.
+    Games share the worker's events log shard, written out every LOG_BLOCK_LINES lines, not after every game,
+    and the statistics (of the sweep's variant), written out every STATS_BLOCK_ROWS rows
+    """
+    block_log = LogSettings.new_events_log(shard=True)
+    block_log.first_game = game_seed_pairs[0][0] if game_seed_pairs else None
+    block_log.variant = variant
+    stats_log = LogSettings.new_stats_log(variant)
+    block = ResultBlock(game_config)
+    for games_played, game_result in enumerate(games_function(game_seed_pairs, game_config, block_log, stats_log), 1):
+        block.add(game_result)
+        stats_log.add_game(game_result)
+        if len(block_log.content) > LOG_BLOCK_LINES and games_played < len(game_seed_pairs):
+            block_log.flush()
+            block_log.first_game = game_seed_pairs[games_played][0]
+        if stats_log.n_rows > STATS_BLOCK_ROWS:
+            stats_log.flush()
+    block_log.save()
+    stats_log.save()
+    return block
+
+
+def play_batches(game_seed_pairs: List[Tuple[int, int]], game_config: GameConfig = None,
+                 variant: str = "") -> ResultBlock:
+    """ Play a chunk of games with the batch engine (in a worker process) """
+    stats_log = LogSettings.new_stats_log(variant)
+    block = ResultBlock(game_config)
+    for game_result in batch_monopoly_games(game_seed_pairs, game_config, stats_log):
+        block.add(game_result)
+        stats_log.add_game(game_result)
+    stats_log.save()
+    return block
+
+
+def chunk_function(config: Type[SimulationSettings]) -> Callable[[List[Tuple[int, int]], GameConfig, str], ResultBlock]:
+    """ Function to play a chunk of games with the engine chosen in config """
+    if config.batch_size:
+        return play_batches
+    return partial(play_games, compact_monopoly_games if config.compact_engine else monopoly_games)
+
+
+def settings_grid(grid: Dict[str, List[Any]]) -> Dict[str, Dict[str, Any]]:
+    """ All combinations of the grid {"ClassName.attribute": [values]} as variants {variant name: overrides}
+    for example, {"GameMechanics.free_parking_money": [False, True]} gives two variants:
+    "free_parking_money=False" and "free_parking_money=True"
+    """
+    keys = list(grid)
+    variants = {}
+    for values in itertools.product(*grid.values()):
+        name = ", ".join(f"{key.split('.')[-1]}={value}" for key, value in zip(keys, values))
+        variants[name] = dict(zip(keys, values))
+    return variants
+
+
+def play_variant_chunk(variant_name: str, overrides: Dict[str, Any], config: Type[SimulationSettings],
+                       game_seed_pairs: List[Tuple[int, int]]) -> Tuple[str, ResultBlock]:
+    """ Play a chunk of games with the variant's settings (in a worker process) """
+    game_config = GameConfig(overrides, config)
+    return variant_name, chunk_function(config)(game_seed_pairs, game_config, variant_name)
+
+
+def run_sweep(variants: Dict[str, Dict[str, Any]], config: Type[SimulationSettings] = SimulationSettings,
+              executor: Executor = None) -> Dict[str, SimulationResults]:
+    """ Play config.n_games games for each variant {variant name: overrides}, return results per variant.
+    All variants play the same games (same seeds), so differences between them are due to the settings only.
+    Chunks of all variants are interleaved on one pool: pass an executor to reuse it across several sweeps.
+    Logs and statistics of earlier runs are deleted; the events log has the games of each variant one after another
+    (scripts/decode_log.py renders one variant), the bankruptcies log has the variant in the first column,
+    and the number of games played is recorded for each variant (for the Analyzer).
+    """
+    for overrides in variants.values():
+        parse_overrides(overrides)
+    _, bankruptcies_log = LogSettings.init_logs()
+    bankruptcies_log.reset("variant\tgame_number\tplayer_bankrupt\tturn")
+
+    chunk_size = config.batch_size or config.chunk_size
+    master_rng = random.Random(config.seed)
+    game_seed_pairs = [(i + 1, master_rng.getrandbits(32)) for i in range(config.n_games)]
+    chunks = [game_seed_pairs[i:i + chunk_size] for i in range(0, config.n_games, chunk_size)]
+
+    # Same chunk for all variants goes next to each other, so all variants progress together
+    tasks = [(variant_name, overrides, chunk) for chunk in chunks for variant_name, overrides in variants.items()]
+
+    results = {variant_name: SimulationResults(GameConfig(overrides, config))
+               for variant_name, overrides in variants.items()}
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=config.multi_process)
+    try:
+        futures = [executor.submit(play_variant_chunk, variant_name, overrides, config, chunk)
+                   for variant_name, overrides, chunk in tasks]
+        with tqdm(total=config.n_games * len(variants), desc="Simulating Monopoly games (sweep)") as progress:
+            for future in futures:
+                variant_name, block = future.result()
+                results[variant_name].merge(block.results)
+                for game_number, player_name, turn in block.bankruptcies:
+                    bankruptcies_log.add("{}\t{}\t{}\t{}", variant_name, game_number, player_name, turn)
+                progress.update(block.results.n_games)
+    finally:
+        if own_executor:
+            executor.shutdown()
+        LogSettings.merge_events_shards(list(variants))
+    bankruptcies_log.save()
+    LogSettings.save_games_played({variant_name: variant_results.n_games
+                                   for variant_name, variant_results in results.items()})
+    return results
+
+
+def print_sweep(results: Dict[str, SimulationResults]) -> None:
+    """ Print the analysis of each variant """
+    for variant_name, variant_results in results.items():
+        print(f"\n=== {variant_name} ===")
+        variant_results.run_all()
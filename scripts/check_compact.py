@@ -0,0 +1,45 @@
+import random
+import sys
+
+from monopoly.core.compact_game import compact_monopoly_games
+from monopoly.core.game import monopoly_games
+from monopoly.core.game_config import GameConfig
+from monopoly.log import Log
+from monopoly.sweep import settings_grid
+from settings import SimulationSettings
+
+# Variants to check (on top of settings.py), the rules the compact engine handles differently from the defaults
+CHECK_GRID = {
+    "GameMechanics.free_parking_money": [False, True],
+    "GameMechanics.available_houses": [32, 20],
+}
+
+
+def check_variant(overrides, n_games):
+    """ Play the games with both engines, return the number of the first game that differs (None if all are the same)
+    Games are the same if their results and their events logs (as text) are the same
+    """
+    game_config = GameConfig(overrides)
+    master_rng = random.Random(SimulationSettings.seed)
+    game_seed_pairs = [(i + 1, master_rng.getrandbits(32)) for i in range(n_games)]
+    for game_number_and_seeds in game_seed_pairs:
+        object_log, compact_log = Log(), Log()
+        object_result = next(monopoly_games([game_number_and_seeds], game_config, object_log))
+        compact_result = next(compact_monopoly_games([game_number_and_seeds], game_config, compact_log))
+        if object_result != compact_result or object_log.content != compact_log.content:
+            return game_number_and_seeds[0]
+    return None
+
+
+if __name__ == "__main__":
+    # Check that the compact engine plays the same games as monopoly_game: check_compact.py [number of games]
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    all_same = True
+    for variant_name, overrides in settings_grid(CHECK_GRID).items():
+        different_game = check_variant(overrides, n_games)
+        if different_game is None:
+            print(f"{variant_name}: {n_games} games are the same")
+        else:
+            print(f"{variant_name}: game {different_game} is different")
+            all_same = False
+    sys.exit(0 if all_same else 1)
@@ -0,0 +1,13 @@
+import sys
+
+from monopoly.event_log import write_text_log
+from monopoly.log_settings import LogSettings
+
+if __name__ == "__main__":
+    # Render the binary events log as text: decode_log.py [events.bin [events.log [variant]]]
+    # (a sweep's log has all variants: give the variant's name to render only its games)
+    log_path = sys.argv[1] if len(sys.argv) > 1 else LogSettings.EVENTS_LOG_PATH
+    text_path = sys.argv[2] if len(sys.argv) > 2 else LogSettings.EVENTS_TEXT_PATH
+    variant = sys.argv[3] if len(sys.argv) > 3 else None
+    write_text_log(log_path, text_path, variant)
+    print(f"Events log written to {text_path}")
@@ -0,0 +1,7 @@
+from monopoly.core.board import Board
+from monopoly.core.game_config import GameConfig
+from monopoly.markov import landing_distribution, print_landing_distribution
+
+if __name__ == "__main__":
+    game_config = GameConfig()
+    print_landing_distribution(landing_distribution(game_config), Board(game_config))
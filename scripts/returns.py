@@ -0,0 +1,7 @@
+from monopoly.core.game_config import GameConfig
+from monopoly.returns import LEVELS, property_returns, print_returns
+
+if __name__ == "__main__":
+    streets, railroads_and_utilities = property_returns(GameConfig())
+    print_returns(streets, LEVELS)
+    print_returns(railroads_and_utilities, [f"{owned} owned" for owned in range(1, 5)])
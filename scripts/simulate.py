@@ -1,30 +1,91 @@
 import random
-from typing import Type
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Type, List, Tuple, Iterator
 
-from tqdm.contrib.concurrent import process_map
+from tqdm import tqdm
 
-from monopoly.analytics import Analyzer
-from monopoly.core.game import monopoly_game
+from monopoly.core.game_config import GameConfig
 from monopoly.log_settings import LogSettings
+from monopoly.results import ResultBlock, SimulationResults
+from monopoly.sweep import chunk_function
 from settings import SimulationSettings
 
 
 def run_simulation(config: Type[SimulationSettings]) -> None:
-    """Simulate N games in parallel, then print an analysis."""
-    LogSettings.init_logs()
+    """Simulate N games in parallel, then print an analysis.
+    Each worker plays a block of games and sends back their aggregated results in one piece,
+    the bankruptcies log is written once, by this (parent) process.
+    If config.target_margin or config.time_budget is set, the simulation may stop before all N games are played.
+    """
+    _, bankruptcies_log = LogSettings.init_logs()
+    game_config = GameConfig(simulation_settings=config)
+    results = SimulationResults(game_config)
 
     master_rng = random.Random(config.seed)
     game_seed_pairs = [(i + 1, master_rng.getrandbits(32)) for i in range(config.n_games)]
 
-    process_map(
-        monopoly_game,
-        game_seed_pairs,
-        max_workers=config.multi_process,
-        total=config.n_games,
-        desc="Simulating Monopoly games",
-    )
+    with ProcessPoolExecutor(max_workers=config.multi_process) as executor:
+        if config.target_margin or config.time_budget:
+            blocks = play_until_accurate(executor, config, game_config, game_seed_pairs, results)
+        else:
+            block_size = config.batch_size or max(1, config.n_games // (config.multi_process * 16))
+            blocks = executor.map(chunk_function(config),
+                                  [game_seed_pairs[i:i + block_size] for i in range(0, config.n_games, block_size)],
+                                  repeat(game_config))
 
-    Analyzer().run_all()
+        with tqdm(total=config.n_games, desc="Simulating Monopoly games") as progress:
+            for block in blocks:
+                results.merge(block.results)
+                for game_number, player_name, turn in block.bankruptcies:
+                    bankruptcies_log.add("{}\t{}\t{}", game_number, player_name, turn)
+                progress.update(block.results.n_games)
+
+    # Workers wrote their events logs to their own shards: merge them, games in order.
+    # Early stopping counts the first results.n_games games: chunks that were still playing when it stopped
+    # (they are finished by now) are left out of the log
+    LogSettings.merge_events_shards(last_game=results.n_games)
+    bankruptcies_log.save()
+    # Early stopping can play fewer games than config.n_games: the Analyzer reads the number of games played
+    LogSettings.save_games_played({"": results.n_games})
+    results.run_all()
+
+
+def play_until_accurate(executor: ProcessPoolExecutor, config: Type[SimulationSettings], game_config: GameConfig,
+                        game_seed_pairs: List[Tuple[int, int]], results: SimulationResults) -> Iterator[ResultBlock]:
+    """Dispatch games in chunks, yield their results (to be merged into `results`) chunk by chunk,
+    and stop once all survival rate margins in `results` are below config.target_margin,
+    or the time budget is used up. Stops after all game_seed_pairs are played at the latest.
+    Chunks are consumed in order, so (without time budget) results do not depend on the timing of the workers.
+    """
+    chunk_size = config.batch_size or config.chunk_size
+    play_chunk = chunk_function(config)
+    chunks = (game_seed_pairs[i:i + chunk_size] for i in range(0, len(game_seed_pairs), chunk_size))
+
+    # Keep every worker busy, with one chunk waiting in the queue for each
+    pending = deque(executor.submit(play_chunk, chunk, game_config)
+                    for chunk, _ in zip(chunks, range(2 * config.multi_process)))
+    start_time = time.perf_counter()
+    while pending:
+        yield pending.popleft().result()
+
+        margin = max(results.survival_margins().values())
+        if config.target_margin and margin < config.target_margin:
+            print(f"\nTarget margin reached: {margin * 100:.2f}% after {results.n_games} games")
+            break
+        if config.time_budget and time.perf_counter() - start_time > config.time_budget:
+            print(f"\nTime budget is over: margin is {margin * 100:.2f}% after {results.n_games} games")
+            break
+
+        next_chunk = next(chunks, None)
+        if next_chunk:
+            pending.append(executor.submit(play_chunk, next_chunk, game_config))
+
+    # Don't play the chunks that were queued but are not needed
+    for future in pending:
+        future.cancel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+from monopoly.analytics import Analyzer
+from monopoly.log_settings import LogSettings
+from monopoly.survival import print_survival_curves, save_survival_curves
+
+if __name__ == "__main__":
+    # Survival curves of the last simulation (from its bankruptcies log or statistics), saved as NumPy arrays
+    curves = Analyzer().survival_curves()
+    print_survival_curves(curves)
+    save_survival_curves(curves, LogSettings.SURVIVAL_PATH)
+    print(f"Survival curves saved to {LogSettings.SURVIVAL_PATH}")
@@ -0,0 +1,11 @@
+from monopoly.sweep import run_sweep, settings_grid, print_sweep
+from settings import SimulationSettings
+
+# Variants to compare: all combinations of these settings (on top of settings.py)
+SWEEP_GRID = {
+    "GameMechanics.free_parking_money": [False, True],
+    "HeroPlayerSettings.unspendable_cash": [0, 200, 500],
+}
+
+if __name__ == "__main__":
+    print_sweep(run_sweep(settings_grid(SWEEP_GRID), SimulationSettings))
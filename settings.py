@@ -33,7 +33,21 @@ class SimulationSettings:
     n_moves: int = 1000  # Max Number of moves per game
     seed: int = 0  # Random seed to start simulation with
     multi_process: int = 4  # Number of parallel processes to use in the simulation
-    
+    compact_engine: bool = False  # Use the compact (structure-of-arrays) engine, results are the same
+    # Play games in lockstep batches of this size with the vectorized (NumPy) batch engine, 0 to play one by one.
+    # Dice rolls are the same as with dice_block_size (whatever the batch size), and there is no events log
+    batch_size: int = 0
+    # Early stopping: play games in chunks of `chunk_size` (or batch_size) until all players' survival rate
+    # margins (95% confidence) are below target_margin, or n_games are played, or time_budget seconds pass.
+    target_margin: float = 0  # e.g. 0.01 for +-1%, 0 to always play all n_games
+    time_budget: float = 0  # Seconds, 0 for no time limit
+    chunk_size: int = 100
+    # Roll dice in advance, in blocks of this size (with NumPy): faster, the rolls are different from the default
+    # (but reproducible, see PrerolledDice). 0 to roll dice one by one
+    dice_block_size: int = 0
+    # Debug mode: check incrementally maintained values (like players' net worth) against a full recount every move
+    debug_checks: bool = False
+
     # Cash that will be considered cannot go bankrupt. See this paper that estimates the probability that the game
     # will last forever. https://www.researchgate.net/publication
     # /224123876_Estimating_the_probability_that_the_game_of_Monopoly_never_ends